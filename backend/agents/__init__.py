@@ -1,12 +1,26 @@
 """
 Agents module - Multi-agent architecture for AI Operations Assistant
 """
-from .planner_agent import PlannerAgent, planner_agent
-from .executor_agent import ExecutorAgent, executor_agent
-from .verifier_agent import VerifierAgent, verifier_agent
+from lazy import lazy_attributes
+from . import planner_agent as _planner, executor_agent as _executor, verifier_agent as _verifier
+from .planner_agent import PlannerAgent
+from .executor_agent import ExecutorAgent
+from .verifier_agent import VerifierAgent
+from .plan_cache import PlanCache, plan_cache
+from .fast_planner import FastPlanner, fast_planner
+
+# The agent singletons (and their LLM clients) are built on first access
+__getattr__ = lazy_attributes(
+    globals(),
+    planner_agent=lambda: _planner.planner_agent,
+    executor_agent=lambda: _executor.executor_agent,
+    verifier_agent=lambda: _verifier.verifier_agent
+)
 
 __all__ = [
     "PlannerAgent", "planner_agent",
     "ExecutorAgent", "executor_agent",
-    "VerifierAgent", "verifier_agent"
+    "VerifierAgent", "verifier_agent",
+    "PlanCache", "plan_cache",
+    "FastPlanner", "fast_planner"
 ]
@@ -0,0 +1,130 @@
+"""
+Execution Context - Incrementally built context for reasoning steps
+"""
+import asyncio
+
+from llm.prompt_compaction import compact, estimate_tokens, CHARS_PER_TOKEN
+
+# Characters of a step's compact output kept in the rolling summary
+DIGEST_CHARS = 200
+
+
+class ContextSlice:
+    """Rendered context for one step, with the same report shape as prompt_compaction.compact"""
+
+    def __init__(self, text: str, stats: dict):
+        self.text = text
+        self.stats = stats
+
+
+class ExecutionContext:
+    """
+    Outputs of finished plan steps, serialized once as they complete
+
+    Each output is compacted exactly once, when its step finishes, so a step
+    only pays for joining the entries it references. Over budget, the oldest
+    entries fold into short digest lines (and the oldest digests drop out),
+    so a step that builds on everything before it stays bounded however long
+    the plan is. With a summarizer and summary_every=K, the steps are also
+    condensed into a rolling summary once every K steps, which then stands in
+    for their entries.
+    """
+
+    def __init__(self, budget_tokens: int, entry_tokens: int = 400, summary_every: int = 0, summarizer=None):
+        """
+        Args:
+            budget_tokens: Max estimated tokens of rendered context (<= 0 = no limit)
+            entry_tokens: Max estimated tokens of one step's entry
+            summary_every: Steps between summarizer calls (0 = digest lines only)
+            summarizer: Optional coroutine function (previous summary, new entries text) -> summary
+        """
+        self.budget_tokens = budget_tokens
+        self.entry_tokens = entry_tokens
+        self.summary_every = summary_every
+        self.summarizer = summarizer
+        self._entries = {}
+        self._raw_tokens = {}
+        self._digests = {}
+        self._order = []
+        self._summary = ""
+        self._summarized = set()
+        self._lock = asyncio.Lock()
+
+    async def add(self, step_number, step_result: dict):
+        """Record a finished step; serializes its output once"""
+        status = step_result.get("status")
+        payload = step_result.get("output") if status == "success" else {
+            "status": status, "error": step_result.get("error")
+        }
+        text, report = compact(payload, self.entry_tokens)
+        self._entries[step_number] = text
+        self._raw_tokens[step_number] = report["raw_tokens"]
+        self._digests[step_number] = text if len(text) <= DIGEST_CHARS else text[:DIGEST_CHARS - 1] + "…"
+        self._order.append(step_number)
+
+        if self.summarizer is None or self.summary_every <= 0:
+            return
+        async with self._lock:
+            pending = [number for number in self._order if number not in self._summarized]
+            if len(pending) < self.summary_every:
+                return
+            new_entries = "\n".join(f"Step {number}: {self._entries[number]}" for number in pending)
+            try:
+                self._summary = await self.summarizer(self._summary, new_entries)
+                self._summarized.update(pending)
+            except Exception:
+                # Digest lines still cover these steps
+                pass
+
+    def render(self, step_numbers: list, summarize: bool = False) -> ContextSlice:
+        """
+        Build the context for one step
+
+        Args:
+            step_numbers: Finished steps the step depends on, in plan order
+            summarize: The step builds on everything before it, so steps
+                already folded into the rolling summary are given as the summary
+
+        Returns:
+            ContextSlice with the text and a size report
+        """
+        covered = [number for number in step_numbers if number in self._entries]
+        if summarize and self._summary:
+            head = [f"Summary of earlier steps: {self._summary}"]
+            included = [number for number in covered if number not in self._summarized]
+        else:
+            head = []
+            included = list(covered)
+
+        lines = [f"Step {number}: {self._entries[number]}" for number in included]
+        digests = []
+        omitted = 0
+        size = sum(len(line) + 1 for line in head + lines)
+        budget_chars = self.budget_tokens * CHARS_PER_TOKEN
+        truncated = False
+        if self.budget_tokens > 0:
+            # Fold the oldest full entries into digest lines, then drop the oldest digests
+            while len(lines) > 1 and size > budget_chars:
+                number = included.pop(0)
+                size -= len(lines.pop(0)) + 1
+                digests.append(f"Step {number}: {self._digests[number]}")
+                size += len(digests[-1]) + 1
+                truncated = True
+            while digests and size > budget_chars:
+                size -= len(digests.pop(0)) + 1
+                omitted += 1
+
+        if omitted:
+            head.append(f"({omitted} earlier steps omitted)")
+        text = "\n".join(head + digests + lines)
+        if self.budget_tokens > 0 and len(text) > budget_chars:
+            text = text[:budget_chars - 1] + "…"
+            truncated = True
+
+        return ContextSlice(text, {
+            "raw_tokens": sum(self._raw_tokens[number] for number in covered),
+            "tokens": estimate_tokens(text),
+            "budget_tokens": self.budget_tokens,
+            "truncated": truncated,
+            "summarized_steps": len(self._summarized)
+        })
@@ -1,38 +1,287 @@
 """
 Executor Agent - Executes plan steps and calls APIs
 """
+import re
+import time
+import asyncio
+from datetime import datetime, timezone
+
+from config import settings
+from lazy import lazy_attributes
 from llm.gemini_client import GeminiClient, run_async
-from tools import AVAILABLE_TOOLS
+from llm.prompt_compaction import compact, estimate_tokens
+from metrics import (
+    classify_error, STEP_DURATION, STEPS, STEPS_IN_FLIGHT, TOOL_CACHE_RESULTS, TOOL_ERRORS, PROMPT_TOKENS
+)
+from resilience import queue_timer, add_queue_time
+from tools import tool_cache, tool_registry
+from tools.registry import LatencyEWMA
+from tools.single_flight import SingleFlightTool
+from .execution_context import ExecutionContext, ContextSlice
+
+# Expected latency of a reasoning step until the executor has measured one
+REASONING_LATENCY_MS = 1500
+
+# Matches explicit references to earlier steps, e.g. "step 2", "{step_2}", "Step #2"
+STEP_REFERENCE = re.compile(r"\bstep[\s_#-]*(\d+)\b", re.IGNORECASE)
+# Matches implicit references to everything that came before
+PREVIOUS_REFERENCE = re.compile(
+    r"\b(previous|prior|above|earlier|preceding)\s+(steps?|results?|outputs?|data)\b",
+    re.IGNORECASE
+)
+
+
+def build_step_dependencies(steps: list) -> list:
+    """
+    Build the dependency graph (DAG) of a plan
+    
+    Tool steps are roots unless their input references earlier outputs.
+    Reasoning steps depend on the steps they reference, or on every
+    preceding step when they reference none explicitly.
+    
+    Args:
+        steps: List of plan steps
+        
+    Returns:
+        list where item i is the set of step indexes step i depends on
+    """
+    index_by_number = {}
+    dependencies = []
+    
+    for index, step in enumerate(steps):
+        is_reasoning = step.get("tool") is None
+        # Tool actions merely describe the call; only the input can carry a reference
+        fields = ("action", "tool_input") if is_reasoning else ("tool_input",)
+        text = " ".join(str(step.get(field) or "") for field in fields)
+        
+        referenced = {
+            index_by_number[int(number)]
+            for number in STEP_REFERENCE.findall(text)
+            if int(number) in index_by_number
+        }
+        
+        if PREVIOUS_REFERENCE.search(text) or (is_reasoning and not referenced):
+            referenced = set(range(index))
+        
+        dependencies.append(referenced)
+        index_by_number.setdefault(step.get("step_number", index + 1), index)
+    
+    return dependencies
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class ExecutorAgent:
     """Agent responsible for executing plan steps and calling tools"""
     
-    def __init__(self):
+    def __init__(self, max_concurrency: int = None, batching: bool = None, prompt_token_budget: int = None,
+                 incremental_context: bool = None, slowest_first: bool = None):
+        self.max_concurrency = max_concurrency or settings.get_int("EXECUTOR_MAX_CONCURRENCY", 4)
+        if prompt_token_budget is None:
+            prompt_token_budget = settings.get_int("EXECUTOR_PROMPT_TOKEN_BUDGET", 1500)
+        self.prompt_token_budget = prompt_token_budget
+        if incremental_context is None:
+            incremental_context = settings.get_bool("EXECUTOR_INCREMENTAL_CONTEXT", True)
+        self.incremental_context = incremental_context
+        self.context_entry_tokens = settings.get_int("EXECUTOR_CONTEXT_ENTRY_TOKENS", 400)
+        self.context_summary_every = settings.get_int("EXECUTOR_CONTEXT_SUMMARY_EVERY", 0)
+        if batching is None:
+            batching = settings.get_bool("TOOL_BATCHING_ENABLED", True)
+        self.batching = batching
+        if slowest_first is None:
+            slowest_first = settings.get_bool("EXECUTOR_SLOWEST_FIRST", True)
+        self.slowest_first = slowest_first
+        self.reasoning_latency = LatencyEWMA(REASONING_LATENCY_MS)
         self.llm = GeminiClient(
             system_message="""You are an Executor Agent for an AI Operations Assistant.
 Your job is to execute individual steps of a plan and process tool outputs.
-When a step requires reasoning without a tool, provide helpful analysis."""
+When a step requires reasoning without a tool, provide helpful analysis.""",
+            name="executor",
+            cache_ttl=600
+        )
+        # ToolRegistry: {name: tool} plus each tool's ToolSpec
+        self.tools = tool_registry
+        self.cache = tool_cache
+    
+    async def call_tool(self, tool_name: str, tool_input) -> tuple:
+        """Run one tool call through the result cache; returns (tool_result, cache_status)"""
+        tool = self.tools[tool_name]
+        
+        async def upstream(target):
+            started = time.perf_counter()
+            tool_result = None
+            try:
+                tool_result = await target.execute_async(tool_input)
+                return tool_result
+            finally:
+                # An open circuit answers without a request, so it says nothing about latency
+                if tool_result is None or not tool_result.get("circuit_open"):
+                    self.tools.observe(tool_name, time.perf_counter() - started)
+        
+        async def load():
+            # Only the single-flight leader reaches upstream and is measured
+            if isinstance(tool, SingleFlightTool):
+                return await tool.call_async(tool_input, upstream)
+            return await upstream(tool)
+        
+        tool_result, cache_status = await self.cache.fetch_async(tool_name, tool_input, load)
+        return await self._stale_fallback(tool_name, tool_input, tool_result, cache_status)
+    
+    async def _stale_fallback(self, tool_name: str, tool_input, tool_result: dict, cache_status: str) -> tuple:
+        """
+        Serve the last cached result, however old, while the tool's circuit is open
+        
+        The result is marked "stale" so the verifier can say the data may be
+        out of date; cache_status becomes "stale_fallback".
+        """
+        if not tool_result.get("circuit_open"):
+            return tool_result, cache_status
+        cached, state = await self.cache.lookup_async(tool_name, tool_input, allow_expired=True)
+        if cached is None:
+            return tool_result, cache_status
+        return {**cached, "stale": True}, "stale_fallback"
+    
+    def is_batchable(self, tool_name: str) -> bool:
+        """True when the tool can serve several inputs in one execute_many_async call"""
+        spec = self.tools.spec(tool_name) if tool_name else None
+        return self.batching and spec is not None and spec.batchable
+    
+    def is_shareable(self, tool_name: str) -> bool:
+        """True when identical calls to the tool may be served by one request (it is idempotent)"""
+        spec = self.tools.spec(tool_name) if tool_name else None
+        return spec is not None and spec.idempotent
+    
+    async def call_tool_batch(self, tool_name: str, tool_inputs: list) -> dict:
+        """
+        Run several inputs through one execute_many_async call
+        
+        Inputs with a fresh result in the disk tier (missed by the memory-only
+        check in prefetch_tool_calls) are served from it and left out of the call.
+        
+        Returns:
+            {tool_input: (tool_result, cache_status)}
+        """
+        lookups = await asyncio.gather(*(self.cache.lookup_async(tool_name, tool_input) for tool_input in tool_inputs))
+        results, misses = {}, []
+        for tool_input, (cached, state) in zip(tool_inputs, lookups):
+            if state == "fresh":
+                results[tool_input] = (cached, "hit")
+            else:
+                misses.append(tool_input)
+        if not misses:
+            return results
+        started = time.perf_counter()
+        outputs = await self.tools[tool_name].execute_many_async(misses)
+        if not all(output.get("circuit_open") for output in outputs.values()):
+            self.tools.observe(tool_name, time.perf_counter() - started, calls=len(misses))
+        for tool_input in misses:
+            tool_result = outputs.get(tool_input) or {"success": False, "error": "Missing from batch response"}
+            await self.cache.store_result_async(tool_name, tool_input, tool_result)
+            results[tool_input] = await self._stale_fallback(tool_name, tool_input, tool_result, "batched")
+        return results
+    
+    def prefetch_tool_calls(self, calls: dict, semaphore: asyncio.Semaphore = None) -> dict:
+        """
+        Start a set of independent tool calls at once
+        
+        Uncached inputs of a batchable tool go out as a single call_tool_batch;
+        everything else runs through call_tool individually.
+        
+        Args:
+            calls: {ToolCache.make_key(tool, input): (tool_name, tool_input)}
+            semaphore: Optional semaphore bounding the calls in flight
+            
+        Returns:
+            {key: future of (tool_result, cache_status, queue_ms)}, usable as prefetched
+        """
+        async def limited(call, *args):
+            with queue_timer() as timer:
+                if semaphore is None:
+                    outcome = await call(*args)
+                else:
+                    async with semaphore:
+                        outcome = await call(*args)
+            return outcome, timer.ms
+        
+        async def single(tool_name, tool_input):
+            (tool_result, cache_status), queue_ms = await limited(self.call_tool, tool_name, tool_input)
+            return tool_result, cache_status, queue_ms
+        
+        async def batch_item(batch, tool_input):
+            results, queue_ms = await batch
+            return (*results[tool_input], queue_ms)
+        
+        futures, batches = {}, {}
+        for key, (tool_name, tool_input) in calls.items():
+            # Memory tier only: this runs on the event loop, call_tool_batch checks the disk tier
+            if self.is_batchable(tool_name) and not self.cache.peek(tool_name, tool_input):
+                batches.setdefault(tool_name, {})[key] = tool_input
+            else:
+                futures[key] = asyncio.ensure_future(single(tool_name, tool_input))
+        
+        for tool_name, inputs in batches.items():
+            if len(inputs) == 1:
+                (key, tool_input), = inputs.items()
+                futures[key] = asyncio.ensure_future(single(tool_name, tool_input))
+                continue
+            batch = asyncio.ensure_future(limited(self.call_tool_batch, tool_name, list(inputs.values())))
+            for key, tool_input in inputs.items():
+                futures[key] = asyncio.ensure_future(batch_item(batch, tool_input))
+        return futures
+    
+    async def summarize_context(self, previous_summary: str, new_entries: str) -> str:
+        """Fold newly finished step outputs into the rolling context summary"""
+        prompt = f"""Update this running summary of a multi-step task with the new step outputs.
+Keep every fact a later step might need (names, numbers, conclusions) and drop the rest.
+
+Current summary:
+{previous_summary or 'None yet'}
+
+New step outputs:
+{new_entries}
+
+Respond with the updated summary only, in at most 120 words."""
+        return await self.llm.generate(prompt, session_id="executor")
+    
+    def new_context(self) -> ExecutionContext:
+        """Empty incremental context for one plan run"""
+        return ExecutionContext(
+            self.prompt_token_budget,
+            entry_tokens=self.context_entry_tokens,
+            summary_every=self.context_summary_every,
+            summarizer=self.summarize_context
         )
-        self.tools = AVAILABLE_TOOLS
     
     def execute_step(self, step: dict, context: dict = None) -> dict:
+        """Synchronous wrapper around execute_step_async"""
+        return run_async(self.execute_step_async(step, context))
+    
+    async def execute_step_async(self, step: dict, context: dict = None, prefetched: dict = None) -> dict:
         """
         Execute a single step from the plan
         
         Args:
             step: Step dict with action, tool, tool_input
-            context: Previous execution results for reference
+            context: Previous execution results for reference, as a dict of
+                step results or a ContextSlice rendered by ExecutionContext
+            prefetched: Optional map of ToolCache.make_key(tool, input) to an
+                awaitable of (tool_result, cache_status, queue_ms), shared by
+                every step making that call (see prefetch_tool_calls)
             
         Returns:
-            dict with step execution result
+            dict with step execution result; queue_ms is the time its calls
+            spent queued by upstream rate limiters, when there was any
         """
         context = context or {}
         step_number = step.get("step_number", 0)
         action = step.get("action", "Unknown action")
         tool_name = step.get("tool")
-        tool_input = step.get("tool_input")
         
+        metric_tool = tool_name or "reasoning"
+        STEPS_IN_FLIGHT.inc(tool=metric_tool)
+        started_at = _utc_now()
         result = {
             "step_number": step_number,
             "action": action,
@@ -42,58 +291,150 @@ When a step requires reasoning without a tool, provide helpful analysis."""
             "error": None
         }
         
-        try:
-            if tool_name and tool_name in self.tools:
-                # Execute the tool
-                tool = self.tools[tool_name]
-                tool_result = tool.execute(tool_input)
-                
-                if tool_result.get("success", False):
-                    result["status"] = "success"
-                    result["output"] = tool_result
-                else:
-                    result["status"] = "failed"
-                    result["error"] = tool_result.get("error", "Tool execution failed")
-                    result["output"] = tool_result
-                    
-            elif tool_name and tool_name not in self.tools:
+        with queue_timer() as timer:
+            try:
+                await self._run_step(result, step, context, prefetched)
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = str(e)
+            finally:
+                STEPS_IN_FLIGHT.dec(tool=metric_tool)
+        
+        if timer.ms >= 0.01:
+            result["queue_ms"] = round(timer.ms, 2)
+        finished_at = _utc_now()
+        result["started_at"] = started_at.isoformat()
+        result["finished_at"] = finished_at.isoformat()
+        result["duration_ms"] = round((finished_at - started_at).total_seconds() * 1000, 2)
+        
+        STEP_DURATION.observe(result["duration_ms"] / 1000, tool=metric_tool)
+        STEPS.inc(tool=metric_tool, status=result["status"])
+        if result.get("cache_status"):
+            TOOL_CACHE_RESULTS.inc(tool=metric_tool, cache_status=result["cache_status"])
+        if tool_name and result["status"] != "success":
+            TOOL_ERRORS.inc(tool=metric_tool, type=classify_error(result["error"]))
+        return result
+    
+    async def _run_step(self, result: dict, step: dict, context, prefetched: dict):
+        """Execute the tool or reasoning call of a step, filling in result"""
+        action = step.get("action", "Unknown action")
+        tool_name = step.get("tool")
+        tool_input = step.get("tool_input")
+        
+        if tool_name and tool_name in self.tools:
+            # Execute the tool, or join a call already started for the plan or batch
+            shared = (prefetched or {}).get(self.cache.make_key(tool_name, tool_input))
+            if shared is not None:
+                tool_result, result["cache_status"], queue_ms = await asyncio.shield(shared)
+                result["deduplicated"] = True
+                add_queue_time(queue_ms)
+            else:
+                tool_result, result["cache_status"] = await self.call_tool(tool_name, tool_input)
+            
+            if tool_result.get("success", False):
+                result["status"] = "success"
+                result["output"] = tool_result
+            else:
                 result["status"] = "failed"
-                result["error"] = f"Unknown tool: {tool_name}"
+                result["error"] = tool_result.get("error", "Tool execution failed")
+                result["output"] = tool_result
                 
+        elif tool_name and tool_name not in self.tools:
+            result["status"] = "failed"
+            result["error"] = f"Unknown tool: {tool_name}"
+            
+        else:
+            # No tool needed - use LLM for reasoning
+            context_str, prompt_stats = "", None
+            if isinstance(context, ContextSlice):
+                context_str, prompt_stats = context.text, context.stats
             else:
-                # No tool needed - use LLM for reasoning
-                context_str = "\n".join([
-                    f"Step {k}: {v.get('output', 'N/A')}" 
+                context_data = {
+                    f"step_{k}": v.get("output", "N/A")
                     for k, v in context.items() if isinstance(v, dict)
-                ])
-                
-                prompt = f"""Execute this reasoning step:
+                }
+                if context_data:
+                    context_str, prompt_stats = compact(context_data, self.prompt_token_budget)
+            if prompt_stats is not None:
+                PROMPT_TOKENS.inc(prompt_stats["raw_tokens"], agent="executor", kind="raw")
+                PROMPT_TOKENS.inc(prompt_stats["tokens"], agent="executor", kind="compact")
+                result["prompt_stats"] = prompt_stats
+            
+            prompt = f"""Execute this reasoning step:
 Action: {action}
 
 Previous context:
 {context_str if context_str else 'No previous context'}
 
 Provide a clear, concise response for this step."""
+            if "prompt_stats" in result:
+                result["prompt_stats"]["prompt_tokens"] = estimate_tokens(prompt)
 
-                llm_response = run_async(self.llm.generate(prompt, session_id=f"executor_{step_number}"))
-                result["status"] = "success"
-                result["output"] = {"reasoning": llm_response}
-                
-        except Exception as e:
-            result["status"] = "error"
-            result["error"] = str(e)
+            started = time.perf_counter()
+            llm_response = await self.llm.generate(prompt, session_id="executor")
+            self.reasoning_latency.observe(time.perf_counter() - started)
+            result["status"] = "success"
+            result["output"] = {"reasoning": llm_response}
+    
+    def expected_ms(self, step: dict) -> float:
+        """Expected duration of a step: its tool's latency (measured or declared) or the reasoning latency"""
+        tool_name = step.get("tool")
+        if tool_name is None:
+            return self.reasoning_latency.value_ms
+        spec = self.tools.spec(tool_name)
+        return spec.latency_ms if spec is not None else 0.0
+    
+    def schedule(self, steps: list, dependencies: list) -> list:
+        """
+        Order in which to start the steps of a plan
         
-        return result
+        With slowest_first, a step ranks by the expected duration of the
+        longest chain it starts: its own plus the slowest path through the
+        steps that depend on it. When more steps are ready than
+        max_concurrency allows, the ones holding up the plan get the slots
+        first. Ties, and slowest_first off, keep plan order.
+        
+        Returns:
+            list of step indexes
+        """
+        order = list(range(len(steps)))
+        if not self.slowest_first:
+            return order
+        dependents = [[] for _ in steps]
+        for index, step_dependencies in enumerate(dependencies):
+            for dep in step_dependencies:
+                dependents[dep].append(index)
+        # Dependents always follow a step, so walking backwards ranks them first
+        chain_ms = [0.0] * len(steps)
+        for index in reversed(order):
+            slowest_dependent = max((chain_ms[dependent] for dependent in dependents[index]), default=0.0)
+            chain_ms[index] = self.expected_ms(steps[index]) + slowest_dependent
+        return sorted(order, key=lambda index: -chain_ms[index])
     
     def execute_plan(self, plan: dict) -> dict:
+        """Synchronous wrapper around execute_plan_async"""
+        return run_async(self.execute_plan_async(plan))
+    
+    async def execute_plan_async(self, plan: dict, on_step=None, prefetched: dict = None) -> dict:
         """
         Execute all steps in a plan
         
+        Independent steps run concurrently (up to max_concurrency at a time);
+        a step starts as soon as every step it depends on has finished, and
+        ready steps on the slowest path start first (see schedule).
+        Independent calls to a batchable tool (e.g. weather for several
+        cities) are fused into one upstream request and split back per step.
+        Reasoning steps read their context from an ExecutionContext that
+        serializes each output once, as it finishes.
+        
         Args:
             plan: Full execution plan from PlannerAgent
+            on_step: Optional coroutine function called with each step result
+                as soon as that step finishes
+            prefetched: Optional shared tool calls (see execute_step_async)
             
         Returns:
-            dict with all step results
+            dict with all step results, in plan order
         """
         results = {
             "task_summary": plan.get("task_summary", ""),
@@ -102,20 +443,58 @@ Provide a clear, concise response for this step."""
             "overall_status": "pending"
         }
         
-        context = {}
-        all_success = True
+        steps = plan.get("steps", [])
+        dependencies = build_step_dependencies(steps)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        tasks = [None] * len(steps)
+        step_numbers = [step.get("step_number", index + 1) for index, step in enumerate(steps)]
         
-        for step in plan.get("steps", []):
-            step_result = self.execute_step(step, context)
-            results["steps"].append(step_result)
-            context[step.get("step_number", len(context))] = step_result
-            
-            if step_result["status"] not in ["success"]:
-                all_success = False
+        execution_context = self.new_context() if self.incremental_context else None
+        # Only outputs some reasoning step will read need to enter the context
+        consumed = set()
+        for step, step_dependencies in zip(steps, dependencies):
+            if step.get("tool") is None:
+                consumed.update(step_dependencies)
+        
+        fusable = {}
+        for step, step_dependencies in zip(steps, dependencies):
+            tool_name, tool_input = step.get("tool"), step.get("tool_input")
+            if step_dependencies or not self.is_batchable(tool_name):
+                continue
+            key = self.cache.make_key(tool_name, tool_input)
+            if key not in (prefetched or {}):
+                fusable.setdefault(key, (tool_name, tool_input))
+        if len(fusable) >= 2:
+            prefetched = {**self.prefetch_tool_calls(fusable), **(prefetched or {})}
+        
+        async def run_step(index: int) -> dict:
+            # Every task is created before any of them runs
+            if dependencies[index]:
+                await asyncio.gather(*(tasks[dep] for dep in dependencies[index]))
+            if execution_context is not None and steps[index].get("tool") is None:
+                context = execution_context.render(
+                    [step_numbers[dep] for dep in sorted(dependencies[index])],
+                    summarize=len(dependencies[index]) == index
+                )
+            else:
+                context = {step_numbers[dep]: tasks[dep].result() for dep in sorted(dependencies[index])}
+            async with semaphore:
+                step_result = await self.execute_step_async(steps[index], context, prefetched)
+            if execution_context is not None and index in consumed:
+                await execution_context.add(step_numbers[index], step_result)
+            if on_step is not None:
+                await on_step(step_result)
+            return step_result
+        
+        # Tasks reach the semaphore in creation order
+        for index in self.schedule(steps, dependencies):
+            tasks[index] = asyncio.ensure_future(run_step(index))
         
+        results["steps"] = list(await asyncio.gather(*tasks))
+        all_success = all(step["status"] == "success" for step in results["steps"])
         results["overall_status"] = "success" if all_success else "partial"
         return results
 
 
-# Singleton instance
-executor_agent = ExecutorAgent()
+# Singleton instance, built on first use
+__getattr__ = lazy_attributes(globals(), executor_agent=ExecutorAgent)
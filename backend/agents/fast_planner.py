@@ -0,0 +1,243 @@
+"""
+Fast Planner - Deterministic rule-based planner for simple weather/news tasks
+"""
+import re
+from functools import lru_cache
+
+from config import settings
+
+# Leading filler that carries no intent
+PREFIX = re.compile(
+    r"^(?:(?:please|hey|hi|ok|okay|so)\s+)*"
+    r"(?:(?:can|could|would|will) you\s+)?"
+    r"(?:(?:please|quickly|just)\s+)?"
+    r"(?:(?:tell|show|give|get|fetch|find|check|look up|pull up|bring me)(?: me)?\s+|i (?:want|need)(?: to know)?\s+|let me know\s+)?"
+)
+
+# "What's the weather in X", "weather for X", "temperature in X right now"
+WEATHER_IN = re.compile(
+    r"^(?:(?:what(?:'s| is)|how(?:'s| is))\s+)?(?:the\s+)?(?:current\s+)?"
+    r"(?:weather|temperature|temp|conditions|weather conditions)(?:\s+like)?"
+    r"\s+(?:in|for|at|of)\s+(?P<cities>.+?)(?:\s+(?:today|right now|now|currently))?$"
+)
+# "London weather", "current Tokyo temperature"
+CITY_WEATHER = re.compile(
+    r"^(?:the\s+)?(?:current\s+)?(?P<cities>.+?)(?:'s)?\s+(?:weather|temperature)(?:\s+(?:today|right now|now))?$"
+)
+# "Compare weather in Tokyo and Paris", "compare the weather between X and Y"
+COMPARE_WEATHER = re.compile(
+    r"^compare\s+(?:the\s+)?(?:current\s+)?(?:weather|temperatures?)\s+(?:in|for|of|between|at)\s+(?P<cities>.+)$"
+)
+# "Is it raining in Oslo"
+IS_IT_IN = re.compile(r"^is it (?:raining|snowing|sunny|cold|hot|warm|windy) (?:in|at) (?P<cities>.+?)(?:\s+(?:today|right now|now))?$")
+
+HEADLINES = re.compile(
+    r"^(?:(?:what are|what's|whats)\s+)?(?:the\s+)?(?:today's\s+|todays\s+|current\s+|latest\s+|top\s+|breaking\s+|us\s+|major\s+)*"
+    r"(?:news\s+)?(?:headlines|top news|top stories|news headlines|breaking news|news)(?:\s+(?:today|right now|now))?$"
+)
+# "news about AI", "latest articles on climate change"
+NEWS_ABOUT = re.compile(
+    r"^(?:(?:what(?:'s| is)\s+)?)?(?:the\s+)?(?:latest\s+|recent\s+|top\s+|current\s+|today's\s+|breaking\s+)*"
+    r"(?:news|headlines|articles|stories|updates)\s+(?:about|on|regarding|related to|for|concerning)\s+(?P<topic>.+)$"
+)
+# "latest tech news", "technology headlines"
+TOPIC_NEWS = re.compile(
+    r"^(?:(?:what(?:'s| is)\s+)?)?(?:the\s+)?(?:latest\s+|recent\s+|top\s+|current\s+|today's\s+|breaking\s+)*"
+    r"(?P<topic>.+?)\s+(?:news|headlines|articles|stories)(?:\s+(?:today|right now|now))?$"
+)
+
+# Separators between independent clauses
+CLAUSE_SEPARATOR = re.compile(
+    r"\s*[,;&]\s*(?:(?:and\s+)?(?:also|then)\s+|and\s+|plus\s+)?"
+    r"|\s+(?:and also|and then|and|also|then|plus)\s+"
+)
+# Separators inside a city list
+CITY_SEPARATOR = re.compile(r"\s*(?:,\s*and|,|&|\band\b|\bvs\.?|\bversus\b|\bor\b)\s*")
+
+# Words that mean a "city" or "topic" capture swallowed another intent or a
+# time frame the tools can't serve
+RESERVED_WORDS = {
+    "weather", "temperature", "forecast", "news", "headlines", "headline", "article",
+    "articles", "stories", "tomorrow", "yesterday", "week", "weekend", "month", "year",
+    "should", "will", "would", "why", "how", "what", "which", "who", "when", "summarize",
+    "summary", "compare", "recommend", "explain", "analyze", "analysis", "it", "i", "me",
+    "my", "you", "your", "there", "here", "this", "that", "and", "or", "not", "also",
+    "then", "plus"
+}
+# Determiners, possessives and judgements: "bad weather", "good news", "weather
+# in the uk" or "weather in my city" name no city or topic, so the LLM decides
+QUALIFIER_WORDS = {
+    "the", "a", "an", "any", "some", "more", "other", "every", "all", "no", "our", "his",
+    "her", "their", "its", "these", "those", "bad", "good", "great", "best", "worst",
+    "better", "worse", "fake", "real", "nice", "terrible", "awful", "interesting",
+    "important", "local", "usual", "today", "today's", "todays", "latest", "recent", "current"
+}
+# Topic filler that adds nothing to the search query
+TOPIC_FILLER = re.compile(r"^(?:the|some|any|latest|recent)\s+")
+
+MAX_CITY_WORDS = 4
+MAX_TOPIC_WORDS = 5
+MAX_CLAUSES = 6
+NAME_CHARS = re.compile(r"^[a-z][a-z .'-]*$")
+
+
+def _normalize(user_task: str) -> str:
+    text = user_task.strip().lower().replace("’", "'")
+    text = re.sub(r"[?!.]+$", "", text)
+    return " ".join(text.split())
+
+
+def _valid_name(name: str, max_words: int) -> bool:
+    words = name.split()
+    return (
+        0 < len(words) <= max_words
+        and NAME_CHARS.match(name) is not None
+        and not any(word.strip(".'-") in RESERVED_WORDS or word in QUALIFIER_WORDS for word in words)
+    )
+
+
+def _parse_cities(text: str):
+    cities = [city.strip() for city in CITY_SEPARATOR.split(text) if city.strip()]
+    cities = [re.sub(r"^(?:the city of|city of)\s+", "", city) for city in cities]
+    if not cities or not all(_valid_name(city, MAX_CITY_WORDS) for city in cities):
+        return None
+    return [city.title() for city in cities]
+
+
+def _parse_clause(clause: str):
+    """Return a list of (tool, tool_input, is_comparison) for one clause, or None"""
+    clause = PREFIX.sub("", clause, count=1)
+    for pattern, comparison in ((COMPARE_WEATHER, True), (WEATHER_IN, False),
+                                (IS_IT_IN, False), (CITY_WEATHER, False)):
+        match = pattern.match(clause)
+        if match:
+            cities = _parse_cities(match.group("cities"))
+            if cities:
+                if comparison and len(cities) < 2:
+                    return None
+                return [("weather", city, comparison) for city in cities]
+
+    if HEADLINES.match(clause):
+        return [("news", "headlines", False)]
+
+    for pattern in (NEWS_ABOUT, TOPIC_NEWS):
+        match = pattern.match(clause)
+        if match:
+            topic = TOPIC_FILLER.sub("", match.group("topic").strip())
+            if _valid_name(topic, MAX_TOPIC_WORDS):
+                return [("news", topic, False)]
+    return None
+
+
+def _parse(text: str, depth: int = 0):
+    """Parse text as one clause, else as clause + separator + rest (leftmost split first)"""
+    calls = _parse_clause(text)
+    if calls is not None:
+        return calls
+    if depth >= MAX_CLAUSES:
+        return None
+    for separator in CLAUSE_SEPARATOR.finditer(text):
+        head, tail = text[:separator.start()], text[separator.end():]
+        if not head or not tail:
+            continue
+        head_calls = _parse_clause(head)
+        if head_calls is None:
+            continue
+        tail_calls = _parse(tail, depth + 1)
+        if tail_calls is not None:
+            return head_calls + tail_calls
+    return None
+
+
+def _build_plan(user_task: str, calls: list) -> dict:
+    steps, seen = [], set()
+    for tool, tool_input, _ in calls:
+        if (tool, tool_input.lower()) in seen:
+            continue
+        seen.add((tool, tool_input.lower()))
+        if tool == "weather":
+            action = f"Get current weather for {tool_input}"
+            expected = f"Temperature, humidity and conditions in {tool_input}"
+        elif tool_input == "headlines":
+            action = "Get top news headlines"
+            expected = "List of top headlines with sources"
+        else:
+            action = f"Search latest news about {tool_input}"
+            expected = f"Recent articles about {tool_input}"
+        steps.append({
+            "step_number": len(steps) + 1,
+            "action": action,
+            "tool": tool,
+            "tool_input": tool_input,
+            "expected_output": expected
+        })
+
+    comparison = any(is_comparison for _, _, is_comparison in calls)
+    cities = [step["tool_input"] for step in steps if step["tool"] == "weather"]
+    if comparison:
+        output_format = f"Side-by-side weather comparison of {', '.join(cities)}"
+    elif len(steps) > 1:
+        output_format = "Combined summary of each requested item"
+    elif cities:
+        output_format = "Current weather summary"
+    else:
+        output_format = "List of news articles with titles and sources"
+
+    return {
+        "task_summary": user_task.strip(),
+        "steps": steps,
+        "final_output_format": output_format,
+        "plan_source": "fast_path"
+    }
+
+
+@lru_cache(maxsize=1024)
+def _classify(text: str):
+    calls = _parse(text)
+    return tuple(calls) if calls else None
+
+
+class FastPlanner:
+    """
+    Rule/grammar-based planner for unambiguous weather and news requests
+
+    Recognizes city weather lookups (including comparisons and city lists),
+    topic news searches, top headlines, and conjunctions of these. It only
+    answers when the whole task is consumed by the grammar; anything else
+    returns None so the caller falls back to the LLM planner.
+    """
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("FAST_PLANNER_ENABLED", True)
+        self.enabled = enabled
+        self.stats = {"accepted": 0, "fallbacks": 0}
+
+    def plan(self, user_task: str):
+        """
+        Build a plan without the LLM when the task is unambiguous
+
+        Args:
+            user_task: Natural language task from user
+
+        Returns:
+            plan dict in PlannerAgent.create_plan's shape, or None to fall back
+        """
+        if not self.enabled or not user_task or len(user_task) > 200:
+            return None
+        calls = _classify(_normalize(user_task))
+        if calls is None:
+            self.stats["fallbacks"] += 1
+            return None
+        self.stats["accepted"] += 1
+        return _build_plan(user_task, list(calls))
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        total = stats["accepted"] + stats["fallbacks"]
+        stats["accept_rate"] = round(stats["accepted"] / total, 4) if total else 0.0
+        return stats
+
+
+# Shared instance used by the planner
+fast_planner = FastPlanner()
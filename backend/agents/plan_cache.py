@@ -0,0 +1,296 @@
+"""
+Plan Cache - Learns parameterized plan templates so repeat task shapes skip the planner LLM
+"""
+import re
+import copy
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import settings
+from tools import tool_registry
+from .fast_planner import QUALIFIER_WORDS
+
+# Tool inputs with special meaning to a tool; never turned into slots
+RESERVED_INPUTS = {"headlines"}
+
+# A slot value is a short run of words (city, topic)
+SLOT_PATTERN = r"[\w][\w .'&-]{0,40}?"
+MAX_SLOT_WORDS = 4
+# A slot value with any of these ("my car", "the office", "here") is not a
+# place or topic, so the template doesn't apply
+SLOT_STOP_WORDS = QUALIFIER_WORDS | {
+    "i", "me", "my", "mine", "we", "us", "you", "your", "yours", "he", "him", "she", "it",
+    "they", "them", "this", "that", "here", "there", "home", "work", "somewhere", "anywhere",
+    "of", "in", "at", "on", "for", "to", "from", "with", "and", "or", "not"
+}
+
+# Observations after which a template is fully trusted
+FULL_TRUST_OBSERVATIONS = 2
+# Confidence weights: literal text ratio, observations, slot plausibility
+LITERAL_WEIGHT, TRUST_WEIGHT, PLAUSIBILITY_WEIGHT = 0.4, 0.3, 0.3
+
+PLAN_TEXT_FIELDS = ("task_summary", "final_output_format")
+STEP_TEXT_FIELDS = ("action", "tool_input", "expected_output")
+
+
+def normalize_task(user_task: str) -> str:
+    """Collapse whitespace and drop trailing punctuation, keeping the user's casing"""
+    return " ".join(user_task.split()).rstrip("?!. ")
+
+
+def _is_name(value: str) -> bool:
+    """Capitalized like a proper noun ("Paris", "New York")"""
+    return all(word[0].isupper() or not word[0].isalpha() for word in value.split())
+
+
+def _is_cased(task: str) -> bool:
+    """The user capitalizes (beyond the first letter), so a lowercase slot value is not a name"""
+    return task[1:] != task[1:].lower()
+
+
+def _replace_values(text, replacements: dict):
+    """Case-insensitively replace each old value with its new value in one pass"""
+    if not isinstance(text, str) or not replacements:
+        return text
+    ordered = sorted(replacements, key=len, reverse=True)
+    pattern = re.compile(r"\b(" + "|".join(re.escape(old) for old in ordered) + r")\b", re.IGNORECASE)
+    lookup = {old.lower(): new for old, new in replacements.items()}
+    return pattern.sub(lambda m: lookup[m.group(0).lower()], text)
+
+
+class PlanTemplate:
+    """A learned task shape: literal text with slots, and the plan it produced"""
+
+    def __init__(self, template: str, slot_values: list, plan: dict, slot_names: list = None):
+        """
+        Args:
+            template: Lowercased task with {n} slots
+            slot_values: Tool input each slot held when the template was learned
+            plan: The plan those values produced
+            slot_names: Per slot, whether the user typed the value capitalized
+                (a place or proper noun); default none
+        """
+        self.template = template
+        self.slot_values = slot_values
+        self.slot_names = slot_names or [False] * len(slot_values)
+        self.plan = plan
+        self.observations = 1
+        self.literal_length = len(re.sub(r"\{\d+\}", "", template))
+
+        regex, seen = [], set()
+        for part in re.split(r"(\{\d+\})", template):
+            slot = re.fullmatch(r"\{(\d+)\}", part)
+            if slot is None:
+                regex.append(re.escape(part))
+            elif slot.group(1) in seen:
+                regex.append(f"(?P=s{slot.group(1)})")
+            else:
+                seen.add(slot.group(1))
+                regex.append(f"(?P<s{slot.group(1)}>{SLOT_PATTERN})")
+        self.regex = re.compile("^" + "".join(regex) + "$", re.IGNORECASE)
+
+    def match(self, task: str):
+        """Return the bound slot values for a normalized task, or None"""
+        match = self.regex.match(task)
+        if not match:
+            return None
+        values = [match.group(f"s{index}").strip() for index in range(len(self.slot_values))]
+        if any(
+            not value or len(value.split()) > MAX_SLOT_WORDS
+            or any(word.lower().strip(".'-") in SLOT_STOP_WORDS for word in value.split())
+            for value in values
+        ):
+            return None
+        # "in town" where "in Paris" was learned: not a place name
+        if _is_cased(task) and any(
+            name and not _is_name(value) for value, name in zip(values, self.slot_names)
+        ):
+            return None
+        return values
+
+    def plausibility(self, task: str, values: list) -> float:
+        """
+        How much the slot values look like the learned ones, 0-1
+
+        A name slot counts half when the task is all lowercase, since its
+        casing can't tell a place from any other word.
+        """
+        if not values:
+            return 1.0
+        cased = _is_cased(task)
+        scores = [
+            1.0 if not name or (cased and _is_name(value)) else 0.5
+            for value, name in zip(values, self.slot_names)
+        ]
+        return sum(scores) / len(scores)
+
+    def confidence(self, task: str, values: list = None) -> float:
+        """Blend of how much of the task is literal text, how often the template was seen, and slot plausibility"""
+        literal_ratio = self.literal_length / max(len(task), 1)
+        trust = min(1.0, self.observations / FULL_TRUST_OBSERVATIONS)
+        return round(
+            LITERAL_WEIGHT * min(1.0, literal_ratio) + TRUST_WEIGHT * trust
+            + PLAUSIBILITY_WEIGHT * self.plausibility(task, values or []), 3
+        )
+
+    def instantiate(self, values: list) -> dict:
+        replacements = {
+            old: new for old, new in zip(self.slot_values, values) if old.lower() != new.lower()
+        }
+        plan = copy.deepcopy(self.plan)
+        for field in PLAN_TEXT_FIELDS:
+            if field in plan:
+                plan[field] = _replace_values(plan[field], replacements)
+        for step in plan.get("steps", []):
+            for field in STEP_TEXT_FIELDS:
+                if field in step:
+                    step[field] = _replace_values(step[field], replacements)
+        return plan
+
+
+class PlanCache:
+    """
+    LRU cache of plan templates learned from successful plans
+
+    A tool input that appears verbatim in the task (a city, a topic) becomes a
+    slot. A new task matching a template's literal text gets the stored plan
+    with its slot values substituted, provided the match confidence reaches
+    min_confidence. The cache clears itself when the registered tools change.
+    """
+
+    def __init__(self, max_templates: int = None, min_confidence: float = None,
+                 enabled: bool = None, tool_descriptions: dict = None):
+        if enabled is None:
+            enabled = settings.get_bool("PLAN_CACHE_ENABLED", True)
+        self.enabled = enabled
+        self.max_templates = max_templates or settings.get_int("PLAN_CACHE_MAX_TEMPLATES", 256)
+        if min_confidence is None:
+            min_confidence = settings.get_float("PLAN_CACHE_MIN_CONFIDENCE", 0.6)
+        self.min_confidence = min_confidence
+        # None = the tools in the registry, read at lookup time
+        self.tool_descriptions = tool_descriptions
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+        # Computed on first use, so building the cache doesn't trigger tool discovery
+        self._fingerprint = None
+        self.stats = {"hits": 0, "misses": 0, "low_confidence": 0, "learned": 0, "invalidations": 0}
+
+    def _compute_fingerprint(self) -> str:
+        descriptions = self.tool_descriptions if self.tool_descriptions is not None else tool_registry.descriptions()
+        payload = json.dumps(sorted(descriptions.items()))
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _check_fingerprint(self):
+        """Drop every template if the tool set or its descriptions changed (caller holds the lock)"""
+        fingerprint = self._compute_fingerprint()
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint
+        elif fingerprint != self._fingerprint:
+            self._templates.clear()
+            self._fingerprint = fingerprint
+            self.stats["invalidations"] += 1
+
+    def lookup(self, user_task: str):
+        """
+        Instantiate a cached plan for the task
+
+        Args:
+            user_task: Natural language task from user
+
+        Returns:
+            plan dict (with plan_source/template_confidence) or None on a miss
+        """
+        if not self.enabled:
+            return None
+        task = normalize_task(user_task)
+
+        with self._lock:
+            self._check_fingerprint()
+            best, best_values, best_confidence = None, None, 0.0
+            for template in self._templates.values():
+                values = template.match(task)
+                if values is None:
+                    continue
+                confidence = template.confidence(task, values)
+                if confidence > best_confidence:
+                    best, best_values, best_confidence = template, values, confidence
+
+            if best is None:
+                self.stats["misses"] += 1
+                return None
+            if best_confidence < self.min_confidence:
+                self.stats["misses"] += 1
+                self.stats["low_confidence"] += 1
+                return None
+            self._templates.move_to_end(best.template)
+            self.stats["hits"] += 1
+
+        plan = best.instantiate(best_values)
+        plan["plan_source"] = "template_cache"
+        plan["template_confidence"] = best_confidence
+        return plan
+
+    def learn(self, user_task: str, plan: dict):
+        """Record a plan that executed successfully as a template for its task shape"""
+        if not self.enabled or not plan.get("steps") or plan.get("error"):
+            return
+        # Only LLM plans teach new shapes; cached and rule-based plans would just echo
+        if plan.get("plan_source", "llm") != "llm":
+            return
+
+        task = normalize_task(user_task)
+        slot_values = []
+        for step in plan["steps"]:
+            value = step.get("tool_input")
+            if not step.get("tool") or not isinstance(value, str):
+                continue
+            value = value.strip()
+            if value.lower() in RESERVED_INPUTS or len(value.split()) > MAX_SLOT_WORDS:
+                continue
+            if value and value.lower() not in [v.lower() for v in slot_values]:
+                if re.search(rf"\b{re.escape(value)}\b", task, re.IGNORECASE):
+                    slot_values.append(value)
+
+        template = task.lower()
+        for index, value in enumerate(sorted(slot_values, key=len, reverse=True)):
+            template = re.sub(rf"\b{re.escape(value.lower())}\b", f"{{{index}}}", template)
+        slot_values = sorted(slot_values, key=len, reverse=True)
+        # How the user typed each value, e.g. "Paris" marks a name slot
+        slot_names = [
+            _is_name(re.search(rf"\b{re.escape(value)}\b", task, re.IGNORECASE).group(0))
+            for value in slot_values
+        ]
+
+        stored_plan = {key: value for key, value in plan.items() if key not in ("plan_source", "template_confidence")}
+
+        with self._lock:
+            self._check_fingerprint()
+            existing = self._templates.get(template)
+            if existing is not None:
+                existing.observations += 1
+                self._templates.move_to_end(template)
+                return
+            self._templates[template] = PlanTemplate(
+                template, slot_values, copy.deepcopy(stored_plan), slot_names
+            )
+            self.stats["learned"] += 1
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["templates"] = len(self._templates)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# Shared instance used by the planner
+plan_cache = PlanCache()
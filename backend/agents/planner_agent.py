@@ -1,8 +1,37 @@
 """
 Planner Agent - Converts user input into step-by-step plan and selects tools
 """
+from lazy import lazy_attributes
 from llm.gemini_client import GeminiClient, run_async
-from tools import TOOL_DESCRIPTIONS
+from metrics import PLANS
+from tools import tool_registry
+from .plan_cache import plan_cache
+from .fast_planner import fast_planner
+
+# Shape generate_json checks plans against (see llm.json_repair.conform)
+PLAN_SCHEMA = {
+    "type": "object",
+    "required": ["steps"],
+    "properties": {
+        "task_summary": {"type": "string"},
+        "steps": {
+            "type": "array",
+            "min_items": 1,
+            "items": {
+                "type": "object",
+                "required": ["action"],
+                "properties": {
+                    "step_number": {"type": "integer"},
+                    "action": {"type": "string"},
+                    "tool": {"type": "string", "nullable": True},
+                    "tool_input": {"nullable": True},
+                    "expected_output": {"type": "string", "nullable": True}
+                }
+            }
+        },
+        "final_output_format": {"type": "string"}
+    }
+}
 
 
 class PlannerAgent:
@@ -18,10 +47,18 @@ Available tools:
 - weather: Get current weather for a city
 - news: Get latest news on a topic or headlines
 
-Always respond with a valid JSON execution plan."""
+Always respond with a valid JSON execution plan.""",
+            name="planner",
+            cache_ttl=3600
         )
+        self.fast_planner = fast_planner
+        self.plan_cache = plan_cache
     
     def create_plan(self, user_task: str) -> dict:
+        """Synchronous wrapper around create_plan_async"""
+        return run_async(self.create_plan_async(user_task))
+    
+    async def create_plan_async(self, user_task: str) -> dict:
         """
         Create an execution plan for the given task
         
@@ -31,7 +68,19 @@ Always respond with a valid JSON execution plan."""
         Returns:
             dict containing the execution plan
         """
-        tools_info = "\n".join([f"- {name}: {desc}" for name, desc in TOOL_DESCRIPTIONS.items()])
+        fast_plan = self.fast_planner.plan(user_task)
+        if fast_plan is not None:
+            PLANS.inc(source="fast_path")
+            return fast_plan
+        
+        cached_plan = self.plan_cache.lookup(user_task)
+        if cached_plan is not None:
+            PLANS.inc(source="template_cache")
+            return cached_plan
+        
+        descriptions = tool_registry.descriptions()
+        tools_info = "\n".join([f"- {name}: {desc}" for name, desc in descriptions.items()])
+        tool_names = ", ".join(descriptions)
         
         prompt = f"""Analyze this user task and create an execution plan.
 
@@ -56,12 +105,12 @@ Create a JSON plan with this exact structure:
 }}
 
 Rules:
-1. Use only available tools (weather, news) or null for reasoning steps
+1. Use only available tools ({tool_names}) or null for reasoning steps
 2. Break complex tasks into logical steps
 3. Be specific about tool inputs
 4. Each step should have a clear purpose"""
 
-        result = run_async(self.llm.generate_json(prompt, session_id="planner"))
+        result = await self.llm.generate_json(prompt, session_id="planner", schema=PLAN_SCHEMA)
         
         # Validate plan structure
         if "steps" not in result:
@@ -80,8 +129,14 @@ Rules:
                 "error": result.get("error", "Plan generation incomplete")
             }
         
+        result["plan_source"] = "llm"
+        PLANS.inc(source="llm" if "error" not in result else "fallback")
         return result
+    
+    def learn(self, user_task: str, plan: dict):
+        """Feed a plan that executed successfully back into the template cache"""
+        self.plan_cache.learn(user_task, plan)
 
 
-# Singleton instance
-planner_agent = PlannerAgent()
+# Singleton instance, built on first use
+__getattr__ = lazy_attributes(globals(), planner_agent=PlannerAgent)
@@ -0,0 +1,94 @@
+"""
+Response Templates - Deterministic rendering of tool outputs into a final answer
+"""
+
+
+def _fmt(value, unit: str = "") -> str:
+    if value is None:
+        return "n/a"
+    if isinstance(value, float):
+        value = round(value, 1)
+    return f"{value}{unit}"
+
+
+def render_weather(data: dict) -> str:
+    place = data.get("city") or "Unknown location"
+    if data.get("country"):
+        place = f"{place}, {data['country']}"
+    description = (data.get("description") or "").capitalize() or "Conditions unavailable"
+    return (
+        f"{place}: {_fmt(data.get('temperature'), '°C')} "
+        f"(feels like {_fmt(data.get('feels_like'), '°C')}). {description}. "
+        f"Humidity {_fmt(data.get('humidity'), '%')}, wind {_fmt(data.get('wind_speed'), ' m/s')}, "
+        f"pressure {_fmt(data.get('pressure'), ' hPa')}."
+    )
+
+
+def render_news(data: dict) -> str:
+    query = data.get("query") or ""
+    heading = "Top headlines" if query.lower() == "headlines" else f"Latest news about {query}"
+    articles = data.get("articles") or []
+    if not articles:
+        return f"{heading}: no articles found."
+    lines = [f"{heading}:"]
+    for index, article in enumerate(articles, 1):
+        title = article.get("title") or "Untitled"
+        source = article.get("source")
+        lines.append(f"{index}. {title}" + (f" ({source})" if source else ""))
+    return "\n".join(lines)
+
+
+def render_weather_comparison(outputs: list) -> str:
+    readings = [data for data in outputs if isinstance(data.get("temperature"), (int, float))]
+    if len(readings) < 2:
+        return ""
+    warmest = max(readings, key=lambda data: data["temperature"])
+    coolest = min(readings, key=lambda data: data["temperature"])
+    spread = round(warmest["temperature"] - coolest["temperature"], 1)
+    if spread == 0:
+        return "All locations currently report the same temperature."
+    return (
+        f"{warmest.get('city')} is the warmest, {spread}°C warmer than "
+        f"{coolest.get('city')}."
+    )
+
+
+RENDERERS = {
+    "weather": render_weather,
+    "news": render_news
+}
+
+
+def can_render(execution_results: dict) -> bool:
+    """
+    True when every step is a successful tool call with a template renderer
+
+    Stale outputs (served from an expired cache entry while the tool's
+    circuit is open) are left to the LLM verifier, which flags them as
+    possibly out of date instead of presenting them as current.
+    """
+    steps = execution_results.get("steps", [])
+    return bool(steps) and all(
+        step.get("status") == "success"
+        and step.get("tool_used") in RENDERERS
+        and isinstance(step.get("output"), dict)
+        and step["output"].get("success")
+        and not step["output"].get("stale")
+        for step in steps
+    )
+
+
+def render_response(execution_results: dict) -> str:
+    """Render the final answer from structured tool outputs, in step order"""
+    sections = []
+    weather_outputs = []
+    for step in execution_results.get("steps", []):
+        output = step["output"]
+        sections.append(RENDERERS[step["tool_used"]](output))
+        if step["tool_used"] == "weather":
+            weather_outputs.append(output)
+
+    comparison = render_weather_comparison(weather_outputs)
+    if comparison:
+        sections.append(comparison)
+    return "\n\n".join(sections)
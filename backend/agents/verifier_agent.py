@@ -1,13 +1,36 @@
 """
 Verifier Agent - Validates results and synthesizes final response
 """
+from config import settings
+from lazy import lazy_attributes
 from llm.gemini_client import GeminiClient, run_async
+from llm.prompt_compaction import compact, estimate_tokens
+from metrics import SYNTHESES, PROMPT_TOKENS
+from .response_templates import can_render, render_response
+
+# Shape generate_json checks verifications against (see llm.json_repair.conform)
+VERIFICATION_SCHEMA = {
+    "type": "object",
+    "required": ["final_response"],
+    "properties": {
+        "verification_status": {"type": "string", "enum": ["complete", "partial", "failed"]},
+        "issues_found": {"type": "array", "items": {"type": "string"}},
+        "final_response": {"type": "string"},
+        "suggestions": {"type": "array", "items": {"type": "string"}}
+    }
+}
 
 
 class VerifierAgent:
     """Agent responsible for validating results and creating final output"""
     
-    def __init__(self):
+    def __init__(self, template_synthesis: bool = None, prompt_token_budget: int = None):
+        if template_synthesis is None:
+            template_synthesis = settings.get_bool("VERIFIER_TEMPLATE_SYNTHESIS", True)
+        self.template_synthesis = template_synthesis
+        if prompt_token_budget is None:
+            prompt_token_budget = settings.get_int("VERIFIER_PROMPT_TOKEN_BUDGET", 2000)
+        self.prompt_token_budget = prompt_token_budget
         self.llm = GeminiClient(
             system_message="""You are a Verifier Agent for an AI Operations Assistant.
 Your job is to:
@@ -16,24 +39,45 @@ Your job is to:
 3. Synthesize results into a clear, structured final response
 4. Suggest corrections if needed
 
-Always provide helpful, accurate, and well-formatted responses."""
+Always provide helpful, accurate, and well-formatted responses.""",
+            name="verifier",
+            cache_ttl=900
         )
     
     def verify_and_synthesize(self, original_task: str, execution_results: dict) -> dict:
+        """Synchronous wrapper around verify_and_synthesize_async"""
+        return run_async(self.verify_and_synthesize_async(original_task, execution_results))
+    
+    async def verify_and_synthesize_async(self, original_task: str, execution_results: dict,
+                                          on_token=None) -> dict:
         """
         Verify execution results and create final response
         
         Args:
             original_task: The original user request
             execution_results: Results from ExecutorAgent
+            on_token: Optional callback receiving raw LLM output chunks as they stream
             
         Returns:
             dict with verification status and final response
         """
+        # All-success, tool-only results need no judgement: format them directly
+        if self.template_synthesis and can_render(execution_results):
+            SYNTHESES.inc(mode="template")
+            return {
+                "verification_status": "complete",
+                "issues_found": [],
+                "final_response": render_response(execution_results),
+                "suggestions": [],
+                "synthesis_mode": "template",
+                "raw_execution_results": execution_results
+            }
+        
         # Build context from execution results
         steps_summary = []
         has_errors = False
         tool_outputs = []
+        stale_steps = []
         
         for step in execution_results.get("steps", []):
             step_num = step.get("step_number", 0)
@@ -47,11 +91,23 @@ Always provide helpful, accurate, and well-formatted responses."""
                         "tool": step.get("tool_used"),
                         "data": output
                     })
-                steps_summary.append(f"Step {step_num}: SUCCESS - {step.get('action', 'N/A')}")
+                if isinstance(output, dict) and output.get("stale"):
+                    # Expired cache entry served while the tool's circuit is open
+                    stale_steps.append(step_num)
+                    steps_summary.append(
+                        f"Step {step_num}: SUCCESS (STALE cached data, may be out of date) - {step.get('action', 'N/A')}"
+                    )
+                else:
+                    steps_summary.append(f"Step {step_num}: SUCCESS - {step.get('action', 'N/A')}")
             else:
                 has_errors = True
                 steps_summary.append(f"Step {step_num}: {status.upper()} - {error or 'Unknown error'}")
         
+        # Compact, pruned, budgeted tool data instead of the raw repr
+        collected_data, prompt_stats = compact(tool_outputs, self.prompt_token_budget)
+        PROMPT_TOKENS.inc(prompt_stats["raw_tokens"], agent="verifier", kind="raw")
+        PROMPT_TOKENS.inc(prompt_stats["tokens"], agent="verifier", kind="compact")
+        
         # Create verification prompt
         prompt = f"""Verify and synthesize the following execution results.
 
@@ -61,13 +117,13 @@ EXECUTION SUMMARY:
 {chr(10).join(steps_summary)}
 
 COLLECTED DATA:
-{tool_outputs}
+{collected_data}
 
 OVERALL STATUS: {execution_results.get('overall_status', 'unknown')}
 
 Your tasks:
 1. Check if the execution addressed the user's request completely
-2. Identify any missing information or errors
+2. Identify any missing information or errors; say that data from STALE steps may be out of date
 3. Create a clear, helpful final response for the user
 
 Respond with JSON:
@@ -77,8 +133,11 @@ Respond with JSON:
     "final_response": "A clear, formatted response that directly answers the user's original question",
     "suggestions": ["any suggestions for improvement or additional info the user might want"]
 }}"""
+        prompt_stats["prompt_tokens"] = estimate_tokens(prompt)
 
-        result = run_async(self.llm.generate_json(prompt, session_id="verifier"))
+        result = await self.llm.generate_json(
+            prompt, session_id="verifier", on_token=on_token, schema=VERIFICATION_SCHEMA
+        )
         
         # Ensure required fields exist
         if "final_response" not in result:
@@ -89,6 +148,16 @@ Respond with JSON:
             result["issues_found"] = []
         if "suggestions" not in result:
             result["suggestions"] = []
+        if stale_steps:
+            if result["verification_status"] == "complete":
+                result["verification_status"] = "partial"
+            result["issues_found"].append(
+                f"Step(s) {', '.join(map(str, stale_steps))} used cached data from before a tool outage; it may be out of date"
+            )
+        
+        result["synthesis_mode"] = "llm"
+        result["prompt_stats"] = prompt_stats
+        SYNTHESES.inc(mode="llm")
             
         # Add raw data for transparency
         result["raw_execution_results"] = execution_results
@@ -96,5 +165,5 @@ Respond with JSON:
         return result
 
 
-# Singleton instance
-verifier_agent = VerifierAgent()
+# Singleton instance, built on first use
+__getattr__ = lazy_attributes(globals(), verifier_agent=VerifierAgent)
@@ -0,0 +1,161 @@
+"""
+Batch Runner - Runs many tasks at once, sharing identical tool calls across the batch
+"""
+import json
+import time
+import asyncio
+
+from config import settings
+from agents.executor_agent import build_step_dependencies
+
+
+def parse_batch_items(items) -> list:
+    """
+    Normalize batch items
+
+    Each item is either a dict with a "task" field (and an optional "id")
+    or a plain task string.
+
+    Returns:
+        list of {"id", "task"} dicts; ids default to the item's 0-based position
+    """
+    tasks = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"task": item}
+        if not isinstance(item, dict) or not isinstance(item.get("task"), str) or not item["task"].strip():
+            raise ValueError(f"Batch item {len(tasks) + 1} has no task: {str(item)[:80]}")
+        tasks.append({"id": item.get("id", len(tasks)), "task": item["task"]})
+    return tasks
+
+
+def parse_batch_lines(lines) -> list:
+    """Parse JSONL batch input (one item per non-blank line, see parse_batch_items)"""
+    return parse_batch_items(json.loads(line) for line in lines if line.strip())
+
+
+def _ms(start: float, end: float) -> float:
+    return round((end - start) * 1000, 2)
+
+
+class BatchRunner:
+    """
+    Runs a batch of tasks through the pipeline with cross-task de-duplication
+
+    All tasks are planned concurrently. Every independent tool call in the
+    resulting plans is keyed by ToolCache.make_key, so identical calls across
+    the batch are made once (calls to a batchable tool such as weather go
+    out as one request) and shared by each step that needs them. Each
+    task then executes and verifies as soon as its own calls are in, and
+    results are yielded in completion order.
+    """
+
+    def __init__(self, assistant, max_concurrency: int = None):
+        """
+        Args:
+            assistant: AIOperationsAssistant used for planning, execution and verification
+            max_concurrency: Max tasks planning, merged tool calls in flight, and
+                tasks executing and verifying at once (each bounded separately)
+        """
+        self.assistant = assistant
+        self.max_concurrency = max_concurrency or settings.get_int("BATCH_MAX_CONCURRENCY", 16)
+        self.stats = {}
+
+    def collect_tool_calls(self, plans: list) -> tuple:
+        """
+        Merge the independent calls to idempotent tools across every plan
+
+        Returns:
+            (unique calls as {key: (tool_name, tool_input)}, total call count)
+        """
+        executor = self.assistant.executor
+        unique, total = {}, 0
+        for plan in plans:
+            steps = (plan or {}).get("steps", [])
+            for step, dependencies in zip(steps, build_step_dependencies(steps)):
+                tool_name = step.get("tool")
+                if dependencies or not executor.is_shareable(tool_name):
+                    continue
+                total += 1
+                key = executor.cache.make_key(tool_name, step.get("tool_input"))
+                unique.setdefault(key, (tool_name, step.get("tool_input")))
+        return unique, total
+
+    async def run(self, tasks: list):
+        """
+        Run a batch and yield one record per task in completion order
+
+        Args:
+            tasks: list of {"id", "task"} dicts (see parse_batch_items)
+
+        Yields:
+            dict with id, task, status, final_answer, timings and the full result
+        """
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        self.stats = {"tasks": len(tasks), "tool_calls": 0, "unique_tool_calls": 0}
+
+        async def plan_one(item):
+            async with semaphore:
+                plan_started = time.perf_counter()
+                try:
+                    plan = await self.assistant.planner.create_plan_async(item["task"])
+                except Exception as e:
+                    plan = {"error": str(e), "steps": []}
+                return plan, _ms(plan_started, time.perf_counter())
+
+        planned = await asyncio.gather(*(plan_one(item) for item in tasks))
+        planning_done = time.perf_counter()
+        self.stats["planning_ms"] = _ms(started, planning_done)
+
+        unique, total = self.collect_tool_calls([plan for plan, _ in planned])
+        self.stats["tool_calls"], self.stats["unique_tool_calls"] = total, len(unique)
+
+        prefetched = self.assistant.executor.prefetch_tool_calls(unique, semaphore)
+
+        # Separate from semaphore: a finishing task waits on prefetched calls that need it
+        finishing = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def finish_one(index, item, plan, planning_ms):
+            async with finishing:
+                return await execute_one(index, item, plan, planning_ms)
+
+        async def execute_one(index, item, plan, planning_ms):
+            pipeline_started = time.perf_counter()
+            if plan.get("error") and not plan.get("steps"):
+                result = {
+                    "user_task": item["task"],
+                    "stages": {"planning": {"status": "error", "error": plan["error"]}},
+                    "final_answer": f"Planning failed: {plan['error']}",
+                    "status": "failed"
+                }
+            else:
+                result = await self.assistant.process_task_async(
+                    item["task"], plan=plan, prefetched=prefetched
+                )
+            finished = time.perf_counter()
+            return {
+                "index": index,
+                "id": item["id"],
+                "task": item["task"],
+                "status": result.get("status"),
+                "final_answer": result.get("final_answer"),
+                "timings": {
+                    "planning_ms": planning_ms,
+                    "pipeline_ms": _ms(pipeline_started, finished),
+                    "completed_at_ms": _ms(started, finished)
+                },
+                "result": result
+            }
+
+        pending = [
+            asyncio.ensure_future(finish_one(index, item, plan, planning_ms))
+            for index, (item, (plan, planning_ms)) in enumerate(zip(tasks, planned))
+        ]
+        try:
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            for future in pending + list(prefetched.values()):
+                future.cancel()
+        self.stats["total_ms"] = _ms(started, time.perf_counter())
@@ -0,0 +1,100 @@
+"""
+Chat pool benchmark - per-call overhead of pooled vs. per-call LlmChat clients
+
+Uses a stubbed LlmChat whose first request on each instance pays a simulated
+provider connection setup (--setup-ms). Compares, sequentially and under
+concurrency:
+
+    per_call_client  - a fresh LlmChat(...).with_model(...) for every call
+                       (the code before the pool)
+    pooled_client    - GeminiClient as shipped: LlmChat can't clear its
+                       history, so the pool builds a client per request and
+                       only caps concurrency; expect no saving here
+    pooled_reset     - the same pool given a reset hook (here one that
+                       clears the stub's private history), i.e. what a
+                       chat client with a history reset would gain
+
+Usage:
+    python benchmarks/bench_chat_pool.py --calls 500 --setup-ms 5 --concurrency 8
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubLlmChat, StubUserMessage, install_stub_llm
+
+install_stub_llm()
+
+from llm.chat_pool import ChatPool
+from llm.gemini_client import GeminiClient, MODEL_PROVIDER, MODEL_NAME
+
+
+async def _per_call_chat(client: GeminiClient, prompt: str) -> str:
+    """The pre-pool code path: a brand new client for every request"""
+    chat = StubLlmChat(api_key=client.api_key, session_id="x", system_message=client.system_message)
+    chat = chat.with_model(MODEL_PROVIDER, MODEL_NAME)
+    return await chat.send_message(StubUserMessage(text=prompt))
+
+
+async def _measure(call, calls: int, concurrency: int) -> dict:
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(f"prompt {index}")
+            samples.append((time.perf_counter() - start) * 1000)
+
+    instances_before = StubLlmChat.instances
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "throughput_per_s": round(calls / elapsed, 1),
+        "clients_created": StubLlmChat.instances - instances_before
+    }
+
+
+def _reset_stub_history(chat: StubLlmChat) -> bool:
+    del chat._history[1:]
+    return True
+
+
+async def run(calls: int, setup_ms: float, concurrency: int) -> dict:
+    StubLlmChat.setup_delay = setup_ms / 1000
+    StubLlmChat.responder = staticmethod(lambda system, prompt: "ok")
+    client = GeminiClient(system_message="Benchmark agent", name="bench")
+    resettable = GeminiClient(system_message="Benchmark agent", name="bench_reset")
+    resettable.pool = ChatPool(resettable._create_chat, max_size=client.pool.max_size, reset=_reset_stub_history)
+
+    results = {}
+    for label, level in (("sequential", 1), ("concurrent", concurrency)):
+        results[label] = {
+            "per_call_client": await _measure(lambda p: _per_call_chat(client, p), calls, level),
+            "pooled_client": await _measure(lambda p: client.generate(p, use_cache=False), calls, level),
+            "pooled_reset": await _measure(lambda p: resettable.generate(p, use_cache=False), calls, level)
+        }
+        per_call = results[label]["per_call_client"]["mean_ms"]
+        results[label]["saved_per_call_ms"] = round(per_call - results[label]["pooled_client"]["mean_ms"], 3)
+        results[label]["saved_with_reset_ms"] = round(per_call - results[label]["pooled_reset"]["mean_ms"], 3)
+    results["pool_stats"] = {"pooled_client": client.pool.get_stats(), "pooled_reset": resettable.pool.get_stats()}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--setup-ms", type=float, default=5.0, help="simulated connection setup per new client")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.calls, args.setup_ms, args.concurrency)), indent=2))
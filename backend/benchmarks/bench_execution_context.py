@@ -0,0 +1,143 @@
+"""
+Execution context benchmark - incremental vs. rebuilt context for reasoning steps
+
+Builds synthetic plans where tool steps (news-sized outputs) alternate with
+reasoning steps that read every previous result. Compares CPU time and
+context size of rebuilding the context from all prior outputs at every
+reasoning step (the old context_str, and the same with per-call compaction)
+against ExecutionContext, which serializes each output once. Then runs the
+plan end to end through ExecutorAgent with a stubbed LLM, both ways.
+
+Usage:
+    python benchmarks/bench_execution_context.py --steps 20 --runs 50
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import news_payload, install_stub_llm
+
+install_stub_llm()
+os.environ["TOOL_CACHE_ENABLED"] = "false"
+
+from agents.executor_agent import ExecutorAgent
+from agents.execution_context import ExecutionContext
+from tools.registry import ToolSpec, ToolRegistry
+from llm.prompt_compaction import compact, estimate_tokens
+
+
+class SyntheticNewsTool:
+    """News-shaped tool with canned output and no I/O"""
+
+    name = "synthetic"
+    description = "Canned news articles about a topic"
+
+    async def execute_async(self, topic: str) -> dict:
+        payload = news_payload(topic, 10)
+        for article in payload["articles"]:
+            article["description"] = article["description"] * 8
+        return {"success": True, "query": topic, "articles": payload["articles"]}
+
+
+def synthetic_plan(step_count: int) -> dict:
+    steps = []
+    for index in range(step_count):
+        if index % 2 == 0:
+            steps.append({"step_number": index + 1, "action": f"Search topic {index}",
+                          "tool": "synthetic", "tool_input": f"topic {index}"})
+        else:
+            steps.append({"step_number": index + 1, "action": "Analyze the previous results",
+                          "tool": None, "tool_input": None})
+    return {"task_summary": "Synthetic long plan", "steps": steps, "final_output_format": "Text"}
+
+
+def _outputs(step_count: int) -> list:
+    tool = SyntheticNewsTool()
+    return [
+        asyncio.run(tool.execute_async(f"topic {index}")) if index % 2 == 0 else {"reasoning": "Stub reasoning output."}
+        for index in range(step_count)
+    ]
+
+
+def bench_context_building(step_count: int, runs: int, budget: int) -> dict:
+    """CPU time and total context tokens across every reasoning step of one plan"""
+    outputs = _outputs(step_count)
+    reasoning = [index for index in range(step_count) if index % 2 == 1]
+
+    def original():
+        tokens = 0
+        for index in reasoning:
+            text = "\n".join(f"Step {k + 1}: {outputs[k]}" for k in range(index))
+            tokens += estimate_tokens(text)
+        return tokens
+
+    def rebuilt_compact():
+        tokens = 0
+        for index in reasoning:
+            text, _ = compact({f"step_{k + 1}": outputs[k] for k in range(index)}, budget)
+            tokens += estimate_tokens(text)
+        return tokens
+
+    loop = asyncio.new_event_loop()
+
+    async def build_incremental():
+        context = ExecutionContext(budget)
+        tokens = 0
+        for index in range(step_count):
+            if index in reasoning:
+                tokens += context.render(list(range(1, index + 1)), summarize=True).stats["tokens"]
+            await context.add(index + 1, {"status": "success", "output": outputs[index]})
+        return tokens
+
+    def incremental():
+        return loop.run_until_complete(build_incremental())
+
+    results = {}
+    for name, build in (("original", original), ("rebuilt_compact", rebuilt_compact), ("incremental", incremental)):
+        start = time.process_time()
+        for _ in range(runs):
+            tokens = build()
+        results[name] = {
+            "cpu_ms_per_plan": round((time.process_time() - start) * 1000 / runs, 3),
+            "context_tokens_per_plan": tokens
+        }
+    loop.close()
+    return results
+
+
+def bench_executor(step_count: int, budget: int) -> dict:
+    """End-to-end executor run with the stub LLM: prompt tokens sent and wall time"""
+    results = {}
+    for name, incremental in (("rebuilt_compact", False), ("incremental", True)):
+        executor = ExecutorAgent(max_concurrency=4, prompt_token_budget=budget, incremental_context=incremental)
+        executor.tools = ToolRegistry(discover=False)
+        executor.tools.register(ToolSpec.from_class(SyntheticNewsTool))
+        start = time.perf_counter()
+        execution = asyncio.run(executor.execute_plan_async(synthetic_plan(step_count)))
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = [step["prompt_stats"] for step in execution["steps"] if step.get("prompt_stats")]
+        results[name] = {
+            "wall_ms": round(elapsed, 2),
+            "prompt_tokens": sum(item["prompt_tokens"] for item in stats),
+            "max_prompt_tokens": max(item["prompt_tokens"] for item in stats),
+            "status": execution["overall_status"]
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--steps", type=int, default=20, help="steps per synthetic plan")
+    parser.add_argument("--runs", type=int, default=50, help="repetitions for the CPU measurement")
+    parser.add_argument("--budget", type=int, default=1500, help="context token budget")
+    args = parser.parse_args()
+    print(json.dumps({
+        "steps": args.steps,
+        "context_building": bench_context_building(args.steps, args.runs, args.budget),
+        "executor": bench_executor(args.steps, args.budget)
+    }, indent=2))
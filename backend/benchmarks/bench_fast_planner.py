@@ -0,0 +1,91 @@
+"""
+Fast planner benchmark - accuracy and latency over a corpus of task phrasings
+
+Each corpus line is {"task": ..., "expected": [[tool, tool_input], ...]} or
+{"task": ..., "expected": null} when the task must fall back to the LLM.
+
+Reports:
+    precision  - accepted plans whose steps match the expected steps
+    coverage   - fast-path-able tasks the planner actually accepted
+    false_accepts - tasks that should have fallen back but were accepted
+
+Exits non-zero when precision drops below --min-precision, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_fast_planner.py [--corpus PATH] [--min-precision 1.0]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.fast_planner import FastPlanner, _classify
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fast_planner_corpus.jsonl")
+
+
+def _steps(plan: dict) -> list:
+    return [[step["tool"], step["tool_input"].lower()] for step in plan["steps"]]
+
+
+def run(corpus_path: str, repeat: int = 200) -> dict:
+    with open(corpus_path) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    planner = FastPlanner(enabled=True)
+    correct, accepted, expected_accept, covered, false_accepts = 0, 0, 0, 0, []
+    mismatches = []
+
+    for case in corpus:
+        plan = planner.plan(case["task"])
+        expected = case["expected"]
+        if expected is not None:
+            expected_accept += 1
+        if plan is None:
+            if expected is not None:
+                mismatches.append({"task": case["task"], "expected": expected, "got": None})
+            continue
+
+        accepted += 1
+        if expected is None:
+            false_accepts.append({"task": case["task"], "got": _steps(plan)})
+            continue
+        covered += 1
+        if _steps(plan) == [[tool, value.lower()] for tool, value in expected]:
+            correct += 1
+        else:
+            mismatches.append({"task": case["task"], "expected": expected, "got": _steps(plan)})
+
+    # Latency with the memo cleared each pass, i.e. the cold classification cost
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _classify.cache_clear()
+        for case in corpus:
+            planner.plan(case["task"])
+    per_call_us = (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+
+    return {
+        "cases": len(corpus),
+        "accepted": accepted,
+        "precision": round(correct / accepted, 4) if accepted else 0.0,
+        "coverage": round(covered / expected_accept, 4) if expected_accept else 0.0,
+        "false_accepts": false_accepts,
+        "mismatches": mismatches,
+        "mean_latency_us": round(per_call_us, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes over the corpus")
+    parser.add_argument("--min-precision", type=float, default=1.0)
+    args = parser.parse_args()
+
+    report = run(args.corpus, args.repeat)
+    print(json.dumps(report, indent=2))
+    if report["precision"] < args.min_precision or report["false_accepts"]:
+        sys.exit(1)
@@ -0,0 +1,103 @@
+"""
+HTTP pool benchmark - per-call latency of pooled vs. unpooled tool transports
+
+Runs WeatherTool-shaped GET requests against a local stub server and compares
+a fresh connection per call (the old bare requests.get behaviour) with the
+shared keep-alive pool in tools.http_client, for both sync and async paths.
+Against the real APIs the saving is larger, since every new connection there
+also pays DNS and a TLS handshake.
+
+Usage:
+    python benchmarks/bench_http_pool.py --calls 200
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+import requests
+
+from benchmarks.stubs import StubUpstreamServer
+from tools.http_client import HttpClient
+
+
+def _summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3)
+    }
+
+
+def _time_sync(call, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def _time_async(call, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run(calls: int) -> dict:
+    with StubUpstreamServer() as stub:
+        url = stub.weather_url
+        params = {"q": "London", "units": "metric"}
+        client = HttpClient()
+
+        def unpooled_sync():
+            requests.get(url, params=params, timeout=10).content
+
+        def pooled_sync():
+            client.get(url, params=params)
+
+        async def unpooled_async():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, params=params) as response:
+                    await response.read()
+
+        async def pooled_async():
+            await client.get_async(url, params=params)
+
+        async def run_async_modes():
+            unpooled = await _time_async(unpooled_async, calls)
+            pooled = await _time_async(pooled_async, calls)
+            await client.aclose()
+            return unpooled, pooled
+
+        results = {
+            "sync_unpooled": _summarize(_time_sync(unpooled_sync, calls)),
+            "sync_pooled": _summarize(_time_sync(pooled_sync, calls)),
+        }
+        async_unpooled, async_pooled = asyncio.run(run_async_modes())
+        results["async_unpooled"] = _summarize(async_unpooled)
+        results["async_pooled"] = _summarize(async_pooled)
+        client.close()
+
+    for mode in ("sync", "async"):
+        saved = results[f"{mode}_unpooled"]["mean_ms"] - results[f"{mode}_pooled"]["mean_ms"]
+        results[f"{mode}_saved_per_call_ms"] = round(saved, 3)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=200, help="requests per mode")
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls), indent=2))
@@ -0,0 +1,147 @@
+"""
+Import-time benchmark - startup cost of the backend, with a regression gate
+
+Runs each measurement --runs times in a fresh interpreter from backend/:
+
+    import     - python -X importtime -c "import main"; the cumulative
+                 import time of main and the slowest modules it pulls in
+    first_use  - wall time of importing main and touching the three agents,
+                 i.e. what the lazy singletons defer until the first task
+    cli_usage  - wall time of "python main.py" with no task (prints usage)
+
+Wall times have the bare interpreter start-up ("python -c pass") subtracted.
+It also checks that importing main leaves the heavy client libraries
+(DEFERRED) unimported. Exits 1 when the median import time of main exceeds
+--max-ms, exceeds a saved --baseline by more than --tolerance, or a
+deferred module gets imported eagerly again.
+
+Usage:
+    python benchmarks/bench_import_time.py --runs 9 --max-ms 200
+    python benchmarks/bench_import_time.py --save import-base.json
+    python benchmarks/bench_import_time.py --baseline import-base.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by "import main"; they load when a request needs them
+DEFERRED = ("aiohttp", "requests", "emergentintegrations")
+
+FIRST_USE = "import main; main.assistant.planner; main.assistant.executor; main.assistant.verifier"
+CHECK_DEFERRED = f"import sys, main; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+
+
+def _python(*args, importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run([sys.executable, *flags, *args], cwd=BACKEND_DIR, capture_output=True, text=True)
+
+
+def _wall_ms(*args) -> float:
+    started = time.perf_counter()
+    _python(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def parse_importtime(stderr: str) -> list:
+    """(module, depth, self_us, cumulative_us) per "import time:" line, in output order"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_import(module: str) -> tuple:
+    """(cumulative ms of module, {direct dependency: cumulative ms}) for one cold import"""
+    result = _python("-c", f"import {module}", importtime=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    # A module's dependencies are the deeper lines printed right before it
+    for index, (name, depth, _, cumulative_us) in enumerate(rows):
+        if name == module and depth == 0:
+            children = {}
+            for child, child_depth, _, child_us in reversed(rows[:index]):
+                if child_depth == 0:
+                    break
+                if child_depth == 1:
+                    children[child] = child_us / 1000
+            return cumulative_us / 1000, children
+    raise RuntimeError(f"{module} missing from -X importtime output")
+
+
+def run(args) -> dict:
+    totals, children = [], {}
+    for _ in range(args.runs):
+        total, deps = measure_import(args.module)
+        totals.append(total)
+        for name, ms in deps.items():
+            children.setdefault(name, []).append(ms)
+    slowest = sorted(((statistics.median(values), name) for name, values in children.items()), reverse=True)
+
+    interpreter = statistics.median(_wall_ms("-c", "pass") for _ in range(args.runs))
+    first_use = statistics.median(_wall_ms("-c", FIRST_USE) for _ in range(args.runs))
+    cli_usage = statistics.median(_wall_ms("main.py") for _ in range(args.runs))
+    eager = [name for name in _python("-c", CHECK_DEFERRED).stdout.strip().split(",") if name]
+
+    return {
+        "config": vars(args),
+        "import": {
+            "module": args.module,
+            "median_ms": round(statistics.median(totals), 1),
+            "min_ms": round(min(totals), 1),
+            "max_ms": round(max(totals), 1),
+            "slowest": {name: round(ms, 1) for ms, name in slowest[:args.top]}
+        },
+        "first_use_ms": round(first_use - interpreter, 1),
+        "cli_usage_ms": round(cli_usage - interpreter, 1),
+        "interpreter_ms": round(interpreter, 1),
+        "eagerly_imported": eager
+    }
+
+
+def regressions(report: dict, args) -> list:
+    problems = []
+    median = report["import"]["median_ms"]
+    if args.max_ms and median > args.max_ms:
+        problems.append(f"import {args.module} took {median}ms (limit {args.max_ms}ms)")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["import"]["median_ms"]
+        if median > baseline * (1 + args.tolerance):
+            problems.append(f"import {args.module} took {median}ms, baseline {baseline}ms (+{args.tolerance:.0%} allowed)")
+    if report["eagerly_imported"]:
+        problems.append(f"import {args.module} imports {', '.join(report['eagerly_imported'])} eagerly")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--module", default="main", help="module whose import is measured")
+    parser.add_argument("--runs", type=int, default=9, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=10, help="slowest direct dependencies to report")
+    parser.add_argument("--max-ms", type=float, default=200.0, help="fail above this median import time; 0 = off")
+    parser.add_argument("--baseline", help="report from an earlier --save to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs. the baseline")
+    parser.add_argument("--save", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    report = run(args)
+    problems = regressions(report, args)
+    report["regressions"] = problems
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.save:
+        with open(args.save, "w") as f:
+            f.write(output + "\n")
+    if problems:
+        sys.exit(1)
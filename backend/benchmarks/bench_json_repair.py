@@ -0,0 +1,152 @@
+"""
+JSON repair benchmark - recovered planner/verifier responses vs. the old parser
+
+Builds planner and verifier responses for every task in
+fast_planner_corpus.jsonl, damages each one the ways LLM output tends to
+be damaged (code fences, surrounding prose, trailing commas, Python repr,
+unquoted keys, comments, missing commas, truncation), and parses them with:
+
+    legacy  - strip fences, json.loads, else slice first "{" to last "}"
+    repair  - llm.json_repair.parse_json + conform against the agent schema
+
+A response counts as recovered when it parses, passes the schema and (for
+damage that loses nothing) equals the original. Every legacy failure is a
+fallback plan or "Unable to generate a complete response", i.e. a full
+pipeline retry by the user; every repair failure costs one re-ask instead.
+
+Usage:
+    python benchmarks/bench_json_repair.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import install_stub_llm
+
+install_stub_llm()
+
+from llm.json_repair import parse_json, conform
+from agents.planner_agent import PLAN_SCHEMA
+from agents.verifier_agent import VERIFICATION_SCHEMA
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fast_planner_corpus.jsonl")
+
+
+def legacy_parse(response: str):
+    """The parser generate_json used before json_repair, minus its uncaught exception"""
+    cleaned = response.strip()
+    if cleaned.startswith("```"):
+        lines = cleaned.split("\n")
+        cleaned = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        start = cleaned.find("{")
+        end = cleaned.rfind("}") + 1
+        if start != -1 and end > start:
+            try:
+                return json.loads(cleaned[start:end])
+            except json.JSONDecodeError:
+                pass
+        return None
+
+
+def documents(tasks: list) -> list:
+    """(schema name, original dict) for a plan and a verification per task"""
+    docs = []
+    for task in tasks:
+        steps = [
+            {"step_number": i + 1, "action": f"Get {tool} for {tool_input}", "tool": tool,
+             "tool_input": tool_input, "expected_output": f"Current {tool} data"}
+            for i, (tool, tool_input) in enumerate(task["expected"] or [])
+        ]
+        steps.append({"step_number": len(steps) + 1, "action": "Summarize the results", "tool": None,
+                      "tool_input": None, "expected_output": "Answer for the user"})
+        docs.append(("plan", {"task_summary": task["task"], "steps": steps, "final_output_format": "Text"}))
+        docs.append(("verification", {
+            "verification_status": "complete",
+            "issues_found": [],
+            "final_response": f"Here is what I found for \"{task['task']}\":\n- all requested data was retrieved.",
+            "suggestions": ["Ask for a forecast", "Ask for related news"]
+        }))
+    return docs
+
+
+def _unquote_keys(text: str) -> str:
+    return re.sub(r'"(\w+)":', r"\1:", text)
+
+
+def _drop_commas(text: str) -> str:
+    return text.replace('",\n', '"\n', 2)
+
+
+# name -> (damage function, whether the damaged text still holds the whole document)
+DAMAGE = {
+    "valid": (lambda text: text, True),
+    "code_fence": (lambda text: f"```json\n{text}\n```", True),
+    "prose_around": (lambda text: f"Sure! Here is the JSON you asked for:\n{text}\nHope this helps!", True),
+    "trailing_commas": (lambda text: re.sub(r"(\]|\}|\"|null)(\n\s*[\]\}])", r"\1,\2", text), True),
+    "python_repr": (None, True),
+    "unquoted_keys": (_unquote_keys, True),
+    "comments": (lambda text: text.replace("\n", "  // note\n", 1), True),
+    "missing_commas": (_drop_commas, True),
+    "truncated_90": (lambda text: text[:int(len(text) * 0.9)], False),
+    "truncated_70": (lambda text: text[:int(len(text) * 0.7)], False),
+    "no_json": (lambda text: "Sorry, I can't produce that right now.", False)
+}
+
+
+def run(repeat: int) -> dict:
+    with open(CORPUS_PATH) as f:
+        tasks = [json.loads(line) for line in f if line.strip()]
+    schemas = {"plan": PLAN_SCHEMA, "verification": VERIFICATION_SCHEMA}
+    report = {}
+    totals = {"cases": 0, "legacy_recovered": 0, "repair_recovered": 0}
+
+    for name, (damage, complete) in DAMAGE.items():
+        row = {"cases": 0, "legacy_recovered": 0, "repair_recovered": 0, "legacy_us": 0.0, "repair_us": 0.0}
+        for kind, original in documents(tasks):
+            text = repr(original) if name == "python_repr" else damage(json.dumps(original, indent=2))
+            schema = schemas[kind]
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                legacy = legacy_parse(text)
+            row["legacy_us"] += (time.perf_counter() - start) / repeat * 1e6
+            start = time.perf_counter()
+            for _ in range(repeat):
+                parsed, _ = parse_json(text)
+                repaired, errors = conform(parsed, schema) if parsed is not None else (None, ["unparsed"])
+            row["repair_us"] += (time.perf_counter() - start) / repeat * 1e6
+
+            # Legacy callers only checked for "steps" / "final_response"
+            legacy_ok = isinstance(legacy, dict) and schema["required"][0] in legacy
+            repair_ok = not errors
+            if complete:
+                legacy_ok = legacy_ok and legacy == original
+                repair_ok = repair_ok and repaired == original
+            row["cases"] += 1
+            row["legacy_recovered"] += legacy_ok
+            row["repair_recovered"] += repair_ok
+
+        row["legacy_us"] = round(row["legacy_us"] / row["cases"], 1)
+        row["repair_us"] = round(row["repair_us"] / row["cases"], 1)
+        for key in totals:
+            totals[key] += row[key]
+        report[name] = row
+
+    totals["full_retries_saved"] = totals["repair_recovered"] - totals["legacy_recovered"]
+    totals["reasks_needed"] = totals["cases"] - totals["repair_recovered"]
+    return {"damage": report, "totals": totals}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=20, help="timed parses per case")
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
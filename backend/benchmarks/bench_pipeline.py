@@ -0,0 +1,282 @@
+"""
+Pipeline benchmark - end-to-end latency, throughput and memory, fully offline
+
+Swaps Gemini for the stub LlmChat and OpenWeatherMap/NewsAPI for the local
+stub server, each with configurable latency and error rate, then runs a mix
+of tasks from fast_planner_corpus.jsonl at a fixed concurrency through:
+
+    direct  - AIOperationsAssistant.process_task_async on the shared loop
+              that process_task uses
+    server  - POST /api/tasks on the FastAPI app, in-process via httpx's
+              ASGI transport (queue, serialization and HTTP layer included)
+
+For each mode it reports p50/p95/p99 latency, throughput, status counts and
+a per-stage breakdown (planning / execution / verification), then repeats
+the run under tracemalloc for peak Python memory, so tracing overhead never
+skews the latency numbers. Output is one JSON document, meant to be saved
+per commit and diffed.
+
+Usage:
+    python benchmarks/bench_pipeline.py --tasks 200 --concurrency 16 \\
+        --llm-latency-ms 200 --http-latency-ms 50 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import StubLlmChat, StubUpstreamServer, install_stub_llm
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fast_planner_corpus.jsonl")
+STAGES = ("planning", "execution", "verification")
+
+# Caches and shortcuts switched off by --cold, so every task pays every stage
+COLD_SETTINGS = {
+    "TOOL_CACHE_ENABLED": "false",
+    "PLAN_CACHE_ENABLED": "false",
+    "FAST_PLANNER_ENABLED": "false",
+    "LLM_CACHE_ENABLED": "false",
+    "VERIFIER_TEMPLATE_SYNTHESIS": "false"
+}
+
+
+def load_tasks(count: int, seed: int) -> list:
+    """count tasks drawn (with repeats, as real traffic has) from the planner corpus"""
+    with open(CORPUS_PATH) as f:
+        corpus = [json.loads(line)["task"] for line in f if line.strip()]
+    rng = random.Random(seed)
+    return [rng.choice(corpus) for _ in range(count)]
+
+
+def percentiles(samples: list) -> dict:
+    """Nearest-rank p50/p95/p99 plus mean and max, in ms"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[max(0, -(-len(ordered) * p // 100) - 1)], 2)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": round(ordered[-1], 2)
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class DirectDriver:
+    """Calls the orchestrator in-process"""
+
+    name = "direct"
+
+    def __init__(self, assistant):
+        self.assistant = assistant
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def run(self, task: str) -> tuple:
+        """Returns (status, pipeline result or None)"""
+        result = await self.assistant.process_task_async(task)
+        return result["status"], result
+
+
+class ServerDriver:
+    """Posts to the FastAPI app through httpx's in-process ASGI transport"""
+
+    name = "server"
+
+    def __init__(self):
+        import logging
+        import server
+
+        # One INFO line per request would swamp stderr
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        self.server = server
+        self.client = None
+
+    async def start(self):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.server.app), base_url="http://bench", timeout=None
+        )
+        # ASGITransport doesn't send lifespan events, so start the queue workers here
+        self.server.task_queue.start()
+
+    async def stop(self):
+        await self.server.task_queue.stop()
+        await self.client.aclose()
+
+    async def run(self, task: str) -> tuple:
+        response = await self.client.post("/api/tasks", json={"task": task})
+        if response.status_code != 200:
+            return f"http_{response.status_code}", None
+        body = response.json()
+        if body["status"] != "done":
+            return body["status"], None
+        return body["result"]["status"], body["result"]
+
+
+async def drive(driver, tasks: list, concurrency: int) -> dict:
+    """Run every task through driver with at most concurrency in flight"""
+    latencies = []
+    stage_samples = {stage: [] for stage in STAGES}
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(task: str):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status, result = await driver.run(task)
+            except Exception as e:
+                status, result = f"exception_{type(e).__name__}", None
+            latencies.append((time.perf_counter() - start) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+        for stage, data in ((result or {}).get("stages") or {}).items():
+            if stage in stage_samples and data.get("duration_ms") is not None:
+                stage_samples[stage].append(data["duration_ms"])
+
+    await driver.start()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(task) for task in tasks))
+        elapsed = time.perf_counter() - start
+    finally:
+        await driver.stop()
+
+    return {
+        "wall_s": round(elapsed, 3),
+        "throughput_per_s": round(len(tasks) / elapsed, 2),
+        "latency_ms": percentiles(latencies),
+        "stages_ms": {stage: percentiles(samples) for stage, samples in stage_samples.items()},
+        "statuses": statuses
+    }
+
+
+async def measure_memory(driver, tasks: list, concurrency: int) -> dict:
+    """Repeat the run under tracemalloc; Python heap only, not native allocations"""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        await drive(driver, tasks, concurrency)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kb": round((peak - baseline) / 1024, 1),
+        "retained_kb": round((current - baseline) / 1024, 1)
+    }
+
+
+def run(args) -> dict:
+    random.seed(args.seed)
+    StubLlmChat.latency = staticmethod(lambda: max(0.0, random.gauss(args.llm_latency_ms, args.llm_jitter_ms)) / 1000)
+    StubLlmChat.error_rate = args.llm_error_rate
+
+    with StubUpstreamServer(args.http_latency_ms, args.http_jitter_ms, args.http_error_rate) as stub:
+        # Tools and agents read their settings at import time
+        os.environ["WEATHER_API_URL"] = stub.weather_url
+        os.environ["NEWS_API_URL"] = stub.news_url
+        os.environ.setdefault("WEATHER_API_KEY", "bench")
+        os.environ.setdefault("NEWS_API_KEY", "bench")
+        os.environ.setdefault("GEMINI_API_KEY", "bench")
+        # Keep caches in memory so runs never read or pollute the on-disk ones
+        os.environ["TOOL_CACHE_PATH"] = ""
+        os.environ["LLM_CACHE_PATH"] = ""
+        if args.cold:
+            os.environ.update(COLD_SETTINGS)
+        # server.py builds its Mongo client at import; it is never used here
+        os.environ.setdefault("MONGO_URL", "mongodb://127.0.0.1:27017")
+        os.environ.setdefault("DB_NAME", "bench")
+        os.environ.setdefault("TASK_WORKERS", str(args.concurrency))
+        os.environ.setdefault("TASK_QUEUE_MAX_SIZE", str(max(32, args.tasks)))
+
+        from main import assistant
+        from agents import plan_cache
+        from llm import run_async
+        from tools import http_client, tool_cache
+
+        tasks = load_tasks(args.tasks, args.seed)
+        report = {
+            "benchmark": "pipeline",
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "config": vars(args),
+            "modes": {}
+        }
+
+        async def scenario():
+            for mode in args.modes:
+                driver = ServerDriver() if mode == "server" else DirectDriver(assistant)
+                # Each mode starts from the same state: empty caches, then the warm-up
+                tool_cache.store.clear()
+                plan_cache.clear()
+                if args.warmup:
+                    await drive(driver, tasks[:args.warmup], args.concurrency)
+                requests_before = stub.request_count
+                llm_before = StubLlmChat.calls
+                result = await drive(driver, tasks, args.concurrency)
+                result["upstream_http_requests"] = stub.request_count - requests_before
+                result["llm_requests"] = StubLlmChat.calls - llm_before
+                if args.memory:
+                    result["memory"] = await measure_memory(driver, tasks, args.concurrency)
+                report["modes"][mode] = result
+            await http_client.aclose()
+
+        # The loop process_task uses, so pooled sessions behave as in the app
+        run_async(scenario())
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, default=200, help="tasks per mode")
+    parser.add_argument("--concurrency", type=int, default=16, help="tasks in flight")
+    parser.add_argument("--modes", nargs="+", choices=("direct", "server"), default=["direct", "server"])
+    parser.add_argument("--warmup", type=int, default=10, help="untimed tasks before each mode")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--http-latency-ms", type=float, default=50.0)
+    parser.add_argument("--http-jitter-ms", type=float, default=15.0)
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    parser.add_argument("--cold", action="store_true", help="disable caches, fast planner and template synthesis")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    install_stub_llm()
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,103 @@
+"""
+Plan cache check - template hits, false hits and lookup latency
+
+Teaches a PlanCache a few LLM-shaped plans (each seen twice, so fully
+trusted), then looks up rephrasings that must reuse a template with the
+right slot value, and near-misses that must fall back to the planner:
+slot values with pronouns, determiners or stop words ("my car", "the
+office") and lowercase words where a capitalized place name was learned.
+
+Exits non-zero on any false hit or wrong slot value, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_plan_cache.py --repeat 2000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.plan_cache import PlanCache
+
+
+def _plan(tool: str, value: str, action: str) -> dict:
+    return {
+        "task_summary": action,
+        "steps": [{"step_number": 1, "action": action, "tool": tool, "tool_input": value}],
+        "final_output_format": "Short answer"
+    }
+
+
+LEARNED = [
+    ("Should I bring an umbrella in Paris today?", _plan("weather", "Paris", "Get current weather for Paris")),
+    ("Is it a good day for a walk in Berlin", _plan("weather", "Berlin", "Get current weather for Berlin")),
+    ("anything new on bitcoin this week", _plan("news", "bitcoin", "Search latest news about bitcoin")),
+]
+
+# (task, expected tool input or None when the planner must be called)
+CASES = [
+    ("Should I bring an umbrella in London today?", "London"),
+    ("Should I bring an umbrella in New York today", "New York"),
+    ("should i bring an umbrella in tokyo today", "tokyo"),
+    ("Is it a good day for a walk in Rome?", "Rome"),
+    ("anything new on ethereum this week", "ethereum"),
+    ("Should I bring an umbrella in my car today?", None),
+    ("Should I bring an umbrella in the office today", None),
+    ("Should I bring an umbrella in here today?", None),
+    ("Should I bring an umbrella in town today?", None),
+    ("Is it a good day for a walk in the park", None),
+    ("Is it a good day for a walk in my neighborhood", None),
+    ("anything new on my portfolio this week", None),
+    ("anything new on the market this week", None),
+]
+
+
+def run(repeat: int) -> dict:
+    cache = PlanCache(enabled=True, min_confidence=0.6, tool_descriptions={"weather": "", "news": ""})
+    for task, plan in LEARNED:
+        cache.learn(task, plan)
+        cache.learn(task, plan)
+
+    hits, false_hits, wrong, misses = 0, [], [], []
+    for task, expected in CASES:
+        plan = cache.lookup(task)
+        got = plan["steps"][0]["tool_input"] if plan else None
+        if expected is None:
+            if plan is not None:
+                false_hits.append({"task": task, "got": got, "confidence": plan["template_confidence"]})
+        elif plan is None:
+            misses.append(task)
+        elif got != expected:
+            wrong.append({"task": task, "expected": expected, "got": got})
+        else:
+            hits += 1
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for task, _ in CASES:
+            cache.lookup(task)
+    per_lookup_us = (time.perf_counter() - start) / (repeat * len(CASES)) * 1e6
+
+    return {
+        "templates": len(LEARNED),
+        "cases": len(CASES),
+        "hits": hits,
+        "false_hits": false_hits,
+        "wrong_slot_values": wrong,
+        "missed": misses,
+        "mean_lookup_us": round(per_lookup_us, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=2000, help="timing passes over the cases")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    print(json.dumps(report, indent=2))
+    if report["false_hits"] or report["wrong_slot_values"]:
+        sys.exit(1)
@@ -0,0 +1,92 @@
+"""
+Rate limit benchmark - throttled upstream with and without the per-upstream limiter
+
+Runs a burst of news steps (distinct queries, tool cache off) against a stub
+NewsAPI that answers 429 + Retry-After beyond --quota requests per second.
+Compares no limiter, the adaptive limiter alone (AIMD + Retry-After
+retries), and the limiter with the quota configured (RATE_LIMIT_NEWS), and
+reports failed steps, 429s the upstream sent, step latency and queue time.
+
+Usage:
+    python benchmarks/bench_rate_limit.py --calls 60 --quota 10 --concurrency 30
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubUpstreamServer, install_stub_llm
+from benchmarks.bench_pipeline import percentiles
+
+install_stub_llm()
+
+
+def _plan(calls: int) -> dict:
+    return {
+        "task_summary": "Burst of news lookups",
+        "steps": [
+            {"step_number": i + 1, "action": f"Search news {i}", "tool": "news", "tool_input": f"topic {i}"}
+            for i in range(calls)
+        ],
+        "final_output_format": "List"
+    }
+
+
+def run(calls: int, quota: int, concurrency: int, latency_ms: float) -> dict:
+    with StubUpstreamServer(mean_ms=latency_ms, quota_per_s=quota) as stub:
+        os.environ["NEWS_API_URL"] = stub.news_url
+        os.environ["TOOL_CACHE_ENABLED"] = "false"
+        os.environ["RATE_LIMIT_MAX_WAIT"] = str(max(10.0, 2 * calls / quota))
+        from tools import http_client
+        from agents.executor_agent import ExecutorAgent
+        from resilience import rate_limits
+
+        executor = ExecutorAgent(max_concurrency=concurrency)
+        results = {}
+        variants = (
+            ("no_limiter", False, None),
+            ("adaptive", True, None),
+            ("adaptive_with_quota", True, f"{quota}/1")
+        )
+
+        async def scenario():
+            for name, enabled, configured_quota in variants:
+                rate_limits.enabled = enabled
+                os.environ.pop("RATE_LIMIT_NEWS", None)
+                if configured_quota:
+                    os.environ["RATE_LIMIT_NEWS"] = configured_quota
+                rate_limits.reset()
+                # Start in a fresh quota window
+                await asyncio.sleep(1 - time.monotonic() % 1)
+                throttled_before = stub.server.throttled_count
+                start = time.perf_counter()
+                execution = await executor.execute_plan_async(_plan(calls))
+                elapsed = time.perf_counter() - start
+                steps = execution["steps"]
+                results[name] = {
+                    "wall_s": round(elapsed, 2),
+                    "failed_steps": sum(step["status"] != "success" for step in steps),
+                    "upstream_429s": stub.server.throttled_count - throttled_before,
+                    "step_ms": percentiles([step["duration_ms"] for step in steps]),
+                    "queue_ms": percentiles([step.get("queue_ms", 0.0) for step in steps]),
+                    "limiter": rate_limits.get_stats().get("news")
+                }
+            await http_client.aclose()
+
+        asyncio.run(scenario())
+        http_client.close()
+    return {"calls": calls, "quota_per_s": quota, "concurrency": concurrency, "variants": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--quota", type=int, default=10, help="stub upstream requests per second")
+    parser.add_argument("--concurrency", type=int, default=30, help="executor steps in flight")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls, args.quota, args.concurrency, args.latency_ms), indent=2))
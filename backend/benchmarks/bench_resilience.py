@@ -0,0 +1,186 @@
+"""
+Resilience benchmark - hedged requests and circuit breakers under injected faults
+
+Three scenarios against the local stubs, each with the feature off and on:
+
+    tool_tail  - news steps against a stub NewsAPI where --slow-rate of
+                 requests take --slow-ms longer; reports step latency
+                 percentiles and the extra upstream requests hedging sent
+    llm_tail   - GeminiClient requests against the stub LLM with the same
+                 kind of tail
+    outage     - news steps for queries with expired cache entries while
+                 the stub NewsAPI hangs past the read timeout and then fails;
+                 reports failed steps, stale fallbacks and upstream requests
+
+The rate limiter is off throughout, so only the feature under test differs
+between variants; hedging is off in the outage scenario.
+
+Usage:
+    python benchmarks/bench_resilience.py --calls 400 --slow-rate 0.05 --slow-ms 800
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubLlmChat, StubUpstreamServer, install_stub_llm
+from benchmarks.bench_pipeline import percentiles
+
+install_stub_llm()
+
+# The outage scenario waits out one read timeout per call that reaches the upstream
+os.environ["HTTP_READ_TIMEOUT"] = "2"
+os.environ["TOOL_CACHE_PATH"] = ""
+os.environ["LLM_CACHE_ENABLED"] = "false"
+# Room for a hedge next to every in-flight request
+os.environ.setdefault("LLM_POOL_SIZE", "32")
+
+
+def _news_step(number: int, query: str) -> dict:
+    return {"step_number": number, "action": f"Search news about {query}", "tool": "news", "tool_input": query}
+
+
+async def _run_steps(executor, queries: list, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(number, query):
+        async with semaphore:
+            return await executor.execute_step_async(_news_step(number, query), {})
+
+    return await asyncio.gather(*(one(i + 1, query) for i, query in enumerate(queries)))
+
+
+def _summary(steps: list, upstream_requests: int) -> dict:
+    return {
+        "step_ms": percentiles([step["duration_ms"] for step in steps]),
+        "failed_steps": sum(step["status"] != "success" for step in steps),
+        "upstream_requests": upstream_requests
+    }
+
+
+async def tool_tail(executor, stub, args) -> dict:
+    from resilience import hedgers
+
+    results = {}
+    for name, enabled in (("no_hedging", False), ("hedging", True)):
+        hedgers.enabled = enabled
+        hedgers.reset()
+        # Distinct queries, so every step reaches the upstream; the warm-up fills the latency window
+        await _run_steps(executor, [f"{name} warmup {i}" for i in range(args.warmup)], args.concurrency)
+        before = stub.request_count
+        steps = await _run_steps(executor, [f"{name} topic {i}" for i in range(args.calls)], args.concurrency)
+        results[name] = _summary(steps, stub.request_count - before)
+        results[name]["hedger"] = hedgers.get_stats().get("news")
+    return results
+
+
+async def llm_tail(args) -> dict:
+    from llm import GeminiClient
+    from resilience import hedgers
+
+    def latency():
+        base = max(0.0, random.gauss(args.llm_latency_ms, args.llm_latency_ms / 10))
+        return (base + (args.slow_ms if random.random() < args.slow_rate else 0.0)) / 1000
+
+    StubLlmChat.latency = staticmethod(latency)
+    client = GeminiClient(name="bench")
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(prompt):
+        async with semaphore:
+            started = time.perf_counter()
+            await client.generate(prompt, use_cache=False)
+            return (time.perf_counter() - started) * 1000
+
+    results = {}
+    calls = max(1, args.calls // 2)
+    for name, enabled in (("no_hedging", False), ("hedging", True)):
+        hedgers.enabled = enabled
+        hedgers.reset()
+        await asyncio.gather(*(one(f"warmup {i}") for i in range(args.warmup)))
+        before = StubLlmChat.calls
+        latencies = await asyncio.gather(*(one(f"{name} prompt {i}") for i in range(calls)))
+        results[name] = {
+            "request_ms": percentiles(latencies),
+            "llm_requests": StubLlmChat.calls - before,
+            "hedger": hedgers.get_stats().get("gemini")
+        }
+    return results
+
+
+async def outage(executor, stub, args) -> dict:
+    from resilience import hedgers, circuit_breakers
+
+    hedgers.enabled = False
+    queries = [f"outage topic {i}" for i in range(args.outage_queries)]
+    # Cache every query, then let the entries expire: only a stale fallback can answer them
+    ttl, stale_ttl = executor.cache.ttls["news"], executor.cache.stale_ttl
+    executor.cache.ttls["news"], executor.cache.stale_ttl = 0.001, 0
+    await _run_steps(executor, queries, args.concurrency)
+    executor.cache.ttls["news"], executor.cache.stale_ttl = ttl, stale_ttl
+    await asyncio.sleep(0.01)
+
+    results = {}
+    stub.outage(stall_ms=3000)
+    try:
+        for name, enabled in (("no_breaker", False), ("circuit_breaker", True)):
+            circuit_breakers.enabled = enabled
+            circuit_breakers.reset()
+            before = stub.request_count
+            start = time.perf_counter()
+            steps = await _run_steps(executor, [queries[i % len(queries)] for i in range(args.outage_calls)],
+                                     args.concurrency)
+            results[name] = _summary(steps, stub.request_count - before)
+            results[name]["wall_s"] = round(time.perf_counter() - start, 2)
+            results[name]["stale_fallbacks"] = sum(step.get("cache_status") == "stale_fallback" for step in steps)
+            results[name]["breaker"] = circuit_breakers.get_stats().get("news")
+    finally:
+        stub.restore()
+    return results
+
+
+def run(args) -> dict:
+    random.seed(args.seed)
+    with StubUpstreamServer(args.http_latency_ms, args.http_latency_ms / 10,
+                            slow_rate=args.slow_rate, slow_ms=args.slow_ms) as stub:
+        os.environ["NEWS_API_URL"] = stub.news_url
+        from agents.executor_agent import ExecutorAgent
+        from resilience import rate_limits
+        from tools import http_client
+
+        rate_limits.enabled = False
+        executor = ExecutorAgent(max_concurrency=args.concurrency)
+
+        async def scenario():
+            report = {
+                "tool_tail": await tool_tail(executor, stub, args),
+                "llm_tail": await llm_tail(args),
+                "outage": await outage(executor, stub, args)
+            }
+            await http_client.aclose()
+            return report
+
+        report = asyncio.run(scenario())
+        http_client.close()
+    return {"config": vars(args), **report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=400, help="measured news steps per variant (half for the LLM)")
+    parser.add_argument("--warmup", type=int, default=40, help="unmeasured calls that fill the latency window")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--http-latency-ms", type=float, default=30.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="fraction of requests in the latency tail")
+    parser.add_argument("--slow-ms", type=float, default=800.0, help="extra latency of a tail request")
+    parser.add_argument("--outage-queries", type=int, default=20, help="distinct cached queries during the outage")
+    parser.add_argument("--outage-calls", type=int, default=60, help="news steps per variant during the outage")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
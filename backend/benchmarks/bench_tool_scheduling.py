@@ -0,0 +1,117 @@
+"""
+Tool scheduling benchmark - plan wall time with slowest-first vs. plan-order step starts
+
+Registers three synthetic tools that sleep for a fixed time (fast, medium,
+slow) in a private ToolRegistry and runs random plans of independent tool
+steps through ExecutorAgent with fewer slots than steps. Each plan is run:
+
+    plan_order    - steps start in the order the planner listed them
+    declared      - slowest first, by the latency each tool declares
+    learned       - slowest first, with every tool declaring the same
+                    latency; the order comes from the measured EWMA after
+                    --warmup plans
+
+and the lower bound (longest step, or total work / slots) is reported next
+to the mean plan wall time.
+
+Usage:
+    python benchmarks/bench_tool_scheduling.py --plans 30 --steps 6 --concurrency 2
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["TOOL_CACHE_ENABLED"] = "false"
+
+from agents.executor_agent import ExecutorAgent
+from tools.registry import ToolSpec, ToolRegistry
+
+# Tool name -> seconds per call
+LATENCIES = {"fast": 0.04, "medium": 0.12, "slow": 0.4}
+
+
+def sleeping_tool(name: str, seconds: float, declared_ms: float):
+    class SleepingTool:
+        description = f"Synthetic tool answering after {seconds * 1000:.0f}ms"
+        latency_ms = declared_ms
+
+        async def execute_async(self, tool_input) -> dict:
+            await asyncio.sleep(seconds)
+            return {"success": True, "input": tool_input}
+
+    SleepingTool.name = name
+    return SleepingTool
+
+
+def build_executor(concurrency: int, slowest_first: bool, declare: bool) -> ExecutorAgent:
+    executor = ExecutorAgent(max_concurrency=concurrency, batching=False, slowest_first=slowest_first)
+    executor.tools = ToolRegistry(discover=False)
+    for name, seconds in LATENCIES.items():
+        declared_ms = seconds * 1000 if declare else 500
+        executor.tools.register(ToolSpec.from_class(sleeping_tool(name, seconds, declared_ms)))
+    return executor
+
+
+def random_plans(count: int, steps: int, seed: int) -> list:
+    rng = random.Random(seed)
+    plans = []
+    for plan_index in range(count):
+        tools = [rng.choice(list(LATENCIES)) for _ in range(steps)]
+        plans.append({"steps": [
+            {"step_number": i + 1, "action": f"Call {tool}", "tool": tool, "tool_input": f"input {plan_index}-{i}"}
+            for i, tool in enumerate(tools)
+        ]})
+    return plans
+
+
+def lower_bound_ms(plan: dict, concurrency: int) -> float:
+    durations = [LATENCIES[step["tool"]] for step in plan["steps"]]
+    return max(max(durations), sum(durations) / concurrency) * 1000
+
+
+async def run_plans(executor: ExecutorAgent, plans: list) -> float:
+    total = 0.0
+    for plan in plans:
+        started = time.perf_counter()
+        results = await executor.execute_plan_async(plan)
+        total += (time.perf_counter() - started) * 1000
+        assert results["overall_status"] == "success"
+    return round(total / len(plans), 1)
+
+
+def run(args) -> dict:
+    plans = random_plans(args.plans, args.steps, args.seed)
+    warmup = random_plans(args.warmup, args.steps, args.seed + 1)
+
+    async def scenario():
+        report = {}
+        report["plan_order_ms"] = await run_plans(build_executor(args.concurrency, False, True), plans)
+        report["declared_ms"] = await run_plans(build_executor(args.concurrency, True, True), plans)
+        learner = build_executor(args.concurrency, True, False)
+        await run_plans(learner, warmup)
+        report["learned_ms"] = await run_plans(learner, plans)
+        report["learned_latency_ms"] = {
+            name: round(learner.tools.spec(name).latency_ms, 1) for name in LATENCIES
+        }
+        return report
+
+    report = asyncio.run(scenario())
+    report["lower_bound_ms"] = round(sum(lower_bound_ms(plan, args.concurrency) for plan in plans) / len(plans), 1)
+    return {"config": vars(args), **report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--plans", type=int, default=30, help="measured plans per variant")
+    parser.add_argument("--steps", type=int, default=6, help="independent tool steps per plan")
+    parser.add_argument("--concurrency", type=int, default=2, help="executor slots")
+    parser.add_argument("--warmup", type=int, default=5, help="plans that train the EWMA in the learned variant")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
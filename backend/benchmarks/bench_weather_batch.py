@@ -0,0 +1,110 @@
+"""
+Weather batch check - multi-city lookups fused into one group request
+
+Runs against a local stub server. Cities are first fetched one by one (which
+teaches WeatherTool their OpenWeatherMap IDs), then fetched again through
+execute_many_async and through an executor plan with one weather step per
+city. Reports upstream requests and latency for each, and checks that the
+fused results split back into the same per-city outputs. Finally the stub
+answers 200 with an HTML page instead of JSON, first for the group request
+(execute_many_async must fall back to per-city calls) and then for every
+request (each city must come back as a failed result, not an exception).
+
+Usage:
+    python benchmarks/bench_weather_batch.py --cities 8 --latency-ms 50
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubUpstreamServer
+
+CITY_NAMES = [
+    "Tokyo", "Paris", "London", "Berlin", "Madrid", "Rome", "Oslo", "Lima",
+    "Cairo", "Delhi", "Seoul", "Sydney", "Toronto", "Nairobi", "Dublin", "Vienna"
+]
+
+
+def _plan(cities: list) -> dict:
+    return {
+        "task_summary": f"Compare weather in {', '.join(cities)}",
+        "steps": [
+            {"step_number": i + 1, "action": f"Get current weather for {city}", "tool": "weather", "tool_input": city}
+            for i, city in enumerate(cities)
+        ],
+        "final_output_format": "Side-by-side weather comparison"
+    }
+
+
+def run(city_count: int, latency_ms: float) -> dict:
+    with StubUpstreamServer(mean_ms=latency_ms) as stub:
+        os.environ["WEATHER_API_URL"] = stub.weather_url
+        os.environ["TOOL_CACHE_ENABLED"] = "false"
+        from tools import http_client
+        from tools.weather_tool import WeatherTool
+        from tools.registry import ToolSpec, ToolRegistry
+        from agents.executor_agent import ExecutorAgent
+
+        cities = CITY_NAMES[:city_count]
+        tool = WeatherTool()
+        executor = ExecutorAgent(max_concurrency=city_count)
+        executor.tools = ToolRegistry(discover=False)
+        executor.tools.register(ToolSpec.from_class(WeatherTool, factory=lambda: tool))
+
+        async def measure(call):
+            before = stub.requests_by_path.copy()
+            start = time.perf_counter()
+            value = await call()
+            elapsed = round((time.perf_counter() - start) * 1000, 2)
+            after = stub.requests_by_path
+            requests = {path: after[path] - before[path] for path in after if after[path] != before[path]}
+            return value, {"elapsed_ms": elapsed, "upstream_requests": requests}
+
+        async def singles():
+            return dict(zip(cities, await asyncio.gather(*(tool.execute_async(city) for city in cities))))
+
+        async def scenario():
+            single_results, single_stats = await measure(singles)
+            batch_results, batch_stats = await measure(lambda: tool.execute_many_async(cities))
+            plan_results, plan_stats = await measure(lambda: executor.execute_plan_async(_plan(cities)))
+            stub.malformed("/group")
+            fallback_results, _ = await measure(lambda: tool.execute_many_async(cities))
+            stub.malformed("/weather")
+            malformed_results, _ = await measure(lambda: tool.execute_many_async(cities))
+            stub.restore()
+            await http_client.aclose()
+            malformed = {
+                "group_falls_back_to_singles": fallback_results == single_results,
+                "all_failed_cleanly": all(not result["success"] for result in malformed_results.values())
+                and len(malformed_results) == len(cities)
+            }
+            return single_results, single_stats, batch_results, batch_stats, plan_results, plan_stats, malformed
+
+        (single_results, single_stats, batch_results, batch_stats,
+         plan_results, plan_stats, malformed) = asyncio.run(scenario())
+        http_client.close()
+
+    per_step = {step["output"]["city"]: step["output"] for step in plan_results["steps"]}
+    return {
+        "cities": city_count,
+        "parallel_singles": single_stats,
+        "execute_many": batch_stats,
+        "fused_plan": plan_stats,
+        "execute_many_matches_singles": batch_results == single_results,
+        "fused_plan_matches_singles": per_step == {city: single_results[city] for city in cities},
+        "plan_cache_status": sorted({step.get("cache_status") for step in plan_results["steps"]}),
+        "non_json_body": malformed
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--cities", type=int, default=8, help=f"cities per request (max {len(CITY_NAMES)})")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub upstream latency")
+    args = parser.parse_args()
+    print(json.dumps(run(min(args.cities, len(CITY_NAMES)), args.latency_ms), indent=2))
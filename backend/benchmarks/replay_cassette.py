@@ -0,0 +1,122 @@
+"""
+Cassette replay - re-run recorded production traffic against this build, offline
+
+Reads a trace written with CASSETTE_MODE=record and submits its tasks again
+with CASSETTE_MODE=replay, so every Gemini and tool request is answered from
+the trace after its recorded duration divided by --speed. Tasks arrive at
+their recorded offsets (also divided by --speed), or back to back with
+--concurrency when --speed is 0.
+
+Reports recorded vs. replayed latency (replayed numbers are scaled back by
+--speed so they compare directly), tasks whose status or final answer
+changed, cassette hit/fuzzy/miss counts and the slowest tasks. Pass --task
+to replay single tasks, e.g. a slow one from the report.
+
+Usage:
+    python benchmarks/replay_cassette.py --cassette .cache/cassette.jsonl --speed 10
+    python benchmarks/replay_cassette.py --cassette trace.jsonl.gz --task 3f2a9c1e0b7d --speed 1
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import install_stub_llm
+from benchmarks.bench_pipeline import percentiles
+
+
+def select_tasks(records: list, task_ids: list) -> list:
+    tasks = sorted((record for record in records if record["kind"] == "task"), key=lambda record: record["at"])
+    if task_ids:
+        tasks = [record for record in tasks if record["task_id"] in task_ids]
+    return tasks
+
+
+async def replay(assistant, tasks: list, speed: float, concurrency: int) -> list:
+    rows = []
+    semaphore = asyncio.Semaphore(concurrency)
+    origin = tasks[0]["at"] if tasks else 0.0
+    started = time.perf_counter()
+
+    async def one(record: dict):
+        if speed > 0:
+            await asyncio.sleep(max(0.0, (record["at"] - origin) / speed - (time.perf_counter() - started)))
+        async with semaphore:
+            clock = time.perf_counter()
+            result = await assistant.process_task_async(record["task"])
+            elapsed_ms = (time.perf_counter() - clock) * 1000
+        rows.append({
+            "task_id": record["task_id"],
+            "task": record["task"],
+            "recorded_ms": record["ms"],
+            "replay_ms": round(elapsed_ms, 2),
+            # Back on the recorded time scale, so the two compare directly
+            "replay_ms_scaled": round(elapsed_ms * speed, 2) if speed > 0 else None,
+            "status_changed": result["status"] != record["status"],
+            "answer_changed": result["final_answer"] != record["final_answer"],
+            "status": result["status"]
+        })
+
+    await asyncio.gather(*(one(record) for record in tasks))
+    return rows
+
+
+def run(args) -> dict:
+    os.environ["CASSETTE_MODE"] = "replay"
+    os.environ["CASSETTE_PATH"] = args.cassette
+    os.environ["CASSETTE_SPEED"] = str(args.speed)
+    # Replay never reaches Gemini, and caches stay in memory so the trace alone decides the answers
+    os.environ["TOOL_CACHE_PATH"] = ""
+    os.environ["LLM_CACHE_PATH"] = ""
+    install_stub_llm()
+
+    from main import assistant
+    from llm import run_async
+    from cassette import cassette, load_records
+    from tools import http_client
+
+    tasks = select_tasks(load_records(args.cassette), args.task)
+    concurrency = args.concurrency if args.speed == 0 else max(args.concurrency, len(tasks) or 1)
+
+    async def scenario():
+        rows = await replay(assistant, tasks, args.speed, concurrency)
+        await http_client.aclose()
+        return rows
+
+    rows = run_async(scenario())
+    comparable = [row for row in rows if row["replay_ms_scaled"] is not None]
+    changed = [row for row in rows if row["status_changed"] or row["answer_changed"]]
+    return {
+        "cassette": args.cassette,
+        "speed": args.speed,
+        "tasks": len(rows),
+        "recorded_ms": percentiles([row["recorded_ms"] for row in rows]),
+        "replay_ms": percentiles([row["replay_ms"] for row in rows]),
+        "replay_ms_scaled": percentiles([row["replay_ms_scaled"] for row in comparable]),
+        "changed_outputs": len(changed),
+        "cassette_stats": cassette.get_stats(),
+        "slowest": sorted(rows, key=lambda row: row["replay_ms"], reverse=True)[:args.slowest],
+        "changed": changed[:args.slowest]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--cassette", required=True, help="trace written with CASSETTE_MODE=record")
+    parser.add_argument("--speed", type=float, default=1.0, help="speed-up factor, 0 = no delays")
+    parser.add_argument("--concurrency", type=int, default=16, help="tasks in flight when --speed is 0")
+    parser.add_argument("--task", nargs="+", help="replay only these task ids")
+    parser.add_argument("--slowest", type=int, default=10, help="tasks listed in slowest/changed")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
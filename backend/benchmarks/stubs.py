@@ -0,0 +1,306 @@
+"""
+Stubs - Local stand-ins for the upstream APIs used by the benchmarks
+"""
+import sys
+import json
+import time
+import types
+import random
+import asyncio
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def weather_payload(city: str) -> dict:
+    """OpenWeatherMap-shaped response for a city"""
+    return {
+        "id": abs(hash(city.lower())) % 10_000_000,
+        "name": city.title(),
+        "sys": {"country": "XX"},
+        "main": {"temp": 18.5, "feels_like": 17.9, "humidity": 62, "pressure": 1012},
+        "weather": [{"description": "scattered clouds"}],
+        "wind": {"speed": 4.1}
+    }
+
+
+def news_payload(query: str, count: int) -> dict:
+    """NewsAPI-shaped response for a query"""
+    return {
+        "status": "ok",
+        "totalResults": count,
+        "articles": [
+            {
+                "title": f"{query.title()} story {i + 1}",
+                "source": {"name": "Stub Wire"},
+                "description": f"Synthetic article {i + 1} about {query}.",
+                "url": f"https://example.com/{query.replace(' ', '-')}/{i + 1}",
+                "publishedAt": "2026-01-01T00:00:00Z"
+            }
+            for i in range(count)
+        ]
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        server.request_count += 1
+        delay = server.latency()
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(self.path)
+        server.requests_by_path[url.path] += 1
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        headers = {}
+
+        if any(url.path.endswith(suffix) for suffix in server.malformed_paths):
+            # A proxy or captive portal answering 200 with an HTML page
+            body = b"<html><body>Sign in to continue</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if server.down:
+            # Outage: hang for stall_s, then fail, like an overloaded upstream
+            time.sleep(server.stall_s)
+            status, payload = 503, {"message": "service unavailable"}
+        elif server.throttled():
+            status, payload = 429, {"message": "rate limited"}
+            headers["Retry-After"] = "1"
+        elif random.random() < server.error_rate:
+            status, payload = 500, {"message": "injected error"}
+        elif url.path.endswith("/weather"):
+            status, payload = 200, weather_payload(query.get("q", "Unknown"))
+            server.cities_by_id[payload["id"]] = payload["name"]
+        elif url.path.endswith("/group"):
+            cities = [server.cities_by_id.get(int(city_id)) for city_id in query.get("id", "").split(",") if city_id]
+            payloads = [weather_payload(city) for city in cities if city]
+            status, payload = 200, {"cnt": len(payloads), "list": payloads}
+        elif url.path.endswith("/top-headlines"):
+            status, payload = 200, news_payload("headlines", int(query.get("pageSize", 5)))
+        elif url.path.endswith("/everything"):
+            status, payload = 200, news_payload(query.get("q", ""), int(query.get("pageSize", 5)))
+        else:
+            status, payload = 404, {"message": "not found"}
+
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (cancelled or hedged request); nothing to do
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubUpstreamServer:
+    """
+    Threaded local HTTP server that imitates OpenWeatherMap and NewsAPI
+
+    Serves /data/2.5/weather, /data/2.5/group (for city IDs already served
+    by /weather), /v2/top-headlines and /v2/everything with
+    keep-alive enabled. Latency is drawn per request from a normal
+    distribution (mean_ms, jitter_ms), plus slow_ms for a slow_rate
+    fraction of requests (a latency tail); error_rate injects HTTP 500s.
+    With quota_per_s set, requests beyond that many per one-second window
+    get 429 with Retry-After: 1, like NewsAPI over its limit. outage()
+    makes every request hang and then fail with 503 until restore().
+    malformed(suffix) answers requests for paths ending in it with a 200
+    HTML page instead of JSON, until restore().
+    """
+
+    def __init__(self, mean_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 quota_per_s: int = 0, slow_rate: float = 0.0, slow_ms: float = 0.0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.request_count = 0
+        self.server.cities_by_id = {}
+        self.server.requests_by_path = Counter()
+        self.server.error_rate = error_rate
+        self.server.latency = lambda: (
+            max(0.0, random.gauss(mean_ms, jitter_ms)) + (slow_ms if random.random() < slow_rate else 0.0)
+        ) / 1000
+        self.server.down = False
+        self.server.stall_s = 0.0
+        self.server.malformed_paths = set()
+        self.server.throttled_count = 0
+        self._window = [0, 0]
+        self._window_lock = threading.Lock()
+        self.server.throttled = lambda: self._throttled(quota_per_s)
+        self._thread = None
+
+    def _throttled(self, quota_per_s: int) -> bool:
+        if not quota_per_s:
+            return False
+        with self._window_lock:
+            second = int(time.monotonic())
+            if self._window[0] != second:
+                self._window[:] = [second, 0]
+            self._window[1] += 1
+            if self._window[1] <= quota_per_s:
+                return False
+            self.server.throttled_count += 1
+            return True
+
+    def outage(self, stall_ms: float = 0.0):
+        """Start failing every request with 503 after stall_ms"""
+        self.server.stall_s = stall_ms / 1000
+        self.server.down = True
+
+    def restore(self):
+        self.server.down = False
+        self.server.malformed_paths.clear()
+
+    def malformed(self, *suffixes: str):
+        """Answer requests for these paths (e.g. "/group") with 200 and a non-JSON body"""
+        self.server.malformed_paths.update(suffixes)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def weather_url(self) -> str:
+        return f"{self.base_url}/data/2.5/weather"
+
+    @property
+    def news_url(self) -> str:
+        return f"{self.base_url}/v2"
+
+    @property
+    def request_count(self) -> int:
+        return self.server.request_count
+
+    @property
+    def requests_by_path(self) -> Counter:
+        return self.server.requests_by_path
+
+    def start(self) -> "StubUpstreamServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def default_llm_responder(system_message: str, prompt: str) -> str:
+    """Answer planner, verifier and reasoning prompts with well-formed canned output"""
+    if "create an execution plan" in prompt:
+        task = prompt.split("USER TASK:", 1)[-1].split("\n", 1)[0].strip()
+        from agents.fast_planner import FastPlanner
+        # Its own instance: the grammar stands in for the LLM even when the fast path is off
+        plan = FastPlanner(enabled=True).plan(task) or {
+            "task_summary": task,
+            "steps": [{
+                "step_number": 1,
+                "action": "Answer the request",
+                "tool": None,
+                "tool_input": None,
+                "expected_output": "Response to user"
+            }],
+            "final_output_format": "Text response"
+        }
+        plan.pop("plan_source", None)
+        return json.dumps(plan)
+    if "Verify and synthesize" in prompt:
+        return json.dumps({
+            "verification_status": "complete",
+            "issues_found": [],
+            "final_response": "Stub synthesis of the collected data.",
+            "suggestions": []
+        })
+    return "Stub reasoning output."
+
+
+class StubUserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubLlmChat:
+    """
+    Drop-in stand-in for emergentintegrations' LlmChat
+
+    Exposes only the LlmChat API the app uses (the constructor, with_model
+    and send_message); the conversation history it accumulates is private,
+    as in the real class, so nothing can rely on trimming it.
+
+    Class attributes configure every instance: setup_delay is paid once per
+    instance on its first request (provider connection setup), latency() is
+    drawn per request, error_rate injects provider 503 errors, and
+    responder(system_message, prompt) builds the reply.
+    """
+
+    setup_delay = 0.0
+    latency = staticmethod(lambda: 0.0)
+    error_rate = 0.0
+    responder = staticmethod(default_llm_responder)
+    instances = 0
+    calls = 0
+
+    def __init__(self, api_key: str = None, session_id: str = None, system_message: str = ""):
+        StubLlmChat.instances += 1
+        self.session_id = session_id
+        self.system_message = system_message
+        self._history = [{"role": "system", "content": system_message}]
+        self._connected = False
+
+    def with_model(self, provider: str, model: str) -> "StubLlmChat":
+        self.model = f"{provider}/{model}"
+        return self
+
+    async def send_message(self, message: StubUserMessage) -> str:
+        StubLlmChat.calls += 1
+        if not self._connected:
+            await asyncio.sleep(StubLlmChat.setup_delay)
+            self._connected = True
+        delay = StubLlmChat.latency()
+        if delay:
+            await asyncio.sleep(delay)
+        if StubLlmChat.error_rate and random.random() < StubLlmChat.error_rate:
+            raise RuntimeError("503 Service Unavailable (injected error)")
+        self._history.append({"role": "user", "content": message.text})
+        reply = StubLlmChat.responder(self.system_message, message.text)
+        self._history.append({"role": "assistant", "content": reply})
+        return reply
+
+
+def install_stub_llm():
+    """Register StubLlmChat as emergentintegrations.llm.chat; call before importing llm"""
+    package = types.ModuleType("emergentintegrations")
+    llm_package = types.ModuleType("emergentintegrations.llm")
+    chat_module = types.ModuleType("emergentintegrations.llm.chat")
+    chat_module.LlmChat = StubLlmChat
+    chat_module.UserMessage = StubUserMessage
+    package.llm = llm_package
+    llm_package.chat = chat_module
+    sys.modules.update({
+        "emergentintegrations": package,
+        "emergentintegrations.llm": llm_package,
+        "emergentintegrations.llm.chat": chat_module
+    })
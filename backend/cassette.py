@@ -0,0 +1,304 @@
+"""
+Cassette - Record and replay LLM and tool traffic with its original timings
+"""
+import os
+import gzip
+import json
+import time
+import uuid
+import atexit
+import base64
+import asyncio
+import hashlib
+import threading
+import contextvars
+from collections import deque
+from urllib.parse import urlsplit
+
+from config import settings
+
+
+DEFAULT_CASSETTE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "cassette.jsonl")
+
+# Credentials never reach the trace, and don't take part in matching
+REDACTED_PARAMS = {"appid", "apikey", "api_key", "key", "token"}
+
+# Task the current LLM/HTTP call belongs to, so a slow task can be replayed alone
+current_task_id = contextvars.ContextVar("cassette_task_id", default=None)
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a request has no recorded response"""
+
+
+class ReplayedError(Exception):
+    """An LLM error re-raised from the trace (message kept for error classification)"""
+
+
+def _redact(params: dict) -> dict:
+    return {key: value for key, value in (params or {}).items() if key.lower() not in REDACTED_PARAMS}
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:24]
+
+
+def load_records(path: str) -> list:
+    """Read every record of a trace file (plain or .gz JSONL)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    records = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            # Trace of a process that was killed mid-write; keep what is complete
+            pass
+    return records
+
+
+class Cassette:
+    """
+    Append-only trace of LLM prompts/responses and tool HTTP exchanges
+
+    In "record" mode every GeminiClient request, tool HTTP request and
+    pipeline task is written as one compact JSON line with its start time
+    and duration. In "replay" mode requests are answered from the trace
+    instead of the network, after sleeping for the recorded duration
+    divided by speed (0 = no delay), and recorded errors are raised again.
+
+    Requests match on a hash of agent + system message + prompt (LLM) or
+    URL path + parameters without credentials (HTTP). A request matched several
+    times gets the recorded responses in order, then keeps the last one.
+    An LLM prompt the new build changed falls back to the next recording
+    from the same agent, counted as a fuzzy match.
+    """
+
+    def __init__(self, mode: str = None, path: str = None, speed: float = None):
+        """
+        Args:
+            mode: "off", "record" or "replay" (default CASSETTE_MODE)
+            path: Trace file; a .gz suffix compresses it (default CASSETTE_PATH)
+            speed: Replay speed-up factor, 0 = no delay (default CASSETTE_SPEED)
+        """
+        self.mode = (mode or settings.get("CASSETTE_MODE", "off")).lower()
+        if self.mode not in ("off", "record", "replay"):
+            raise ValueError(f"CASSETTE_MODE must be off, record or replay, not {self.mode!r}")
+        self.path = path or settings.get("CASSETTE_PATH") or DEFAULT_CASSETTE_PATH
+        self.speed = speed if speed is not None else settings.get_float("CASSETTE_SPEED", 1.0)
+        self.enabled = self.mode != "off"
+        self.stats = {"recorded": 0, "replayed": 0, "fuzzy": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._file = None
+        self._by_key = None
+        self._by_agent = None
+
+    # Recording
+
+    def _write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                opener = gzip.open if self.path.endswith(".gz") else open
+                self._file = opener(self.path, "at", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            self.stats["recorded"] += 1
+
+    def _base(self, kind: str, key: str, started: float, duration: float) -> dict:
+        return {
+            "kind": kind,
+            "key": key,
+            "task_id": current_task_id.get(),
+            "at": round(started, 4),
+            "ms": round(duration * 1000, 2)
+        }
+
+    def record_task(self, task_id: str, task: str, started: float, duration: float, result: dict):
+        """Record a finished pipeline task (its LLM/HTTP records carry the same task_id)"""
+        record = self._base("task", task_id, started, duration)
+        record.update({
+            "task_id": task_id,
+            "task": task,
+            "status": result.get("status"),
+            "final_answer": result.get("final_answer")
+        })
+        self._write(record)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # Replay
+
+    def _index(self):
+        if self._by_key is not None:
+            return
+        with self._lock:
+            if self._by_key is not None:
+                return
+            by_key, by_agent = {}, {}
+            records = load_records(self.path) if os.path.exists(self.path) else []
+            for record in records:
+                if record["kind"] == "task":
+                    continue
+                key = record["key"]
+                if record["kind"] == "http":
+                    # Stored URL and params are enough to rebuild the key
+                    key = self._http_key(record["url"], record["params"])
+                by_key.setdefault(key, deque()).append(record)
+                if record["kind"] == "llm":
+                    by_agent.setdefault(record["agent"], deque()).append(record)
+            self._by_agent = by_agent
+            self._by_key = by_key
+
+    def _take(self, key: str, agent: str = None) -> dict:
+        self._index()
+        with self._lock:
+            recordings = self._by_key.get(key)
+            if recordings:
+                self.stats["replayed"] += 1
+                return recordings.popleft() if len(recordings) > 1 else recordings[0]
+            recordings = self._by_agent.get(agent) if agent else None
+            if recordings:
+                self.stats["fuzzy"] += 1
+                recordings.rotate(-1)
+                return recordings[-1]
+            self.stats["misses"] += 1
+        raise CassetteMiss(f"No recorded response for {agent or 'request'} {key}")
+
+    def _delay(self, record: dict) -> float:
+        return record["ms"] / 1000 / self.speed if self.speed > 0 else 0.0
+
+    # Hooks
+
+    async def llm(self, agent: str, system_message: str, prompt: str, send, on_token=None) -> str:
+        """
+        Serve one GeminiClient request
+
+        Args:
+            agent: GeminiClient name
+            system_message: System prompt of the client
+            prompt: Full prompt sent
+            send: Coroutine function performing the live request (record mode)
+            on_token: Streaming callback; replay emits the whole response once
+        """
+        key = _digest("llm", agent, system_message, prompt)
+        if self.mode == "replay":
+            record = self._take(key, agent)
+            await asyncio.sleep(self._delay(record))
+            if record.get("error"):
+                raise ReplayedError(record["error"])
+            if on_token is not None:
+                outcome = on_token(record["response"])
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+            return record["response"]
+
+        started, clock = time.time(), time.perf_counter()
+        record = {"agent": agent, "prompt": prompt}
+        try:
+            response = await send()
+            record["response"] = response
+            return response
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            self._write({**self._base("llm", key, started, time.perf_counter() - clock), **record})
+
+    def _http_key(self, url: str, params: dict) -> str:
+        # Path only: a trace recorded against one host replays against another
+        return _digest("http", urlsplit(url).path, json.dumps(_redact(params), sort_keys=True, default=str))
+
+    def _http_record(self, url: str, params: dict, response=None, error: Exception = None) -> dict:
+        record = {"url": url, "params": _redact(params)}
+        if error is not None:
+            record["error"] = str(error)
+            record["error_type"] = "timeout" if type(error).__name__ == "TransportTimeout" else "transport"
+            return record
+        record["status"] = response.status_code
+        record["headers"] = {
+            key: value for key, value in response.headers.items() if key.lower() in ("content-type", "retry-after")
+        }
+        try:
+            record["body"] = response.body.decode("utf-8")
+        except UnicodeDecodeError:
+            record["body_b64"] = base64.b64encode(response.body).decode("ascii")
+        return record
+
+    def _http_response(self, record: dict):
+        from tools.http_client import HttpResponse, TransportError, TransportTimeout
+
+        if record.get("error"):
+            error_type = TransportTimeout if record.get("error_type") == "timeout" else TransportError
+            raise error_type(record["error"])
+        body = record["body"].encode("utf-8") if "body" in record else base64.b64decode(record["body_b64"])
+        return HttpResponse(record["status"], body, record.get("headers"))
+
+    def _http_miss(self, url: str, error: CassetteMiss):
+        from tools.http_client import TransportError
+
+        raise TransportError(f"{error} ({url})") from error
+
+    async def http_async(self, url: str, params: dict, send):
+        """Serve one HttpClient.get_async request; send performs it live (record mode)"""
+        key = self._http_key(url, params)
+        if self.mode == "replay":
+            try:
+                record = self._take(key)
+            except CassetteMiss as e:
+                self._http_miss(url, e)
+            await asyncio.sleep(self._delay(record))
+            return self._http_response(record)
+
+        started, clock = time.time(), time.perf_counter()
+        try:
+            response = await send(url, params)
+        except Exception as e:
+            self._write({**self._base("http", key, started, time.perf_counter() - clock),
+                         **self._http_record(url, params, error=e)})
+            raise
+        self._write({**self._base("http", key, started, time.perf_counter() - clock),
+                     **self._http_record(url, params, response)})
+        return response
+
+    def http(self, url: str, params: dict, send):
+        """Serve one HttpClient.get request; send performs it live (record mode)"""
+        key = self._http_key(url, params)
+        if self.mode == "replay":
+            try:
+                record = self._take(key)
+            except CassetteMiss as e:
+                self._http_miss(url, e)
+            time.sleep(self._delay(record))
+            return self._http_response(record)
+
+        started, clock = time.time(), time.perf_counter()
+        try:
+            response = send(url, params)
+        except Exception as e:
+            self._write({**self._base("http", key, started, time.perf_counter() - clock),
+                         **self._http_record(url, params, error=e)})
+            raise
+        self._write({**self._base("http", key, started, time.perf_counter() - clock),
+                     **self._http_record(url, params, response)})
+        return response
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+def new_task_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+# Singleton instance
+cassette = Cassette()
+atexit.register(cassette.close)
@@ -0,0 +1,82 @@
+"""
+Config - Settings read from the environment, with the .env file loaded once
+"""
+import os
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def find_env_file(start: str = BACKEND_DIR) -> str:
+    """Nearest .env in start or one of its parents (what load_dotenv() found per module before); None if none"""
+    directory = start
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+class Settings:
+    """
+    Single entry point for configuration
+
+    The .env file is read once, on first access, and never overrides
+    variables already set in the environment. Values are looked up in
+    os.environ on every call rather than snapshotted, so anything that
+    sets the environment before building a component (the server, the
+    benchmarks) still takes effect.
+    """
+
+    def __init__(self, env_file: str = None):
+        """
+        Args:
+            env_file: .env file to load (default: nearest .env from backend/ upwards)
+        """
+        self.env_file = env_file
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the .env file, once; python-dotenv is only imported here"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            path = self.env_file or find_env_file()
+            if path:
+                from dotenv import load_dotenv
+                load_dotenv(path)
+            self._loaded = True
+
+    def get(self, name: str, default: str = None) -> str:
+        self.load()
+        return os.environ.get(name, default)
+
+    def get_bool(self, name: str, default: bool) -> bool:
+        """True only for "true" (any case), as everywhere in this codebase"""
+        value = self.get(name)
+        return default if value is None else value.lower() == "true"
+
+    def get_int(self, name: str, default: int) -> int:
+        value = self.get(name)
+        return default if value is None or value == "" else int(value)
+
+    def get_float(self, name: str, default: float) -> float:
+        value = self.get(name)
+        return default if value is None or value == "" else float(value)
+
+    def require(self, name: str) -> str:
+        """Value of a mandatory variable; KeyError if it is unset"""
+        value = self.get(name)
+        if value is None:
+            raise KeyError(f"{name} is not set (environment or .env)")
+        return value
+
+
+# Singleton instance
+settings = Settings()
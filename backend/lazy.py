@@ -0,0 +1,42 @@
+"""
+Lazy - Module attributes built on first access instead of at import
+"""
+import threading
+
+
+def lazy_attributes(namespace: dict, **factories):
+    """
+    Module-level __getattr__ (PEP 562) that builds attributes on first use
+
+    Each factory runs at most once, under a lock, and its result is stored
+    in the module namespace, so later lookups are plain global reads and
+    never reach __getattr__ again. A name already bound in the namespace
+    (in a package, the submodule of the same name bound by its import) is
+    unbound, so that attribute access and "from package import name" get
+    the built object as they did when it was created eagerly.
+
+    Usage, at the bottom of a module:
+        __getattr__ = lazy_attributes(globals(), planner_agent=PlannerAgent)
+
+    Args:
+        namespace: The module's globals()
+        **factories: Attribute name -> zero-argument callable building it
+
+    Returns:
+        The __getattr__ function to assign in the module
+    """
+    lock = threading.RLock()
+    module = namespace.get("__name__")
+    for name in factories:
+        namespace.pop(name, None)
+
+    def __getattr__(name: str):
+        factory = factories.get(name)
+        if factory is None:
+            raise AttributeError(f"module {module!r} has no attribute {name!r}")
+        with lock:
+            if name not in namespace:
+                namespace[name] = factory()
+            return namespace[name]
+
+    return __getattr__
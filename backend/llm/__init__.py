@@ -1,6 +1,11 @@
 """
 LLM module - Gemini integration for AI Operations Assistant
 """
-from .gemini_client import GeminiClient, run_async
+from .gemini_client import GeminiClient, run_async, iter_async
+from .response_cache import ResponseCache, response_cache
+from .chat_pool import ChatPool
+from .prompt_compaction import compact, estimate_tokens
+from .json_repair import parse_json, repair_json, conform
 
-__all__ = ["GeminiClient", "run_async"]
+__all__ = ["GeminiClient", "run_async", "iter_async", "ResponseCache", "response_cache", "ChatPool", "compact", "estimate_tokens",
+           "parse_json", "repair_json", "conform"]
@@ -0,0 +1,119 @@
+"""
+Chat Pool - LlmChat clients with bounded concurrency, reused when their history can be reset
+"""
+import asyncio
+import itertools
+import threading
+import weakref
+from collections import deque, OrderedDict
+from contextlib import asynccontextmanager
+
+
+class ChatPool:
+    """
+    Pool of chat clients for one GeminiClient, with bounded concurrency
+
+    Clients are checked out exclusively, so one client never serves two
+    requests at once. In stateful mode every session_id keeps its own client
+    (and history), bounded by max_sessions.
+
+    In stateless mode a client may only serve another request once its
+    history is gone, and LlmChat has no public way to clear it. So a
+    stateless client is reused only when a reset hook reports that it
+    cleared the history; otherwise it is dropped after its request and the
+    next one gets a fresh client with its own session id. Either way the
+    pool caps concurrency at max_size in-flight requests per event loop.
+    """
+
+    def __init__(self, factory, max_size: int = 8, stateless: bool = True, max_sessions: int = 64,
+                 reset=None):
+        """
+        Args:
+            factory: Callable taking a session_id and returning a new chat client
+            max_size: Max concurrent requests (and idle clients kept) per event loop
+            stateless: Requests never see each other's history
+            max_sessions: LRU bound on per-session clients in stateful mode
+            reset: Optional callable clearing a client's history after a
+                stateless request; returns True if the client may be reused
+        """
+        self._factory = factory
+        self.max_size = max(1, max_size)
+        self.stateless = stateless
+        self.max_sessions = max_sessions
+        self._reset = reset
+        self._idle = deque()
+        self._sessions = OrderedDict()
+        self._pooled_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.stats = {"created": 0, "reused": 0, "waits": 0, "discarded": 0}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_size)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    def _new_chat(self, session_id: str):
+        chat = self._factory(session_id)
+        with self._lock:
+            self.stats["created"] += 1
+        return chat
+
+    def _checkout(self, session_id: str):
+        if not self.stateless and session_id:
+            with self._lock:
+                chat = self._sessions.pop(session_id, None)
+                if chat is not None:
+                    self.stats["reused"] += 1
+                    return chat
+            return self._new_chat(session_id)
+
+        with self._lock:
+            if self._idle:
+                self.stats["reused"] += 1
+                return self._idle.pop()
+            pooled_id = f"pooled-{next(self._pooled_ids)}"
+        return self._new_chat(pooled_id)
+
+    def _checkin(self, chat, session_id: str):
+        if not self.stateless and session_id:
+            with self._lock:
+                self._sessions[session_id] = chat
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            return
+
+        # Only a client whose history was cleared may serve the next request
+        if self._reset is None or not self._reset(chat):
+            with self._lock:
+                self.stats["discarded"] += 1
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(chat)
+
+    @asynccontextmanager
+    async def acquire(self, session_id: str = None):
+        """Borrow a chat client for one request"""
+        semaphore = self._semaphore()
+        if semaphore.locked():
+            with self._lock:
+                self.stats["waits"] += 1
+        async with semaphore:
+            chat = self._checkout(session_id)
+            try:
+                yield chat
+            finally:
+                self._checkin(chat, session_id)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["idle"] = len(self._idle)
+            stats["sessions"] = len(self._sessions)
+        return stats
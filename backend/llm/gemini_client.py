@@ -2,74 +2,326 @@
 Gemini LLM Client for AI Operations Assistant
 Uses emergentintegrations library for Gemini 3 Flash
 """
-import os
-import json
 import asyncio
-from dotenv import load_dotenv
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+from config import settings
+from cassette import cassette
+from resilience import rate_limits, hedgers, circuit_breakers
+from tools.http_client import http_client
+from metrics import (
+    registry, classify_error, LLM_DURATION, LLM_IN_FLIGHT, LLM_ERRORS, LLM_JSON_FAILURES, LLM_JSON_RESULTS, LLM_CACHE_RESULTS
+)
+from .response_cache import response_cache
+from .json_repair import parse_json, conform
+from .chat_pool import ChatPool
+
+
+MODEL_PROVIDER = "gemini"
+MODEL_NAME = "gemini-3-flash-preview"
+
+# Characters of an unusable response quoted back in the re-ask
+REASK_RESPONSE_CHARS = 4000
 
 
 class GeminiClient:
     """Wrapper for Gemini LLM interactions"""
     
-    def __init__(self, system_message: str = "You are a helpful AI assistant."):
-        self.api_key = os.environ.get("GEMINI_API_KEY")
+    def __init__(self, system_message: str = "You are a helpful AI assistant.",
+                 name: str = "default", cache_ttl: float = 0, stateless: bool = True):
+        """
+        Args:
+            system_message: System prompt for every request
+            name: Agent name, used for per-agent settings (LLM_CACHE_TTL_<NAME>)
+            cache_ttl: Seconds a response stays cached; 0 disables caching for this client
+            stateless: Requests don't see each other's history; set False to keep
+                history per session_id
+        """
+        self.api_key = settings.get("GEMINI_API_KEY")
         self.system_message = system_message
+        self.name = name
+        self.cache_ttl = settings.get_float(f"LLM_CACHE_TTL_{name.upper()}", cache_ttl)
+        self.cache = response_cache
+        self.stateless = stateless
+        # No reset hook: LlmChat has no public way to clear its history, so a
+        # stateless client serves one request and the pool only caps concurrency
+        self.pool = ChatPool(
+            self._create_chat,
+            max_size=settings.get_int("LLM_POOL_SIZE", 8),
+            stateless=stateless
+        )
+        registry.register_stats(f"ai_ops_chat_pool_{name}", self.pool.get_stats)
         
-    def _create_chat(self, session_id: str) -> LlmChat:
-        """Create a new chat instance with Gemini model"""
+    def _create_chat(self, session_id: str):
+        """Create a new chat instance with Gemini model (called by the pool)"""
+        # The provider SDK is heavy; only pay for it once a request needs a chat
+        from emergentintegrations.llm.chat import LlmChat
         chat = LlmChat(
             api_key=self.api_key,
             session_id=session_id,
             system_message=self.system_message
-        ).with_model("gemini", "gemini-3-flash-preview")
+        ).with_model(MODEL_PROVIDER, MODEL_NAME)
         return chat
     
-    async def generate(self, prompt: str, session_id: str = "default") -> str:
-        """Generate a response from the LLM"""
-        chat = self._create_chat(session_id)
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+    def _cache_key(self, prompt: str, json_mode: bool):
+        if not (self.cache.enabled and self.cache_ttl > 0):
+            return None
+        return self.cache.make_key(f"{MODEL_PROVIDER}/{MODEL_NAME}", self.system_message, prompt, json_mode)
+    
+    async def generate(self, prompt: str, session_id: str = "default", use_cache: bool = True,
+                       on_token=None) -> str:
+        """
+        Generate a response from the LLM
+        
+        Args:
+            prompt: User prompt
+            session_id: Chat session identifier
+            use_cache: Set False to bypass the response cache for this call
+            on_token: Optional callback (sync or async) receiving text chunks as they arrive
+        """
+        key = self._cache_key(prompt, json_mode=False) if use_cache else None
+        if key:
+            cached = await self.cache.get_async(key)
+            LLM_CACHE_RESULTS.inc(agent=self.name, result="miss" if cached is None else "hit")
+            if cached is not None:
+                await _emit(on_token, cached)
+                return cached
+        
+        response = await self._send(prompt, session_id, on_token)
+        
+        if key:
+            await self.cache.set_async(key, response, self.cache_ttl)
         return response
     
-    async def generate_json(self, prompt: str, session_id: str = "default") -> dict:
-        """Generate a JSON response from the LLM"""
+    async def generate_stream(self, prompt: str, session_id: str = "default", use_cache: bool = True):
+        """Async iterator over the text chunks of a generated response"""
+        queue = asyncio.Queue()
+        done = object()
+        
+        async def produce():
+            try:
+                await self.generate(prompt, session_id, use_cache, on_token=queue.put)
+            finally:
+                await queue.put(done)
+        
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is done:
+                    break
+                yield chunk
+            # Surface any error raised by the request
+            await producer
+        finally:
+            producer.cancel()
+    
+    async def generate_json(self, prompt: str, session_id: str = "default", use_cache: bool = True,
+                            on_token=None, schema: dict = None) -> dict:
+        """
+        Generate a JSON response from the LLM
+        
+        The response is parsed leniently (see json_repair.parse_json) and,
+        with a schema, checked and coerced by json_repair.conform. Only when
+        that fails is the model asked once more, with its previous answer
+        and what was wrong with it.
+        
+        Args:
+            prompt: User prompt
+            session_id: Chat session identifier
+            use_cache: Set False to bypass the response cache for this call
+            on_token: Optional callback receiving raw response chunks as they arrive
+                (first attempt only)
+            schema: Optional shape the result must have (see json_repair.conform)
+            
+        Returns:
+            The parsed dict, or {"error": ..., "raw": ...} if no usable JSON came back
+        """
+        key = self._cache_key(prompt, json_mode=True) if use_cache else None
+        if key:
+            cached = await self.cache.get_async(key)
+            LLM_CACHE_RESULTS.inc(agent=self.name, result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+        
         json_prompt = f"""{prompt}
 
 IMPORTANT: Respond ONLY with valid JSON. No markdown, no code blocks, no explanations.
 Start directly with {{ and end with }}"""
         
-        chat = self._create_chat(session_id)
-        user_message = UserMessage(text=json_prompt)
-        response = await chat.send_message(user_message)
+        response = await self._send(json_prompt, session_id, on_token)
+        result, outcome, problem = self._parse_json(response, schema)
+        if problem is not None:
+            reask = f"""{json_prompt}
+
+Your previous answer could not be used: {problem}.
+Previous answer:
+{response[:REASK_RESPONSE_CHARS]}
+
+Respond again with the complete, corrected JSON object only."""
+            response = await self._send(reask, session_id)
+            result, outcome, problem = self._parse_json(response, schema)
+            outcome = "reasked" if problem is None else "failed"
+        LLM_JSON_RESULTS.inc(agent=self.name, outcome=outcome or "failed")
+        if problem is not None:
+            LLM_JSON_FAILURES.inc(agent=self.name)
+            return {"error": f"Failed to parse JSON: {problem}", "raw": response}
+        
+        # Cache the parsed dict so hits skip the cleanup below too
+        if key:
+            await self.cache.set_async(key, result, self.cache_ttl)
+        return result
+    
+    async def _send(self, prompt: str, session_id: str, on_token=None) -> str:
+        """
+        Send one prompt on a pooled chat client, through the "gemini" resilience layer
         
-        # Clean response and parse JSON
-        cleaned = response.strip()
-        if cleaned.startswith("```"):
-            lines = cleaned.split("\n")
-            cleaned = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
+        The request goes through the circuit breaker (CircuitOpenError while
+        it is open), then the hedger, and each attempt through the rate
+        limiter. Streamed requests and requests on a stateful session are
+        never hedged: two attempts would emit tokens or write history twice.
         
-        try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
-            # Try to extract JSON from response
-            start = cleaned.find("{")
-            end = cleaned.rfind("}") + 1
-            if start != -1 and end > start:
-                return json.loads(cleaned[start:end])
-            return {"error": "Failed to parse JSON", "raw": response}
+        With on_token set, the response is streamed when the chat client
+        supports it (stream_message); otherwise the full text is emitted once.
+        """
+        limiter = rate_limits.get("gemini")
+        hedger = hedgers.get("gemini") if on_token is None and self.stateless else None
+        breaker = circuit_breakers.get("gemini")
+        
+        async def attempt():
+            if limiter is None:
+                return await self._send_once(prompt, session_id, on_token)
+            return await limiter.call_async(
+                lambda: self._send_once(prompt, session_id, on_token), lambda response: (False, None)
+            )
+        
+        async def hedged():
+            return await hedger.call_async(attempt) if hedger is not None else await attempt()
+        
+        if breaker is None:
+            return await hedged()
+        return await breaker.call_async(hedged, lambda response: False)
+    
+    async def _send_once(self, prompt: str, session_id: str, on_token=None) -> str:
+        async with self.pool.acquire(None if self.stateless else session_id) as chat:
+            with LLM_IN_FLIGHT.track(agent=self.name), LLM_DURATION.time(agent=self.name):
+                try:
+                    if cassette.enabled:
+                        return await cassette.llm(
+                            self.name, self.system_message, prompt,
+                            lambda: self._request(chat, prompt, on_token), on_token
+                        )
+                    return await self._request(chat, prompt, on_token)
+                except Exception as e:
+                    LLM_ERRORS.inc(agent=self.name, type=classify_error(e))
+                    raise
+    
+    @staticmethod
+    async def _request(chat, prompt: str, on_token=None) -> str:
+        """The provider request itself, streamed when on_token is set and supported"""
+        from emergentintegrations.llm.chat import UserMessage
+        message = UserMessage(text=prompt)
+        stream = getattr(chat, "stream_message", None) if on_token else None
+        if stream is None:
+            response = await chat.send_message(message)
+            await _emit(on_token, response)
+            return response
+        
+        chunks = []
+        async for chunk in stream(message):
+            chunks.append(chunk)
+            await _emit(on_token, chunk)
+        return "".join(chunks)
+    
+    @staticmethod
+    def _parse_json(response: str, schema: dict = None) -> tuple:
+        """
+        Parse (and repair) an LLM response, then check it against schema
+        
+        Returns:
+            (result, outcome, problem): outcome is "clean" or "repaired";
+            problem describes why the response is unusable, None if it is usable
+        """
+        result, outcome = parse_json(response)
+        if result is None:
+            return None, None, "it is not a JSON object"
+        if schema is None:
+            return result, outcome, None
+        result, errors = conform(result, schema)
+        if errors:
+            return None, outcome, "; ".join(errors[:5])
+        return result, outcome, None
+
+
+async def _emit(callback, value):
+    """Call a sync or async callback, if any"""
+    if callback is not None:
+        outcome = callback(value)
+        if asyncio.iscoroutine(outcome):
+            await outcome
+
+
+_background_loop = None
+_background_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop that serves synchronous callers"""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="ai-ops-async", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+async def _closing_loop_sessions(coro):
+    """Await coro, then close the HTTP session opened on this throwaway loop"""
+    try:
+        return await coro
+    finally:
+        await http_client.close_loop_session()
 
 
 def run_async(coro):
-    """Helper to run async functions synchronously"""
+    """
+    Run a coroutine to completion from synchronous code
+    
+    Async callers should await the coroutine directly instead. Sync callers
+    share one long-lived background event loop, so loop-bound resources such
+    as pooled aiohttp sessions survive across calls.
+    """
+    loop = _get_background_loop()
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import nest_asyncio
-            nest_asyncio.apply()
-            return loop.run_until_complete(coro)
-        return loop.run_until_complete(coro)
+        running = asyncio.get_running_loop()
     except RuntimeError:
-        return asyncio.run(coro)
+        running = None
+    
+    if running is loop:
+        # Blocking the background loop on itself would deadlock
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, _closing_loop_sessions(coro)).result()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def iter_async(async_iterable):
+    """
+    Iterate an async iterable from synchronous code
+    
+    Items are produced on the shared background loop and handed over one at a
+    time, so the caller sees each item as soon as it is ready.
+    """
+    loop = _get_background_loop()
+    iterator = async_iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(iterator.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        closer = getattr(iterator, "aclose", None)
+        if closer is not None:
+            asyncio.run_coroutine_threadsafe(closer(), loop).result()
@@ -0,0 +1,333 @@
+"""
+JSON Repair - Tolerant extraction and schema checks for LLM JSON responses
+"""
+import re
+import json
+
+# Deeper nesting than any plan or verification is treated as garbage
+MAX_DEPTH = 64
+
+NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+WORD = re.compile(r"[A-Za-z_$][\w$-]*")
+LITERALS = {
+    "true": True, "false": False, "null": None,
+    "True": True, "False": False, "None": None,
+    "undefined": None, "NaN": None
+}
+ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+NULL_STRINGS = ("", "null", "none", "n/a")
+
+
+class _Truncated(Exception):
+    """The text ended inside a value"""
+
+
+class _Parser:
+    """
+    Single-pass recursive descent parser for almost-JSON
+
+    Accepts what LLMs tend to produce around valid JSON: single-quoted or
+    unquoted keys and strings, Python literals, trailing or missing commas,
+    comments, raw newlines in strings, and output cut off mid-value (open
+    strings, arrays and objects are closed at the end of the text). Every
+    such fix is noted in repairs.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.repairs = []
+
+    def _skip(self):
+        text, length = self.text, len(self.text)
+        while self.pos < length:
+            char = text[self.pos]
+            if char.isspace():
+                self.pos += 1
+            elif text.startswith("//", self.pos) or char == "#":
+                end = text.find("\n", self.pos)
+                self.pos = length if end == -1 else end + 1
+                self.repairs.append("comment")
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                self.pos = length if end == -1 else end + 2
+                self.repairs.append("comment")
+            else:
+                return
+
+    def _peek(self) -> str:
+        self._skip()
+        if self.pos >= len(self.text):
+            raise _Truncated()
+        return self.text[self.pos]
+
+    def value(self, depth: int = 0):
+        if depth > MAX_DEPTH:
+            raise ValueError("JSON nested too deeply")
+        char = self._peek()
+        if char == "{":
+            return self._object(depth)
+        if char == "[":
+            return self._array(depth)
+        if char in "\"'":
+            return self._string()
+        match = NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            literal = match.group().lstrip("+")
+            if literal.startswith("."):
+                literal = "0" + literal
+            if literal.endswith("."):
+                literal += "0"
+            return float(literal) if any(c in literal for c in ".eE") else int(literal)
+        match = WORD.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            word = match.group()
+            if word in LITERALS:
+                if word not in ("true", "false", "null"):
+                    self.repairs.append("literal")
+                return LITERALS[word]
+            if self.pos >= len(self.text):
+                # Cut off inside a literal, e.g. "tru"
+                for literal, value in LITERALS.items():
+                    if literal.startswith(word):
+                        self.repairs.append("truncated")
+                        return value
+            self.repairs.append("unquoted")
+            return word
+        raise ValueError(f"Unexpected {char!r} at {self.pos}")
+
+    def _string(self) -> str:
+        quote = self.text[self.pos]
+        if quote == "'":
+            self.repairs.append("single_quotes")
+        self.pos += 1
+        text, length = self.text, len(self.text)
+        chunks = []
+        start = self.pos
+        while self.pos < length:
+            char = text[self.pos]
+            if char == quote:
+                chunks.append(text[start:self.pos])
+                self.pos += 1
+                return "".join(chunks)
+            if char == "\\":
+                chunks.append(text[start:self.pos])
+                escape = text[self.pos + 1:self.pos + 2]
+                if escape == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", text[self.pos + 2:self.pos + 6]):
+                    chunks.append(chr(int(text[self.pos + 2:self.pos + 6], 16)))
+                    self.pos += 6
+                else:
+                    chunks.append(ESCAPES.get(escape, escape))
+                    self.pos += 2
+                start = self.pos
+                continue
+            self.pos += 1
+        chunks.append(text[start:])
+        self.repairs.append("truncated")
+        return "".join(chunks)
+
+    def _key(self) -> str:
+        char = self._peek()
+        if char in "\"'":
+            return self._string()
+        match = WORD.match(self.text, self.pos) or NUMBER.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"Expected a key at {self.pos}")
+        self.pos = match.end()
+        self.repairs.append("unquoted")
+        return match.group()
+
+    def _separator(self, closer: str) -> bool:
+        """Consume the comma after a member; False when the container ends here"""
+        char = self._peek()
+        if char == ",":
+            self.pos += 1
+            if self._peek() == closer:
+                self.repairs.append("trailing_comma")
+            return True
+        if char == closer:
+            return False
+        self.repairs.append("missing_comma")
+        return True
+
+    def _object(self, depth: int) -> dict:
+        self.pos += 1
+        result = {}
+        try:
+            while True:
+                char = self._peek()
+                if char == "}":
+                    self.pos += 1
+                    return result
+                if char == ",":
+                    self.pos += 1
+                    self.repairs.append("extra_comma")
+                    continue
+                key = self._key()
+                if self._peek() in ":=":
+                    self.pos += 1
+                else:
+                    self.repairs.append("missing_colon")
+                result[key] = self.value(depth + 1)
+                if not self._separator("}"):
+                    self.pos += 1
+                    return result
+        except _Truncated:
+            self.repairs.append("truncated")
+            return result
+
+    def _array(self, depth: int) -> list:
+        self.pos += 1
+        result = []
+        try:
+            while True:
+                char = self._peek()
+                if char == "]":
+                    self.pos += 1
+                    return result
+                if char == ",":
+                    self.pos += 1
+                    self.repairs.append("extra_comma")
+                    continue
+                result.append(self.value(depth + 1))
+                if not self._separator("]"):
+                    self.pos += 1
+                    return result
+        except _Truncated:
+            self.repairs.append("truncated")
+            return result
+
+
+def strip_fences(text: str) -> str:
+    """Remove a surrounding markdown code fence, if any"""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        lines = cleaned.split("\n")
+        cleaned = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
+    return cleaned.strip()
+
+
+def repair_json(text: str) -> tuple:
+    """
+    Extract the first JSON object from text, repairing what it can
+
+    Prose before and after the object is ignored. Each "{" is tried in
+    turn until one parses, so stray braces in the prose don't matter.
+
+    Returns:
+        (dict, repairs) with the list of fixes applied, or (None, []) if no
+        object could be recovered
+    """
+    start = text.find("{")
+    while start != -1:
+        parser = _Parser(text)
+        parser.pos = start
+        try:
+            value = parser.value()
+        except (ValueError, _Truncated):
+            value = None
+        if isinstance(value, dict) and value:
+            return value, parser.repairs
+        start = text.find("{", start + 1)
+    return None, []
+
+
+def parse_json(text: str) -> tuple:
+    """
+    Parse an LLM response that should be a JSON object
+
+    Returns:
+        (dict, method) where method is "clean" (valid JSON once code fences
+        are stripped) or "repaired"; (None, None) when nothing was recovered
+    """
+    cleaned = strip_fences(text or "")
+    try:
+        value = json.loads(cleaned, strict=False)
+        if isinstance(value, dict):
+            return value, "clean"
+    except json.JSONDecodeError:
+        pass
+    value, _ = repair_json(cleaned)
+    if value is None:
+        return None, None
+    return value, "repaired"
+
+
+def conform(value, schema: dict, path: str = "$") -> tuple:
+    """
+    Check a parsed value against a small JSON-schema-like dict, coercing where safe
+
+    Schema keys: "type" ("object", "array", "string", "integer" or absent
+    for any), "nullable", "enum" (strings, matched case-insensitively),
+    "required" and "properties" (objects), "items" and "min_items"
+    (arrays). Optional object properties and array items that don't
+    conform are dropped instead of failing the whole value; only
+    required structure produces errors.
+
+    Returns:
+        (conformed value, list of error strings; empty when valid)
+    """
+    if value is None or (schema.get("nullable") and isinstance(value, str)
+                         and value.strip().lower() in NULL_STRINGS):
+        if schema.get("nullable") or not schema.get("type"):
+            return None, []
+        return None, [f"{path} is missing"]
+
+    kind = schema.get("type")
+    if kind == "object":
+        if not isinstance(value, dict):
+            return value, [f"{path} must be an object"]
+        result, errors = dict(value), []
+        required = schema.get("required", ())
+        for name, property_schema in schema.get("properties", {}).items():
+            if name not in result:
+                if name in required:
+                    errors.append(f"{path}.{name} is missing")
+                continue
+            conformed, property_errors = conform(result[name], property_schema, f"{path}.{name}")
+            if not property_errors:
+                result[name] = conformed
+            elif name in required:
+                errors.extend(property_errors)
+            else:
+                del result[name]
+        return result, errors
+
+    if kind == "array":
+        if not isinstance(value, list):
+            value = [value]
+        items, item_schema = [], schema.get("items", {})
+        for index, item in enumerate(value):
+            conformed, item_errors = conform(item, item_schema, f"{path}[{index}]")
+            if not item_errors:
+                items.append(conformed)
+        if len(items) < schema.get("min_items", 0):
+            return items, [f"{path} needs at least {schema['min_items']} valid item(s)"]
+        return items, []
+
+    if kind == "string":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str):
+            return value, [f"{path} must be a string"]
+        if "enum" in schema:
+            match = next((option for option in schema["enum"] if option == value.strip().lower()), None)
+            if match is None:
+                return value, [f"{path} must be one of {', '.join(schema['enum'])}"]
+            value = match
+        return value, []
+
+    if kind == "integer":
+        if isinstance(value, bool):
+            return value, [f"{path} must be an integer"]
+        if isinstance(value, float) and value.is_integer():
+            return int(value), []
+        if isinstance(value, str) and value.strip().isdigit():
+            return int(value.strip()), []
+        if not isinstance(value, int):
+            return value, [f"{path} must be an integer"]
+        return value, []
+
+    return value, []
@@ -0,0 +1,97 @@
+"""
+Prompt Compaction - Compact, relevance-pruned, token-budgeted tool data for LLM prompts
+"""
+import json
+
+# Rough English/JSON average for Gemini tokenizers; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Fields that never help the model answer: execution bookkeeping
+DROP_FIELDS = {
+    "success", "cache_status", "started_at", "finished_at",
+    "duration_ms", "deduplicated", "total_results"
+}
+
+# Links and dates the verifier cites; kept unless the data is over budget
+CITATION_FIELDS = {"url", "published_at"}
+
+# (max string length, max list length) tried in order until the data fits the
+# budget; every level also drops CITATION_FIELDS, and the first does nothing else
+SHRINK_LEVELS = ((None, None), (240, 10), (160, 5), (80, 3), (40, 2))
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (characters / CHARS_PER_TOKEN, rounded up)"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def prune(value, max_chars: int = None, max_items: int = None, drop_citations: bool = False):
+    """
+    Drop irrelevant and empty fields, round floats, and clip long strings and lists
+
+    Args:
+        value: Tool output (any JSON-like structure)
+        max_chars: Longest string kept, in characters (None = no limit)
+        max_items: Longest list kept (None = no limit)
+        drop_citations: Also drop CITATION_FIELDS (links and dates)
+    """
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            if key in DROP_FIELDS or (drop_citations and key in CITATION_FIELDS):
+                continue
+            item = prune(item, max_chars, max_items, drop_citations)
+            if item not in (None, "", [], {}):
+                pruned[key] = item
+        return pruned
+    if isinstance(value, list):
+        items = value if max_items is None else value[:max_items]
+        return [prune(item, max_chars, max_items, drop_citations) for item in items]
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, str) and max_chars is not None and len(value) > max_chars:
+        return value[:max_chars - 1].rstrip() + "…"
+    return value
+
+
+def to_compact_json(value) -> str:
+    """Canonical compact JSON: sorted keys, no whitespace, unicode kept as-is"""
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str)
+
+
+def compact(value, budget_tokens: int) -> tuple:
+    """
+    Serialize tool data as compact JSON that fits a token budget
+
+    Bookkeeping fields are pruned first; if the result is still over budget,
+    links and dates go, then strings and lists are clipped progressively, and
+    as a last resort the text is cut.
+
+    Args:
+        value: Tool data to include in a prompt
+        budget_tokens: Max estimated tokens for the serialized data (<= 0 = no limit)
+
+    Returns:
+        (text, report) where report has raw_tokens (the old repr), tokens,
+        budget_tokens and truncated
+    """
+    raw_tokens = estimate_tokens(str(value))
+    text = to_compact_json(prune(value))
+    truncated = False
+
+    if budget_tokens > 0:
+        for max_chars, max_items in SHRINK_LEVELS:
+            if estimate_tokens(text) <= budget_tokens:
+                break
+            text = to_compact_json(prune(value, max_chars, max_items, drop_citations=True))
+            truncated = True
+        if estimate_tokens(text) > budget_tokens:
+            text = text[:budget_tokens * CHARS_PER_TOKEN - 1] + "…"
+            truncated = True
+
+    return text, {
+        "raw_tokens": raw_tokens,
+        "tokens": estimate_tokens(text),
+        "budget_tokens": budget_tokens,
+        "truncated": truncated
+    }
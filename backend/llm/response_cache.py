@@ -0,0 +1,72 @@
+"""
+Response Cache - Content-addressed cache for Gemini responses
+"""
+import os
+import json
+import hashlib
+
+from config import settings
+from tools.cache import TieredCache
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_cache.sqlite3"
+)
+
+
+class ResponseCache:
+    """
+    Opt-in cache of LLM responses keyed by a hash of the full request
+
+    The key covers model, system message, prompt and JSON mode, so only
+    byte-identical requests share an entry. generate_json stores the parsed
+    dict, so a hit also skips JSON cleanup and extraction.
+    """
+
+    def __init__(self, store: TieredCache = None, enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("LLM_CACHE_ENABLED", False)
+        self.enabled = enabled
+        # Only touch the disk when the cache is actually in use
+        path = settings.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) if enabled else None
+        self.store = store or TieredCache(
+            path=path or None,
+            max_entries=settings.get_int("LLM_CACHE_MAX_ENTRIES", 512),
+            namespace="llm"
+        )
+
+    @staticmethod
+    def make_key(model: str, system_message: str, prompt: str, json_mode: bool) -> str:
+        payload = json.dumps([model, system_message, prompt, json_mode])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str):
+        """Return a fresh cached response (a private copy, see TieredCache) or None"""
+        if not self.enabled:
+            return None
+        value, state = self.store.get(key)
+        return value if state == "fresh" else None
+
+    def set(self, key: str, value, ttl: float):
+        if self.enabled and ttl > 0:
+            self.store.set(key, value, ttl=ttl)
+
+    async def get_async(self, key: str):
+        """get() for the event loop; disk reads run off the loop"""
+        if not self.enabled:
+            return None
+        value, state = await self.store.get_async(key)
+        return value if state == "fresh" else None
+
+    async def set_async(self, key: str, value, ttl: float):
+        if self.enabled and ttl > 0:
+            await self.store.set_async(key, value, ttl=ttl)
+
+    def get_stats(self) -> dict:
+        stats = self.store.get_stats()
+        stats["enabled"] = self.enabled
+        return stats
+
+
+# Shared instance used by every GeminiClient
+response_cache = ResponseCache()
@@ -4,34 +4,97 @@ Coordinates the multi-agent workflow: Planner → Executor → Verifier
 """
 import sys
 import os
+import json
+import time
+import asyncio
 
 # Add backend to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from dotenv import load_dotenv
-load_dotenv()
+import agents
+from cassette import cassette, current_task_id, new_task_id
+from agents import plan_cache, fast_planner
+from llm import run_async, iter_async, response_cache
+from metrics import registry, STAGE_DURATION, TASKS, TASKS_IN_FLIGHT
+from tools import http_client, tool_cache, single_flight
 
-from agents import planner_agent, executor_agent, verifier_agent
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
 
 
 class AIOperationsAssistant:
-    """Main orchestrator for the AI Operations Assistant"""
+    """
+    Main orchestrator for the AI Operations Assistant
+    
+    The agents are resolved on first use, so importing this module (the
+    CLI usage path, server startup, Streamlit reruns) doesn't build LLM
+    clients or tools until a task actually runs.
+    """
+    
+    @property
+    def planner(self):
+        return agents.planner_agent
+    
+    @property
+    def executor(self):
+        return agents.executor_agent
     
-    def __init__(self):
-        self.planner = planner_agent
-        self.executor = executor_agent
-        self.verifier = verifier_agent
+    @property
+    def verifier(self):
+        return agents.verifier_agent
     
     def process_task(self, user_task: str) -> dict:
+        """Synchronous wrapper around process_task_async"""
+        return run_async(self.process_task_async(user_task))
+    
+    async def process_task_async(self, user_task: str, emit=None, plan: dict = None,
+                                 prefetched: dict = None) -> dict:
         """
         Process a user task through the multi-agent pipeline
         
         Args:
             user_task: Natural language task from user
+            emit: Optional coroutine function receiving stage event dicts
+                (see process_task_events) as the pipeline progresses
+            plan: Optional plan already made for this task (skips the planner)
+            prefetched: Optional tool calls shared across a batch
+                (see ExecutorAgent.execute_step_async)
             
         Returns:
             dict with complete results from all agents
         """
+        with TASKS_IN_FLIGHT.track(), STAGE_DURATION.time(stage="total"):
+            if cassette.mode == "record":
+                result = await self._run_recorded(user_task, emit, plan, prefetched)
+            else:
+                result = await self._run_pipeline(user_task, emit, plan, prefetched)
+        TASKS.inc(status=result["status"])
+        return result
+    
+    async def _run_recorded(self, user_task: str, emit, plan: dict, prefetched: dict) -> dict:
+        """Run the pipeline with its LLM and tool traffic tagged with a task id in the cassette"""
+        task_id = new_task_id()
+        token = current_task_id.set(task_id)
+        started, clock = time.time(), time.perf_counter()
+        try:
+            result = await self._run_pipeline(user_task, emit, plan, prefetched)
+        finally:
+            current_task_id.reset(token)
+        cassette.record_task(task_id, user_task, started, time.perf_counter() - clock, result)
+        return result
+    
+    async def _run_pipeline(self, user_task: str, emit, plan: dict, prefetched: dict) -> dict:
+        async def notify(event: str, **data):
+            if emit is not None:
+                await emit({"event": event, **data})
+        
+        async def on_step(step_result: dict):
+            await notify("step_done", step=step_result)
+        
+        async def on_token(text: str):
+            await notify("verifier_token", text=text)
+        
         result = {
             "user_task": user_task,
             "stages": {},
@@ -41,15 +104,22 @@ class AIOperationsAssistant:
         
         # Stage 1: Planning
         try:
-            plan = self.planner.create_plan(user_task)
+            await notify("stage", stage="planning")
+            started = time.perf_counter()
+            if plan is None:
+                with STAGE_DURATION.time(stage="planning"):
+                    plan = await self.planner.create_plan_async(user_task)
             result["stages"]["planning"] = {
                 "status": "success",
-                "plan": plan
+                "plan": plan,
+                "duration_ms": _elapsed_ms(started)
             }
+            await notify("plan_ready", plan=plan)
         except Exception as e:
             result["stages"]["planning"] = {
                 "status": "error",
-                "error": str(e)
+                "error": str(e),
+                "duration_ms": _elapsed_ms(started)
             }
             result["status"] = "failed"
             result["final_answer"] = f"Planning failed: {str(e)}"
@@ -57,15 +127,25 @@ class AIOperationsAssistant:
         
         # Stage 2: Execution
         try:
-            execution_results = self.executor.execute_plan(plan)
+            await notify("stage", stage="execution")
+            started = time.perf_counter()
+            with STAGE_DURATION.time(stage="execution"):
+                execution_results = await self.executor.execute_plan_async(
+                    plan, on_step=on_step if emit is not None else None, prefetched=prefetched
+                )
             result["stages"]["execution"] = {
                 "status": "success",
-                "results": execution_results
+                "results": execution_results,
+                "duration_ms": _elapsed_ms(started)
             }
+            await notify("execution_done", overall_status=execution_results.get("overall_status"))
+            if execution_results.get("overall_status") == "success":
+                self.planner.learn(user_task, plan)
         except Exception as e:
             result["stages"]["execution"] = {
                 "status": "error",
-                "error": str(e)
+                "error": str(e),
+                "duration_ms": _elapsed_ms(started)
             }
             result["status"] = "partial"
             result["final_answer"] = f"Execution failed: {str(e)}"
@@ -73,40 +153,113 @@ class AIOperationsAssistant:
         
         # Stage 3: Verification
         try:
-            verification = self.verifier.verify_and_synthesize(user_task, execution_results)
+            await notify("stage", stage="verification")
+            started = time.perf_counter()
+            with STAGE_DURATION.time(stage="verification"):
+                verification = await self.verifier.verify_and_synthesize_async(
+                    user_task, execution_results, on_token=on_token if emit is not None else None
+                )
             result["stages"]["verification"] = {
                 "status": "success",
-                "verification": verification
+                "verification": verification,
+                "duration_ms": _elapsed_ms(started)
             }
             result["final_answer"] = verification.get("final_response", "No response generated")
             result["status"] = "complete"
         except Exception as e:
             result["stages"]["verification"] = {
                 "status": "error", 
-                "error": str(e)
+                "error": str(e),
+                "duration_ms": _elapsed_ms(started)
             }
             result["status"] = "partial"
             result["final_answer"] = f"Verification failed: {str(e)}"
         
         return result
+    
+    async def process_task_events(self, user_task: str):
+        """
+        Run a task and yield stage events as they happen
+        
+        Events are dicts with an "event" key:
+            stage           - a stage started ("planning", "execution", "verification")
+            plan_ready      - the plan is available ("plan")
+            step_done       - one step finished ("step"), in completion order
+            execution_done  - all steps finished ("overall_status")
+            verifier_token  - a chunk of verifier output ("text")
+            result          - the final result dict, same as process_task ("result")
+        """
+        queue = asyncio.Queue()
+        
+        async def run():
+            try:
+                result = await self.process_task_async(user_task, emit=queue.put)
+                await queue.put({"event": "result", "result": result})
+            except Exception as e:
+                await queue.put({"event": "error", "error": str(e)})
+        
+        runner = asyncio.ensure_future(run())
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] in ("result", "error"):
+                    break
+        finally:
+            runner.cancel()
+    
+    def iter_task_events(self, user_task: str):
+        """Synchronous iterator over process_task_events, for scripts and Streamlit"""
+        return iter_async(self.process_task_events(user_task))
 
 
 # Create singleton instance
 assistant = AIOperationsAssistant()
 
+# Expose component stats (cache hit ratios, pool usage) alongside the pipeline metrics
+registry.register_stats("ai_ops_tool_cache", tool_cache.get_stats)
+registry.register_stats("ai_ops_llm_cache", response_cache.get_stats)
+registry.register_stats("ai_ops_plan_cache", plan_cache.get_stats)
+registry.register_stats("ai_ops_fast_planner", fast_planner.get_stats)
+registry.register_stats("ai_ops_single_flight", single_flight.get_stats)
+if cassette.enabled:
+    registry.register_stats("ai_ops_cassette", cassette.get_stats)
+
 
 def run_task(task: str) -> dict:
     """Convenience function to run a task"""
     return assistant.process_task(task)
 
 
+async def run_task_async(task: str) -> dict:
+    """Convenience coroutine to run a task from async code"""
+    return await assistant.process_task_async(task)
+
+
+def run_batch_file(path: str):
+    """Run a JSONL file of tasks, printing one JSON result line per task as each completes"""
+    from batch import BatchRunner, parse_batch_lines
+    
+    with open(path) as f:
+        tasks = parse_batch_lines(f)
+    runner = BatchRunner(assistant)
+    for record in iter_async(runner.run(tasks)):
+        print(json.dumps(record, default=str), flush=True)
+    print(json.dumps({"summary": runner.stats}), file=sys.stderr)
+
+
 if __name__ == "__main__":
     # CLI mode
-    if len(sys.argv) > 1:
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        run_batch_file(sys.argv[2])
+        http_client.close()
+    elif len(sys.argv) > 1:
         task = " ".join(sys.argv[1:])
         print(f"\n🤖 Processing task: {task}\n")
         result = run_task(task)
         print(f"\n📋 Final Answer:\n{result['final_answer']}")
+        http_client.close()
     else:
         print("Usage: python main.py <your task>")
+        print("       python main.py --batch tasks.jsonl")
         print("Example: python main.py 'What is the weather in London?'")
@@ -0,0 +1,311 @@
+"""
+Metrics - Minimal Prometheus-style counters, gauges and histograms
+"""
+import re
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from config import settings
+
+
+# Seconds; spans a cached lookup (~1ms) up to a slow LLM call (~30s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STATUS_CODE = re.compile(r"\b(401|403|429|5\d\d)\b")
+
+
+def classify_error(error) -> str:
+    """
+    Bucket an exception or error message into a small, fixed set of types
+
+    Returns:
+        "timeout", "unauthorized", "rate_limited", "server_error", "circuit_open" or "other"
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    text = str(error).lower()
+    if "circuit open" in text:
+        return "circuit_open"
+    if "timed out" in text or "timeout" in text:
+        return "timeout"
+    match = STATUS_CODE.search(text)
+    if match:
+        code = match.group(1)
+        if code in ("401", "403"):
+            return "unauthorized"
+        if code == "429":
+            return "rate_limited"
+        return "server_error"
+    if "unauthorized" in text or "api key" in text:
+        return "unauthorized"
+    if "rate limit" in text or "quota" in text:
+        return "rate_limited"
+    return "other"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Shared bookkeeping: one value slot per label combination"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) == 1 and len(self.label_names) == 1:
+            return tuple(labels.values())
+        return tuple([labels.get(name, "") for name in self.label_names])
+
+    def samples(self) -> list:
+        with self._lock:
+            return [(self.name, self.label_names, key, "", value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        if not registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        if not registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in flight"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the enclosed block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", self.label_names, key, f'le="{_format_value(bound)}"', cumulative))
+            samples.append((f"{self.name}_sum", self.label_names, key, "", total))
+            samples.append((f"{self.name}_count", self.label_names, key, "", count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds every metric plus stats collectors, and renders them as Prometheus text
+
+    Metrics are updated inline on the hot path (a dict update under an
+    uncontended lock). Collectors are callables returning a stats dict; they
+    only run when /metrics is scraped, so components that already keep
+    counters (caches, pools, queues) are exposed without extra bookkeeping.
+    """
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("METRICS_ENABLED", True)
+        self.enabled = enabled
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def register_stats(self, prefix: str, get_stats):
+        """
+        Expose a component's get_stats() dict as gauges named <prefix>_<key>
+
+        Non-numeric values are skipped. Registering the same prefix again
+        replaces the previous collector.
+        """
+        with self._lock:
+            self._collectors[prefix] = get_stats
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, label_names, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(label_names, key, extra)} {_format_value(value)}")
+
+        for prefix, get_stats in collectors:
+            try:
+                stats = get_stats()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry; module-level metrics below are the pipeline's instrumentation
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "ai_ops_stage_duration_seconds", "Pipeline stage latency", ("stage",)
+)
+TASKS = registry.counter("ai_ops_tasks_total", "Tasks processed by final status", ("status",))
+TASKS_IN_FLIGHT = registry.gauge("ai_ops_tasks_in_flight", "Tasks currently in the pipeline")
+
+PLANS = registry.counter("ai_ops_plans_total", "Plans created by source", ("source",))
+
+STEP_DURATION = registry.histogram(
+    "ai_ops_step_duration_seconds", "Executor step latency by tool (\"reasoning\" for LLM steps)", ("tool",)
+)
+STEPS = registry.counter("ai_ops_steps_total", "Executor steps by tool and status", ("tool", "status"))
+STEPS_IN_FLIGHT = registry.gauge("ai_ops_steps_in_flight", "Executor steps currently running", ("tool",))
+TOOL_CACHE_RESULTS = registry.counter(
+    "ai_ops_tool_cache_results_total", "Tool calls by cache outcome", ("tool", "cache_status")
+)
+TOOL_ERRORS = registry.counter("ai_ops_tool_errors_total", "Failed tool calls by error type", ("tool", "type"))
+
+SYNTHESES = registry.counter("ai_ops_syntheses_total", "Verifier responses by synthesis mode", ("mode",))
+
+LLM_DURATION = registry.histogram("ai_ops_llm_request_duration_seconds", "Gemini request latency", ("agent",))
+LLM_IN_FLIGHT = registry.gauge("ai_ops_llm_requests_in_flight", "Gemini requests in flight", ("agent",))
+LLM_ERRORS = registry.counter("ai_ops_llm_errors_total", "Failed Gemini requests by error type", ("agent", "type"))
+LLM_JSON_FAILURES = registry.counter(
+    "ai_ops_llm_json_parse_failures_total", "generate_json responses that could not be parsed", ("agent",)
+)
+LLM_JSON_RESULTS = registry.counter(
+    "ai_ops_llm_json_results_total",
+    "generate_json outcomes: clean, repaired locally, recovered by a re-ask, or failed", ("agent", "outcome")
+)
+PROMPT_TOKENS = registry.counter(
+    "ai_ops_prompt_data_tokens_total", "Estimated tokens of tool data in prompts, before and after compaction",
+    ("agent", "kind")
+)
+LLM_CACHE_RESULTS = registry.counter(
+    "ai_ops_llm_cache_results_total", "LLM response cache lookups by outcome", ("agent", "result")
+)
+RATE_LIMIT_WAIT = registry.histogram(
+    "ai_ops_rate_limit_wait_seconds", "Time calls spent queued by the per-upstream rate limiter", ("upstream",)
+)
+RATE_LIMIT_THROTTLED = registry.counter(
+    "ai_ops_rate_limit_events_total", "Throttled (429) responses and calls rejected after queueing too long",
+    ("upstream", "outcome")
+)
+CIRCUIT_STATE = registry.gauge(
+    "ai_ops_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)", ("upstream",)
+)
+CIRCUIT_TRANSITIONS = registry.counter(
+    "ai_ops_circuit_transitions_total", "Circuit breaker state changes", ("upstream", "state")
+)
+HEDGES = registry.counter(
+    "ai_ops_hedged_requests_total", "Hedged duplicate requests by which attempt answered first",
+    ("upstream", "winner")
+)
@@ -0,0 +1,16 @@
+"""
+Resilience module - Protecting upstream APIs and the pipeline from each other
+"""
+from .rate_limit import (
+    RateLimitExceeded, TokenBucket, SqliteTokenBucket, AimdLimiter, UpstreamLimiter,
+    RateLimiterRegistry, rate_limits, queue_timer, add_queue_time, parse_retry_after
+)
+from .circuit_breaker import CircuitOpenError, CircuitBreaker, CircuitBreakerRegistry, circuit_breakers
+from .hedging import LatencyTracker, Hedger, HedgerRegistry, hedgers
+
+__all__ = [
+    "RateLimitExceeded", "TokenBucket", "SqliteTokenBucket", "AimdLimiter", "UpstreamLimiter",
+    "RateLimiterRegistry", "rate_limits", "queue_timer", "add_queue_time", "parse_retry_after",
+    "CircuitOpenError", "CircuitBreaker", "CircuitBreakerRegistry", "circuit_breakers",
+    "LatencyTracker", "Hedger", "HedgerRegistry", "hedgers"
+]
@@ -0,0 +1,227 @@
+"""
+Circuit Breaker - Fail fast while an upstream is down, probe until it recovers
+"""
+import time
+import asyncio
+import threading
+
+from config import settings
+from metrics import classify_error, registry, CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Errors that say nothing about the upstream's health
+NEUTRAL_ERRORS = ("unauthorized", "rate_limited")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Circuit open for {upstream}; retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker (closed -> open -> half-open -> closed)
+
+    Closed: calls go through; failure_threshold consecutive failures open
+    the circuit. Open: calls fail immediately with CircuitOpenError for
+    reset_timeout seconds. Half-open: up to half_open_probes calls go
+    through as probes; a failed probe opens the circuit again, and once
+    half_open_probes probes succeed it closes.
+
+    Failures are exceptions (timeouts, connection errors, 5xx) and results
+    the caller's classify marks as failed; 401/403 and 429 are neutral, as
+    they don't mean the upstream is down.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_probes: int = 1):
+        """
+        Args:
+            name: Upstream name used in metrics and errors
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_probes: Probes allowed at once, and successes needed to close
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(STATE_VALUES[CLOSED], upstream=name)
+
+    def _transition(self, state: str):
+        """Change state; caller holds the lock"""
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.stats["opened"] += 1
+        self._failures = 0
+        self._probes = 0
+        self._probe_successes = 0
+        CIRCUIT_STATE.set(STATE_VALUES[state], upstream=self.name)
+        CIRCUIT_TRANSITIONS.inc(upstream=self.name, state=state)
+
+    def acquire(self) -> bool:
+        """
+        Admit one call
+
+        Returns:
+            True if the call is a half-open probe
+
+        Raises:
+            CircuitOpenError: if the circuit is open (or every probe slot is taken)
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probes += 1
+                return True
+            return False
+
+    def release(self, failed, probe: bool):
+        """
+        Report the outcome of an admitted call
+
+        Args:
+            failed: True for a failure, False for a success, None for neutral
+            probe: The value acquire() returned for this call
+        """
+        with self._lock:
+            if failed:
+                self.stats["failures"] += 1
+            if probe:
+                if self.state != HALF_OPEN:
+                    return
+                self._probes -= 1
+                if failed:
+                    self._transition(OPEN)
+                elif failed is False:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._transition(CLOSED)
+                return
+            if self.state != CLOSED:
+                return
+            if failed:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._transition(OPEN)
+            elif failed is False:
+                self._failures = 0
+
+    @staticmethod
+    def _error_failed(error: Exception):
+        return None if classify_error(error) in NEUTRAL_ERRORS else True
+
+    async def call_async(self, call, classify):
+        """
+        Run call() through the breaker
+
+        Args:
+            call: Coroutine function performing the request
+            classify: Maps call()'s result to True (failed), False (ok) or None (neutral)
+        """
+        probe = self.acquire()
+        try:
+            outcome = await call()
+        except asyncio.CancelledError:
+            self.release(None, probe)
+            raise
+        except Exception as e:
+            self.release(self._error_failed(e), probe)
+            raise
+        self.release(classify(outcome), probe)
+        return outcome
+
+    def call(self, call, classify):
+        """Synchronous variant of call_async"""
+        probe = self.acquire()
+        try:
+            outcome = call()
+        except Exception as e:
+            self.release(self._error_failed(e), probe)
+            raise
+        self.release(classify(outcome), probe)
+        return outcome
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["state"] = self.state
+            stats["consecutive_failures"] = self._failures
+        return stats
+
+
+class CircuitBreakerRegistry:
+    """
+    One CircuitBreaker per upstream name, configured from the environment
+
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT and
+    CIRCUIT_HALF_OPEN_PROBES apply to every upstream.
+    """
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("CIRCUIT_BREAKER_ENABLED", True)
+        self.enabled = enabled
+        self.failure_threshold = settings.get_int("CIRCUIT_FAILURE_THRESHOLD", 5)
+        self.reset_timeout = settings.get_float("CIRCUIT_RESET_TIMEOUT", 30.0)
+        self.half_open_probes = settings.get_int("CIRCUIT_HALF_OPEN_PROBES", 1)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Breaker for an upstream, or None when circuit breaking is disabled"""
+        if not self.enabled:
+            return None
+        breaker = self._breakers.get(name)
+        if breaker is not None:
+            return breaker
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout=self.reset_timeout,
+                    half_open_probes=self.half_open_probes
+                )
+                registry.register_stats(f"ai_ops_circuit_{name}", breaker.get_stats)
+            return breaker
+
+    def reset(self):
+        """Drop every breaker; the next get() starts closed"""
+        with self._lock:
+            self._breakers.clear()
+
+    def get_stats(self) -> dict:
+        return {name: breaker.get_stats() for name, breaker in list(self._breakers.items())}
+
+
+# Shared registry used by the HTTP client and the Gemini client
+circuit_breakers = CircuitBreakerRegistry()
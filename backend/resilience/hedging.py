@@ -0,0 +1,241 @@
+"""
+Hedging - Duplicate slow requests after a p95-derived delay, keep the first answer
+"""
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import settings
+from metrics import registry, HEDGES
+
+
+# Latencies are re-sorted for the quantile once per this many samples
+RECOMPUTE_EVERY = 16
+
+
+class LatencyTracker:
+    """Rolling window of recent request latencies with a cached quantile"""
+
+    def __init__(self, quantile: float = 0.95, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            quantile: Quantile reported by value(), e.g. 0.95
+            window: Latest samples kept
+            min_samples: Samples needed before value() reports anything
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._since_recompute = 0
+        self._value = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_recompute += 1
+            if len(self._samples) >= self.min_samples and (
+                    self._value is None or self._since_recompute >= RECOMPUTE_EVERY):
+                ordered = sorted(self._samples)
+                self._value = ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+                self._since_recompute = 0
+
+    def value(self):
+        """Latency quantile in seconds, or None until min_samples were recorded"""
+        return self._value
+
+
+class Hedger:
+    """
+    Hedged requests for one upstream ("The Tail at Scale")
+
+    A call that hasn't answered after the upstream's recent p95 latency
+    gets a duplicate; whichever attempt answers first wins and the other is
+    cancelled (async) or left to finish unobserved (threads). An attempt
+    that fails while the other is still running doesn't fail the call.
+
+    Hedges are capped at max_ratio of calls, so an upstream that is slow
+    across the board isn't sent twice the traffic, and nothing is hedged
+    until the tracker has enough samples. Only use for idempotent requests.
+    """
+
+    def __init__(self, name: str, quantile: float = 0.95, min_delay: float = 0.05, max_ratio: float = 0.1,
+                 window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            name: Upstream name used in metrics
+            quantile: Latency quantile after which a call is hedged
+            min_delay: Floor of the hedge delay in seconds
+            max_ratio: Max hedged calls as a fraction of all calls
+            window: Latencies kept to derive the delay
+            min_samples: Latencies needed before hedging starts
+        """
+        self.name = name
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.latencies = LatencyTracker(quantile, window, min_samples)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def delay(self):
+        """Seconds to wait before hedging the next call, or None to not hedge it"""
+        quantile = self.latencies.value()
+        if quantile is None:
+            return None
+        return max(self.min_delay, quantile)
+
+    def _claim_hedge(self) -> bool:
+        with self._lock:
+            if self.stats["hedged"] + 1 > self.max_ratio * self.stats["calls"]:
+                return False
+            self.stats["hedged"] += 1
+            return True
+
+    def _count_call(self):
+        with self._lock:
+            self.stats["calls"] += 1
+
+    def _won(self, attempt: str, elapsed: float):
+        self.latencies.record(elapsed)
+        HEDGES.inc(upstream=self.name, winner=attempt)
+        if attempt == "hedge":
+            with self._lock:
+                self.stats["hedge_wins"] += 1
+
+    async def call_async(self, call):
+        """
+        Run call(), hedged when it is slow
+
+        Args:
+            call: Coroutine function performing one attempt of the request
+        """
+        self._count_call()
+        delay = self.delay()
+        started = time.monotonic()
+        if delay is None:
+            outcome = await call()
+            self.latencies.record(time.monotonic() - started)
+            return outcome
+
+        primary = asyncio.ensure_future(call())
+        attempts = {primary: ("primary", started)}
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and self._claim_hedge():
+                hedge = asyncio.ensure_future(call())
+                attempts[hedge] = ("hedge", time.monotonic())
+                pending.add(hedge)
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        attempt, attempt_started = attempts[task]
+                        if len(attempts) > 1:
+                            self._won(attempt, time.monotonic() - attempt_started)
+                        else:
+                            self.latencies.record(time.monotonic() - attempt_started)
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _submit(self, call):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix=f"hedge-{self.name}")
+        # Each attempt runs in a copy of the caller's context (cassette task id, queue timer)
+        return self._pool.submit(contextvars.copy_context().run, call)
+
+    def call(self, call):
+        """Synchronous variant of call_async; attempts run on a small thread pool"""
+        self._count_call()
+        delay = self.delay()
+        started = time.monotonic()
+        if delay is None:
+            outcome = call()
+            self.latencies.record(time.monotonic() - started)
+            return outcome
+
+        primary = self._submit(call)
+        attempts = {primary: ("primary", started)}
+        done, pending = wait([primary], timeout=delay)
+        if not done and self._claim_hedge():
+            hedge = self._submit(call)
+            attempts[hedge] = ("hedge", time.monotonic())
+            pending.add(hedge)
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    attempt, attempt_started = attempts[future]
+                    if len(attempts) > 1:
+                        self._won(attempt, time.monotonic() - attempt_started)
+                    else:
+                        self.latencies.record(time.monotonic() - attempt_started)
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        delay = self.delay()
+        stats["delay_ms"] = round(delay * 1000, 2) if delay is not None else None
+        return stats
+
+
+class HedgerRegistry:
+    """
+    One Hedger per upstream name, configured from the environment
+
+    HEDGE_QUANTILE, HEDGE_MIN_DELAY_MS and HEDGE_MAX_RATIO apply to every
+    upstream; HEDGE_<NAME>=false turns hedging off for one of them.
+    """
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("HEDGING_ENABLED", True)
+        self.enabled = enabled
+        self.quantile = settings.get_float("HEDGE_QUANTILE", 0.95)
+        self.min_delay = settings.get_float("HEDGE_MIN_DELAY_MS", 50.0) / 1000
+        self.max_ratio = settings.get_float("HEDGE_MAX_RATIO", 0.1)
+        self._hedgers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Hedger for an upstream, or None when hedging is disabled for it"""
+        if not self.enabled:
+            return None
+        if name in self._hedgers:
+            return self._hedgers[name]
+        with self._lock:
+            if name not in self._hedgers:
+                hedger = None
+                if settings.get_bool(f"HEDGE_{name.upper()}", True):
+                    hedger = Hedger(name, quantile=self.quantile, min_delay=self.min_delay, max_ratio=self.max_ratio)
+                    registry.register_stats(f"ai_ops_hedging_{name}", hedger.get_stats)
+                self._hedgers[name] = hedger
+            return self._hedgers[name]
+
+    def reset(self):
+        """Drop every hedger and its latency history"""
+        with self._lock:
+            self._hedgers.clear()
+
+    def get_stats(self) -> dict:
+        return {name: hedger.get_stats() for name, hedger in list(self._hedgers.items()) if hedger is not None}
+
+
+# Shared registry used by the HTTP client and the Gemini client
+hedgers = HedgerRegistry()
@@ -0,0 +1,545 @@
+"""
+Rate Limit - Per-upstream token buckets with AIMD concurrency control
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from email.utils import parsedate_to_datetime
+
+from config import settings
+from metrics import classify_error, registry, RATE_LIMIT_WAIT, RATE_LIMIT_THROTTLED
+
+
+# Congestion signals closer together than this count as one (a burst of 429s halves the limit once)
+AIMD_COOLDOWN_S = 1.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to queue longer than the limiter's max wait"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {upstream}; retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date); None if absent or invalid"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class QueueTimer:
+    """Milliseconds spent waiting on rate limiters by the calls of one step"""
+
+    def __init__(self):
+        self.ms = 0.0
+
+    def add(self, ms: float):
+        self.ms += ms
+
+
+_current_timer = contextvars.ContextVar("rate_limit_queue_timer", default=None)
+
+
+@contextmanager
+def queue_timer():
+    """Collect limiter queue time of every call made in the block (and tasks it starts)"""
+    timer = QueueTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+def add_queue_time(ms: float):
+    """Count queue time measured elsewhere (e.g. by a shared call) towards the current queue_timer()"""
+    timer = _current_timer.get()
+    if timer is not None and ms:
+        timer.add(ms)
+
+
+class TokenBucket:
+    """
+    In-process token bucket
+
+    reserve() takes a token immediately and returns how long the caller
+    must wait for it; tokens may go negative, so concurrent callers are
+    scheduled one after another instead of all retrying at once.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (requests allowed back to back)
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float:
+        """Take a token; returns the wait in seconds, or -1 (nothing taken) if it exceeds max_wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0)
+            if wait > max_wait:
+                return -1
+            self._tokens -= 1
+            return wait
+
+    def pause(self, seconds: float):
+        """Hold every caller for seconds (upstream asked us to back off)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    async def reserve_async(self, max_wait: float) -> float:
+        return self.reserve(max_wait)
+
+    async def pause_async(self, seconds: float):
+        self.pause(seconds)
+
+
+class SqliteTokenBucket:
+    """
+    Token bucket whose state lives in SQLite, shared by every process using the file
+
+    Same contract as TokenBucket. Each reservation is one short IMMEDIATE
+    transaction, so processes serialize on the database lock only. The
+    async variants run the transaction in a worker thread, so waiting on
+    that lock (up to the 5s busy timeout) never blocks the event loop.
+    """
+
+    def __init__(self, path: str, name: str, rate: float, burst: float):
+        self.path = path
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL, updated REAL, blocked_until REAL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO buckets VALUES (?, ?, ?, 0)", (name, burst, time.time())
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _update(self, change) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated, blocked_until = conn.execute(
+                "SELECT tokens, updated, blocked_until FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            tokens, blocked_until, outcome = change(now, tokens, blocked_until)
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated = ?, blocked_until = ? WHERE name = ?",
+                (tokens, now, blocked_until, self.name)
+            )
+            conn.execute("COMMIT")
+            return outcome
+        except Exception:
+            # BEGIN itself fails when the lock wait times out; keep that error
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reserve(self, max_wait: float) -> float:
+        def change(now, tokens, blocked_until):
+            wait = max(blocked_until - now, (1 - tokens) / self.rate if tokens < 1 else 0.0)
+            if wait > max_wait:
+                return tokens, blocked_until, -1
+            return tokens - 1, blocked_until, wait
+        return self._update(change)
+
+    def pause(self, seconds: float):
+        self._update(lambda now, tokens, blocked_until: (tokens, max(blocked_until, now + seconds), None))
+
+    async def reserve_async(self, max_wait: float) -> float:
+        return await asyncio.to_thread(self.reserve, max_wait)
+
+    async def pause_async(self, seconds: float):
+        await asyncio.to_thread(self.pause, seconds)
+
+
+class AimdLimiter:
+    """
+    Concurrency limit that adapts to the upstream (additive increase, multiplicative decrease)
+
+    Every success raises the limit by 1/limit (about +1 per round of
+    requests); a 429 or timeout halves it, at most once per AIMD_COOLDOWN_S.
+    Waiters are concurrent.futures.Future objects, so threads and any event
+    loop can share one limiter.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters = deque()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self):
+        """Take a slot now, or return a Future that resolves when one is handed over"""
+        with self._lock:
+            if self.in_flight < int(self.limit) and not self._waiters:
+                self.in_flight += 1
+                return None
+            waiter = Future()
+            self._waiters.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter: Future):
+        """A waiter gave up; if a slot was handed over meanwhile, give it back"""
+        with self._lock:
+            if waiter.cancel():
+                self._waiters.remove(waiter)
+                return
+        self.release(congested=None)
+
+    def acquire(self, timeout: float) -> bool:
+        waiter = self._try_acquire()
+        if waiter is None:
+            return True
+        try:
+            waiter.result(timeout=timeout)
+            return True
+        except FutureTimeout:
+            self._abandon(waiter)
+            return False
+
+    async def acquire_async(self, timeout: float) -> bool:
+        waiter = self._try_acquire()
+        if waiter is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(waiter)), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self, congested):
+        """
+        Free a slot and adapt the limit
+
+        Args:
+            congested: True for a 429/timeout, False for a normal outcome,
+                None to free the slot without adapting
+        """
+        with self._lock:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= AIMD_COOLDOWN_S:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+            elif congested is False:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            while self._waiters and self.in_flight < int(self.limit):
+                waiter = self._waiters.popleft()
+                if waiter.set_running_or_notify_cancel():
+                    self.in_flight += 1
+                    waiter.set_result(True)
+
+
+class UpstreamLimiter:
+    """
+    Rate limiter for one upstream API, shared by every task in the process
+
+    A call first takes a token from the bucket (if a quota is configured),
+    then a slot from the AIMD concurrency limit. Throttled responses (429)
+    and timeouts shrink the limit; a Retry-After (or exponential backoff
+    without one) holds every call to the upstream, and the throttled call
+    is retried after it. Calls queue for at most max_wait seconds in
+    total; beyond that RateLimitExceeded is raised, or the last throttled
+    response is returned as is. Queue time is added to the current
+    queue_timer() and to the wait histogram.
+    """
+
+    def __init__(self, name: str, bucket=None, max_concurrency: int = 16, max_wait: float = 10.0,
+                 retries: int = 5, backoff: float = 1.0):
+        """
+        Args:
+            name: Upstream name used in metrics and errors
+            bucket: Optional TokenBucket or SqliteTokenBucket enforcing a quota
+            max_concurrency: Ceiling of the AIMD concurrency limit
+            max_wait: Max seconds one call may spend queued, across retries
+            retries: Max retries of a throttled call
+            backoff: Seconds to back off after a 429 without Retry-After (doubles per retry)
+        """
+        self.name = name
+        self.bucket = bucket
+        self.aimd = AimdLimiter(max_concurrency)
+        self.max_wait = max_wait
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {"calls": 0, "queued": 0, "throttled": 0, "retries": 0, "rejected": 0, "queue_ms": 0.0}
+        # Retry-After pause when there is no bucket to hold it
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _record_wait(self, waited: float):
+        with self._lock:
+            self.stats["queue_ms"] += waited * 1000
+            if waited > 0.0005:
+                self.stats["queued"] += 1
+        add_queue_time(waited * 1000)
+        RATE_LIMIT_WAIT.observe(waited, upstream=self.name)
+
+    def _reject(self, retry_after: float):
+        with self._lock:
+            self.stats["rejected"] += 1
+        RATE_LIMIT_THROTTLED.inc(upstream=self.name, outcome="rejected")
+        raise RateLimitExceeded(self.name, retry_after)
+
+    def _backoff_delay(self, attempt: int, retry_after: float) -> float:
+        with self._lock:
+            self.stats["throttled"] += 1
+        RATE_LIMIT_THROTTLED.inc(upstream=self.name, outcome="throttled")
+        return retry_after if retry_after is not None else self.backoff * (2 ** attempt)
+
+    def _block(self, delay: float):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def _backoff(self, attempt: int, retry_after: float) -> float:
+        delay = self._backoff_delay(attempt, retry_after)
+        # Every caller of this upstream holds off, not just the retry
+        if self.bucket is not None:
+            self.bucket.pause(delay)
+        else:
+            self._block(delay)
+        return delay
+
+    async def _backoff_async(self, attempt: int, retry_after: float) -> float:
+        delay = self._backoff_delay(attempt, retry_after)
+        if self.bucket is not None:
+            await self.bucket.pause_async(delay)
+        else:
+            self._block(delay)
+        return delay
+
+    def _can_retry(self, attempt: int, budget: float, delay: float) -> bool:
+        if attempt >= self.retries or delay > budget:
+            return False
+        with self._lock:
+            self.stats["retries"] += 1
+        return True
+
+    def _reserve(self, budget: float) -> float:
+        """Wait before one call may start (quota and Retry-After); rejects when it exceeds the budget"""
+        if self.bucket is not None:
+            wait = self.bucket.reserve(budget)
+        else:
+            wait = max(0.0, self._blocked_until - time.monotonic())
+        return self._admit(wait, budget)
+
+    async def _reserve_async(self, budget: float) -> float:
+        if self.bucket is not None:
+            wait = await self.bucket.reserve_async(budget)
+        else:
+            wait = max(0.0, self._blocked_until - time.monotonic())
+        return self._admit(wait, budget)
+
+    def _admit(self, wait: float, budget: float) -> float:
+        if wait < 0 or wait > budget:
+            self._reject(max(wait, budget))
+        return wait
+
+    async def call_async(self, call, classify):
+        """
+        Run call() under the limiter
+
+        Args:
+            call: Coroutine function performing the request
+            classify: Maps call()'s result to (throttled, retry_after_seconds)
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+        deadline = time.monotonic() + self.max_wait
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            wait = await self._reserve_async(deadline - started)
+            if wait:
+                await asyncio.sleep(wait)
+            if not await self.aimd.acquire_async(max(0.0, deadline - time.monotonic())):
+                self._record_wait(time.monotonic() - started)
+                self._reject(1.0)
+            self._record_wait(time.monotonic() - started)
+
+            try:
+                outcome = await call()
+            except asyncio.CancelledError:
+                # e.g. the losing attempt of a hedged request
+                self.aimd.release(congested=None)
+                raise
+            except Exception as e:
+                self.aimd.release(congested=classify_error(e) in ("rate_limited", "timeout"))
+                if classify_error(e) != "rate_limited":
+                    raise
+                delay = await self._backoff_async(attempt, None)
+                if not self._can_retry(attempt, deadline - time.monotonic(), delay):
+                    raise
+            else:
+                throttled, retry_after = classify(outcome)
+                self.aimd.release(congested=throttled)
+                if not throttled:
+                    return outcome
+                delay = await self._backoff_async(attempt, retry_after)
+                if not self._can_retry(attempt, deadline - time.monotonic(), delay):
+                    return outcome
+            attempt += 1
+
+    def call(self, call, classify):
+        """Synchronous variant of call_async for thread callers"""
+        with self._lock:
+            self.stats["calls"] += 1
+        deadline = time.monotonic() + self.max_wait
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            wait = self._reserve(deadline - started)
+            if wait:
+                time.sleep(wait)
+            if not self.aimd.acquire(max(0.0, deadline - time.monotonic())):
+                self._record_wait(time.monotonic() - started)
+                self._reject(1.0)
+            self._record_wait(time.monotonic() - started)
+
+            try:
+                outcome = call()
+            except Exception as e:
+                self.aimd.release(congested=classify_error(e) in ("rate_limited", "timeout"))
+                if classify_error(e) != "rate_limited":
+                    raise
+                delay = self._backoff(attempt, None)
+                if not self._can_retry(attempt, deadline - time.monotonic(), delay):
+                    raise
+            else:
+                throttled, retry_after = classify(outcome)
+                self.aimd.release(congested=throttled)
+                if not throttled:
+                    return outcome
+                delay = self._backoff(attempt, retry_after)
+                if not self._can_retry(attempt, deadline - time.monotonic(), delay):
+                    return outcome
+            attempt += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["queue_ms"] = round(stats["queue_ms"], 2)
+        stats["concurrency_limit"] = round(self.aimd.limit, 2)
+        stats["in_flight"] = self.aimd.in_flight
+        return stats
+
+
+def parse_quota(value: str) -> tuple:
+    """"<requests>/<seconds>" -> (rate per second, burst); e.g. "60/60" or "100/86400" """
+    requests, _, seconds = value.partition("/")
+    requests, seconds = float(requests), float(seconds or 1)
+    if requests <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit quota: {value!r}")
+    return requests / seconds, requests
+
+
+class RateLimiterRegistry:
+    """
+    One UpstreamLimiter per upstream name, configured from the environment
+
+    RATE_LIMIT_<NAME> sets a quota ("<requests>/<seconds>"), and
+    RATE_LIMIT_<NAME>_CONCURRENCY the AIMD ceiling. Upstreams without a
+    quota still get AIMD and Retry-After handling. With RATE_LIMIT_DB set,
+    quotas are shared across processes through that SQLite file.
+    """
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("RATE_LIMIT_ENABLED", True)
+        self.enabled = enabled
+        self.max_wait = settings.get_float("RATE_LIMIT_MAX_WAIT", 10.0)
+        self.retries = settings.get_int("RATE_LIMIT_RETRIES", 5)
+        self.db_path = settings.get("RATE_LIMIT_DB") or None
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Limiter for an upstream, or None when rate limiting is disabled"""
+        if not self.enabled:
+            return None
+        limiter = self._limiters.get(name)
+        if limiter is not None:
+            return limiter
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = self._limiters[name] = self._create(name)
+                registry.register_stats(f"ai_ops_rate_limit_{name}", limiter.get_stats)
+            return limiter
+
+    def _create(self, name: str) -> UpstreamLimiter:
+        bucket = None
+        quota = settings.get(f"RATE_LIMIT_{name.upper()}")
+        if quota:
+            rate, burst = parse_quota(quota)
+            if self.db_path:
+                bucket = SqliteTokenBucket(self.db_path, name, rate, burst)
+            else:
+                bucket = TokenBucket(rate, burst)
+        return UpstreamLimiter(
+            name,
+            bucket=bucket,
+            max_concurrency=settings.get_int(f"RATE_LIMIT_{name.upper()}_CONCURRENCY", 16),
+            max_wait=self.max_wait,
+            retries=self.retries
+        )
+
+    def reset(self):
+        """Drop every limiter; the next get() builds it again from the current environment"""
+        with self._lock:
+            self._limiters.clear()
+
+    def get_stats(self) -> dict:
+        return {name: limiter.get_stats() for name, limiter in list(self._limiters.items())}
+
+
+# Shared registry used by the HTTP client and the Gemini client
+rate_limits = RateLimiterRegistry()
@@ -1,23 +1,29 @@
-from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
+import json
+import asyncio
 import logging
-from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import List, Union
 import uuid
 from datetime import datetime, timezone
 
+from config import settings
+from main import assistant
+from task_queue import TaskQueue, QueueFullError
+from batch import BatchRunner, parse_batch_items
+from metrics import registry
+from tools import http_client
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+
+settings.load()
 
 # MongoDB connection
-mongo_url = os.environ['MONGO_URL']
+mongo_url = settings.require('MONGO_URL')
 client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+db = client[settings.require('DB_NAME')]
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -25,6 +31,13 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Bounded queue feeding a fixed pool of pipeline workers
+task_queue = TaskQueue(assistant.process_task_async)
+TASK_WAIT_TIMEOUT = settings.get_float("TASK_WAIT_TIMEOUT", 120.0)
+BATCH_MAX_TASKS = settings.get_int("BATCH_MAX_TASKS", 100)
+BATCH_MAX_CONCURRENCY = settings.get_int("BATCH_MAX_CONCURRENCY", 16)
+registry.register_stats("ai_ops_task_queue", task_queue.get_stats)
+
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -37,6 +50,12 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class TaskCreate(BaseModel):
+    task: str = Field(min_length=1, max_length=2000)
+
+class BatchCreate(BaseModel):
+    tasks: List[Union[str, dict]] = Field(min_length=1, max_length=BATCH_MAX_TASKS)
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -66,13 +85,135 @@ async def get_status_checks():
     
     return status_checks
 
+def _submit(task: str, handler=None, weight: int = 1):
+    try:
+        return task_queue.submit(task, handler, weight)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+_END = object()
+
+def _submit_streaming(task: str, source, weight: int = 1):
+    """
+    Queue a job that runs the async generator source() on a task worker
+
+    The job goes through the same admission check as every other task (429
+    when the queue is full); its items are relayed to the returned async
+    generator as the worker produces them, and the last one is the job's result.
+    """
+    items = asyncio.Queue()
+
+    async def handler(_task):
+        last = None
+        try:
+            async for item in source():
+                last = item
+                items.put_nowait(item)
+        finally:
+            items.put_nowait(_END)
+        return last
+
+    _submit(task, handler, weight)
+
+    async def relay():
+        while (item := await items.get()) is not _END:
+            yield item
+
+    return relay()
+
+@api_router.get("/tasks/stream")
+async def stream_task(task: str = Query(..., min_length=1, max_length=2000)):
+    """Run a task on a queue worker, streaming stage events as server-sent events"""
+    events = _submit_streaming(task, lambda: assistant.process_task_events(task))
+
+    async def event_source():
+        async for event in events:
+            yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _job_response(job, response: Response) -> dict:
+    body = job.to_dict()
+    timings = body["timings"]
+    if timings["service_ms"] is not None:
+        response.headers["Server-Timing"] = (
+            f"queue;dur={timings['queue_wait_ms']}, service;dur={timings['service_ms']}"
+        )
+    return body
+
+@api_router.post("/tasks")
+async def run_task(input: TaskCreate, response: Response):
+    """Run a task and wait for its result (202 with a job id if it outlasts TASK_WAIT_TIMEOUT)"""
+    job = _submit(input.task)
+    try:
+        await asyncio.wait_for(job.done.wait(), timeout=TASK_WAIT_TIMEOUT)
+    except asyncio.TimeoutError:
+        response.status_code = 202
+        response.headers["Location"] = f"/api/tasks/{job.id}"
+    return _job_response(job, response)
+
+@api_router.post("/tasks/async", status_code=202)
+async def submit_task(input: TaskCreate, response: Response):
+    """Queue a task and return immediately; poll GET /api/tasks/{job_id} for the result"""
+    job = _submit(input.task)
+    response.headers["Location"] = f"/api/tasks/{job.id}"
+    return _job_response(job, response)
+
+@api_router.post("/tasks/batch")
+async def run_batch(input: BatchCreate):
+    """Run up to BATCH_MAX_TASKS tasks with shared tool calls, streaming JSONL results in completion order"""
+    try:
+        tasks = parse_batch_items(input.tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Runs on one worker but never more pipelines at once than the pool has workers
+    runner = BatchRunner(assistant, max_concurrency=min(BATCH_MAX_CONCURRENCY, task_queue.workers))
+
+    async def records():
+        async for record in runner.run(tasks):
+            yield record
+        yield {"summary": runner.stats}
+
+    # One queue job that counts as len(tasks) tasks for admission and Retry-After
+    batch = _submit_streaming(f"batch of {len(tasks)} tasks", records, weight=len(tasks))
+
+    async def lines():
+        async for record in batch:
+            yield json.dumps(record, default=str) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@api_router.get("/tasks/queue")
+async def get_queue_stats():
+    return task_queue.get_stats()
+
+@api_router.get("/tasks/{job_id}")
+async def get_task(job_id: str, response: Response):
+    job = task_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return _job_response(job, response)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_origins=settings.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
 )
@@ -84,6 +225,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_task_queue():
+    task_queue.start()
+
+@app.on_event("shutdown")
+async def stop_task_queue():
+    await task_queue.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await http_client.aclose()
\ No newline at end of file
@@ -4,18 +4,101 @@ Beautiful UI for the multi-agent AI assistant
 """
 import sys
 import os
-import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Add backend to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import streamlit as st
-from dotenv import load_dotenv
-load_dotenv()
 
+from config import settings
 from main import AIOperationsAssistant
 from tools import TOOL_DESCRIPTIONS
 
+# Finished tasks kept per browser session, as compact summaries
+HISTORY_SIZE = settings.get_int("STREAMLIT_HISTORY_SIZE", 20)
+# Seconds between progress refreshes of a running task
+POLL_INTERVAL = settings.get_float("STREAMLIT_POLL_INTERVAL", 0.5)
+ANSWER_PREVIEW_CHARS = 300
+
+
+@st.cache_resource
+def get_assistant() -> AIOperationsAssistant:
+    """One assistant per server process, shared by every browser session"""
+    return AIOperationsAssistant()
+
+
+@st.cache_resource
+def get_task_pool() -> ThreadPoolExecutor:
+    """Worker threads running pipelines outside the script runs; extra tasks queue here"""
+    return ThreadPoolExecutor(
+        max_workers=settings.get_int("STREAMLIT_WORKERS", 8), thread_name_prefix="streamlit-task"
+    )
+
+
+class BackgroundTask:
+    """
+    One pipeline run on the shared task pool
+
+    The worker appends stage events as they arrive and script reruns read
+    them, so a rerun never waits for the pipeline. A list append is atomic,
+    which is all the synchronization a single writer needs.
+    """
+
+    def __init__(self, task: str):
+        self.task = task
+        self.events = []
+        self.result = None
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        self.future = None
+
+    def start(self, assistant: AIOperationsAssistant, pool: ThreadPoolExecutor):
+        self.future = pool.submit(self._run, assistant)
+
+    def _run(self, assistant: AIOperationsAssistant):
+        try:
+            for event in assistant.iter_task_events(self.task):
+                if event["event"] == "result":
+                    self.result = event["result"]
+                elif event["event"] == "error":
+                    self.result = self._error_result(event["error"])
+                self.events.append(event)
+        except Exception as e:
+            self.result = self._error_result(str(e))
+        finally:
+            self.duration_ms = round((time.perf_counter() - self.started) * 1000, 2)
+
+    def _error_result(self, error: str) -> dict:
+        return {
+            "user_task": self.task,
+            "stages": {},
+            "final_answer": f"Task failed: {error}",
+            "status": "error",
+            "error": error
+        }
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+def summarize(job: BackgroundTask) -> dict:
+    """Compact history entry for a finished task; the full result is only kept for the latest one"""
+    result = job.result or {}
+    steps = result.get("stages", {}).get("execution", {}).get("results", {}).get("steps", [])
+    return {
+        "task": job.task,
+        "status": result.get("status", "error"),
+        "answer": (result.get("final_answer") or result.get("error") or "")[:ANSWER_PREVIEW_CHARS],
+        "steps": len(steps),
+        "failed_steps": sum(step.get("status") != "success" for step in steps),
+        "tools": sorted({step["tool_used"] for step in steps if step.get("tool_used")}),
+        "duration_ms": job.duration_ms
+    }
+
 # Page configuration
 st.set_page_config(
     page_title="AI Operations Assistant",
@@ -164,12 +247,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if "assistant" not in st.session_state:
-    st.session_state.assistant = AIOperationsAssistant()
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = deque(maxlen=HISTORY_SIZE)
 if "current_result" not in st.session_state:
     st.session_state.current_result = None
+if "job" not in st.session_state:
+    st.session_state.job = None
 
 # Sidebar
 with st.sidebar:
@@ -225,14 +308,61 @@ with col1:
         label_visibility="collapsed"
     )
 with col2:
-    process_btn = st.button("🚀 Process", use_container_width=True, type="primary")
+    process_btn = st.button(
+        "🚀 Process", use_container_width=True, type="primary",
+        disabled=st.session_state.job is not None
+    )
+
+STAGE_LABELS = {
+    "planning": "📊 Planning...",
+    "execution": "⚡ Executing steps...",
+    "verification": "✔️ Verifying and synthesizing..."
+}
 
-# Process task
-if process_btn and task:
-    with st.spinner("🔄 Processing through multi-agent pipeline..."):
-        result = st.session_state.assistant.process_task(task)
-        st.session_state.current_result = result
-        st.session_state.history.append({"task": task, "result": result})
+
+@st.fragment(run_every=POLL_INTERVAL)
+def show_progress():
+    """Redraw the running task's progress from its events; rerun the page once it finishes"""
+    job = st.session_state.job
+    if job is None:
+        return
+    if job.done:
+        st.session_state.current_result = job.result
+        st.session_state.history.append(summarize(job))
+        st.session_state.job = None
+        st.rerun()
+
+    events = list(job.events)
+    label = "⏳ Queued, waiting for a free worker..." if not events else "🔄 Processing through multi-agent pipeline..."
+    answer_text = ""
+    with st.status(label, expanded=True) as progress:
+        for event in events:
+            kind = event["event"]
+            if kind == "stage":
+                progress.update(label=STAGE_LABELS.get(event["stage"], event["stage"]))
+            elif kind == "plan_ready":
+                steps = event["plan"].get("steps", [])
+                st.markdown(f"**Plan ready:** {len(steps)} step(s) ({event['plan'].get('plan_source', 'llm')})")
+            elif kind == "step_done":
+                step = event["step"]
+                step_emoji = "✅" if step.get("status") == "success" else "❌"
+                st.markdown(f"{step_emoji} Step {step.get('step_number')}: {step.get('action')}")
+            elif kind == "verifier_token":
+                answer_text += event["text"]
+        if answer_text:
+            st.markdown(answer_text)
+        st.caption(f"Running for {time.perf_counter() - job.started:.1f}s")
+
+
+# Process task on the shared worker pool; the page stays responsive while it runs
+if process_btn and task and st.session_state.job is None:
+    job = BackgroundTask(task)
+    job.start(get_assistant(), get_task_pool())
+    st.session_state.job = job
+    st.rerun()
+
+if st.session_state.job is not None:
+    show_progress()
 
 # Display results
 if st.session_state.current_result:
@@ -250,7 +380,7 @@ if st.session_state.current_result:
         st.markdown(f"""
         <div class="final-answer">
             <h3>🎯 Answer</h3>
-            <p>{result.get('final_answer', 'No answer generated')}</p>
+            <p>{(result.get('final_answer') or 'No answer generated').replace(chr(10), '<br>')}</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -261,6 +391,8 @@ if st.session_state.current_result:
             
             st.markdown("#### 📝 Task Summary")
             st.info(plan.get("task_summary", "N/A"))
+            if plan.get("plan_source") and plan.get("plan_source") != "llm":
+                st.caption(f"⚡ Plan source: {plan.get('plan_source')}")
             
             st.markdown("#### 🔢 Execution Steps")
             for step in plan.get("steps", []):
@@ -274,7 +406,7 @@ if st.session_state.current_result:
                 </div>
                 """, unsafe_allow_html=True)
         else:
-            st.error(f"Planning failed: {planning.get('error', 'Unknown error')}")
+            st.error(f"Planning failed: {planning.get('error') or result.get('error', 'Unknown error')}")
     
     with tab3:
         execution = result.get("stages", {}).get("execution", {})
@@ -292,13 +424,18 @@ if st.session_state.current_result:
                     if step.get("tool_used"):
                         st.markdown(f"**Tool:** `{step.get('tool_used')}`")
                     
+                    if step.get("cache_status") in ("hit", "stale"):
+                        st.caption(f"⚡ Served from cache ({step.get('cache_status')})")
+                    elif step.get("cache_status") == "stale_fallback":
+                        st.caption("⚠️ Upstream unavailable - served last cached result")
+                    
                     if step.get("error"):
                         st.error(step.get("error"))
                     
                     if step.get("output"):
                         st.json(step.get("output"))
         else:
-            st.error(f"Execution failed: {execution.get('error', 'Unknown error')}")
+            st.error(f"Execution failed: {execution.get('error') or result.get('error', 'Unknown error')}")
     
     with tab4:
         verification = result.get("stages", {}).get("verification", {})
@@ -313,6 +450,8 @@ if st.session_state.current_result:
                 <strong>Verification Status:</strong> <span style="color: {status_color};">{v_status.upper()}</span>
             </div>
             """, unsafe_allow_html=True)
+            if verify_data.get("synthesis_mode") == "template":
+                st.caption("⚡ Answer rendered from tool data without an LLM call")
             
             if verify_data.get("issues_found"):
                 st.markdown("#### ⚠️ Issues Found")
@@ -324,7 +463,7 @@ if st.session_state.current_result:
                 for suggestion in verify_data.get("suggestions", []):
                     st.info(suggestion)
         else:
-            st.error(f"Verification failed: {verification.get('error', 'Unknown error')}")
+            st.error(f"Verification failed: {verification.get('error') or result.get('error', 'Unknown error')}")
     
     # Raw JSON view
     with st.expander("🔍 View Raw JSON Response"):
@@ -334,6 +473,11 @@ if st.session_state.current_result:
 if st.session_state.history:
     st.markdown("---")
     st.markdown("### 📜 Recent Tasks")
-    for i, item in enumerate(reversed(st.session_state.history[-5:])):
-        with st.expander(f"Task: {item['task'][:50]}..."):
-            st.markdown(f"**Answer:** {item['result'].get('final_answer', 'N/A')[:200]}...")
+    for item in reversed(st.session_state.history):
+        status_emoji = "✅" if item["status"] == "complete" else "⚠️" if item["status"] == "partial" else "❌"
+        with st.expander(f"{status_emoji} Task: {item['task'][:50]}..."):
+            st.markdown(f"**Answer:** {item['answer'] or 'N/A'}...")
+            st.caption(
+                f"{item['steps']} step(s), {item['failed_steps']} failed · "
+                f"tools: {', '.join(item['tools']) or 'none'} · {item['duration_ms']}ms"
+            )
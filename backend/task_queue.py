@@ -0,0 +1,192 @@
+"""
+Task Queue - Bounded in-process work queue with a fixed pool of pipeline workers
+"""
+import math
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+
+from config import settings
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is saturated; carries a Retry-After estimate in seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Task queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """One submitted task and its timings"""
+
+    def __init__(self, task: str, handler=None, weight: int = 1):
+        self.id = str(uuid.uuid4())
+        self.task = task
+        self.handler = handler
+        self.weight = weight
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        timings = {"queue_wait_ms": None, "service_ms": None, "total_ms": None}
+        if self.started_at is not None:
+            timings["queue_wait_ms"] = round((self.started_at - self.submitted_at) * 1000, 2)
+        if self.finished_at is not None:
+            timings["service_ms"] = round((self.finished_at - self.started_at) * 1000, 2)
+            timings["total_ms"] = round((self.finished_at - self.submitted_at) * 1000, 2)
+        return {
+            "job_id": self.id,
+            "task": self.task,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "timings": timings
+        }
+
+
+class TaskQueue:
+    """
+    Bounded FIFO of pipeline tasks served by a fixed number of workers
+
+    submit() never blocks: when max_size tasks are already waiting for a
+    busy worker pool it raises QueueFullError with a Retry-After estimate
+    derived from the queue depth and the recent average service time. A job
+    that stands for several tasks (a batch) is submitted with a weight and
+    counts as that many tasks until it finishes. Finished jobs are kept (up to
+    max_jobs) so async submitters can poll for their result.
+    """
+
+    def __init__(self, handler, max_size: int = None, workers: int = None, max_jobs: int = None):
+        """
+        Args:
+            handler: Async callable taking the task string and returning the result dict
+            max_size: Max tasks waiting for a worker
+            workers: Number of tasks processed concurrently
+            max_jobs: Max jobs remembered for polling
+        """
+        self.handler = handler
+        self.max_size = max_size or settings.get_int("TASK_QUEUE_MAX_SIZE", 32)
+        self.workers = workers or settings.get_int("TASK_WORKERS", 4)
+        self.max_jobs = max_jobs or settings.get_int("TASK_QUEUE_MAX_JOBS", 1000)
+        self._queue = None
+        self._worker_tasks = []
+        self._jobs = OrderedDict()
+        self._busy = 0
+        self._load = 0
+        self._avg_service_s = None
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def start(self):
+        """Start the workers on the running event loop (idempotent)"""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"task-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self):
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def retry_after(self) -> int:
+        """Seconds until a worker is likely free for one more task"""
+        service_s = self._avg_service_s or 1.0
+        waiting = max(0, self._load - self.workers)
+        return max(1, math.ceil((waiting + 1) * service_s / self.workers))
+
+    def submit(self, task: str, handler=None, weight: int = 1) -> Job:
+        """
+        Enqueue a task
+
+        Args:
+            task: Natural language task from user (or a label for a custom handler)
+            handler: Async callable run for this job instead of the queue's
+                handler, e.g. to stream events or run a batch on a worker
+            weight: Tasks this job stands for; it is admitted only while
+                that many fit in the queue (capped at max_size + workers, so
+                the heaviest jobs wait for an empty queue)
+
+        Returns:
+            Job, queued for the next free worker
+
+        Raises:
+            QueueFullError: the job's weight doesn't fit next to the tasks
+                already queued or running
+        """
+        self.start()
+        # Idle workers take a task straight away, so they add to the capacity
+        capacity = self.max_size + self.workers
+        weight = min(max(1, weight), capacity)
+        if self._load + weight > capacity:
+            self.stats["rejected"] += 1
+            raise QueueFullError(self.retry_after())
+        job = Job(task, handler, weight)
+        self._load += weight
+        self._queue.put_nowait(job)
+        self.stats["submitted"] += 1
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def _evict(self):
+        """Forget the oldest finished jobs once over max_jobs"""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done.is_set()]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                break
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self._busy += 1
+            job.status = "running"
+            job.started_at = time.perf_counter()
+            try:
+                job.result = await (job.handler or self.handler)(job.task)
+                job.status = "done"
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                job.status = "error"
+                job.error = str(e)
+                self.stats["failed"] += 1
+            finally:
+                job.finished_at = time.perf_counter()
+                service_s = job.finished_at - job.started_at
+                self._avg_service_s = service_s if self._avg_service_s is None else (
+                    0.8 * self._avg_service_s + 0.2 * service_s
+                )
+                self._busy -= 1
+                self._load -= job.weight
+                job.done.set()
+                self._queue.task_done()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats.update({
+            "workers": self.workers,
+            "busy": self._busy,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "load": self._load,
+            "max_size": self.max_size,
+            "avg_service_ms": round(self._avg_service_s * 1000, 2) if self._avg_service_s else None
+        })
+        return stats
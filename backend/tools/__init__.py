@@ -1,22 +1,36 @@
 """
 Tools module - API integrations for the AI Operations Assistant
 """
-from .weather_tool import WeatherTool, weather_tool
-from .news_tool import NewsTool, news_tool
+from lazy import lazy_attributes
+from . import weather_tool as _weather, news_tool as _news
+from .weather_tool import WeatherTool
+from .news_tool import NewsTool
+from .http_client import HttpClient, http_client
+from .cache import TieredCache, ToolCache, tool_cache
+from .single_flight import SingleFlight, SingleFlightTool, single_flight
+from .registry import ToolSpec, ToolRegistry, tool_registry
 
-# Tool registry for easy access
-AVAILABLE_TOOLS = {
-    "weather": weather_tool,
-    "news": news_tool
-}
+# Built-in tools; the instances are the module singletons, built on first call
+tool_registry.register(ToolSpec.from_class(WeatherTool, factory=lambda: _weather.weather_tool))
+tool_registry.register(ToolSpec.from_class(NewsTool, factory=lambda: _news.news_tool))
 
-TOOL_DESCRIPTIONS = {
-    "weather": WeatherTool.description,
-    "news": NewsTool.description
-}
+# The tool singletons are built on first access. AVAILABLE_TOOLS is the
+# registry itself ({name: tool}, concurrent identical calls share one
+# request); TOOL_DESCRIPTIONS is a snapshot taken after plugin discovery.
+__getattr__ = lazy_attributes(
+    globals(),
+    weather_tool=lambda: _weather.weather_tool,
+    news_tool=lambda: _news.news_tool,
+    AVAILABLE_TOOLS=lambda: tool_registry,
+    TOOL_DESCRIPTIONS=tool_registry.descriptions
+)
 
 __all__ = [
     "WeatherTool", "weather_tool",
     "NewsTool", "news_tool", 
+    "HttpClient", "http_client",
+    "TieredCache", "ToolCache", "tool_cache",
+    "SingleFlight", "SingleFlightTool", "single_flight",
+    "ToolSpec", "ToolRegistry", "tool_registry",
     "AVAILABLE_TOOLS", "TOOL_DESCRIPTIONS"
 ]
@@ -0,0 +1,373 @@
+"""
+Tool Cache - Tiered (in-memory LRU + SQLite) cache for tool outputs
+"""
+import os
+import copy
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+
+from config import settings
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "tool_cache.sqlite3"
+)
+
+# Expired rows are kept this long on disk (for stale fallbacks), then pruned
+DISK_RETENTION = 86400
+PRUNE_EVERY = 256
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache with TTL and stale-while-revalidate windows
+
+    The memory tier is a size-bounded LRU local to the process. The disk tier
+    is a SQLite database in WAL mode, so every worker process pointed at the
+    same file shares it. Entries are JSON-serializable values; set() stores
+    a copy and get() returns one, so callers can mutate what they hold.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 1024, namespace: str = "default"):
+        self.path = path
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0}
+
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "namespace TEXT, key TEXT, value TEXT, "
+                    "fresh_until REAL, stale_until REAL, "
+                    "PRIMARY KEY (namespace, key))"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer overlap"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, allow_expired: bool = False) -> tuple:
+        """
+        Look up a key
+
+        Args:
+            key: Cache key
+            allow_expired: Also return entries past their stale window
+
+        Returns:
+            (value, state) where state is "fresh", "stale", "expired" or None on a miss
+        """
+        now = time.time()
+        entry = self._recall(key)
+        if self._needs_disk(entry, now):
+            entry = self._load(key, entry)
+        return self._classify(entry, now, allow_expired)
+
+    async def get_async(self, key: str, allow_expired: bool = False) -> tuple:
+        """
+        get() for the event loop: a fresh memory hit returns at once, and a
+        disk lookup runs in a worker thread so a locked database (up to the
+        5s busy timeout) never stalls other coroutines
+        """
+        now = time.time()
+        entry = self._recall(key)
+        if self._needs_disk(entry, now):
+            entry = await asyncio.to_thread(self._load, key, entry)
+        return self._classify(entry, now, allow_expired)
+
+    def peek(self, key: str) -> bool:
+        """True when the memory tier holds a fresh or stale entry; no disk access, no stats"""
+        entry = self._recall(key)
+        return entry is not None and time.time() < entry[2]
+
+    def _recall(self, key: str):
+        """Memory-tier entry for a key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        return entry
+
+    def _needs_disk(self, entry, now: float) -> bool:
+        # Another worker may have refreshed a key our memory tier holds stale
+        return bool(self.path) and (entry is None or now >= entry[1])
+
+    def _load(self, key: str, entry):
+        """Newer of the memory entry and the disk row (blocking)"""
+        try:
+            row = self._connect().execute(
+                "SELECT value, fresh_until, stale_until FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is not None and (entry is None or row[1] > entry[1]):
+            entry = (json.loads(row[0]), row[1], row[2])
+            self._remember(key, entry)
+            with self._lock:
+                self.stats["disk_hits"] += 1
+        return entry
+
+    def _classify(self, entry, now: float, allow_expired: bool) -> tuple:
+        state = None
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                state = "fresh"
+            elif now < stale_until:
+                state = "stale"
+            elif allow_expired:
+                state = "expired"
+
+        with self._lock:
+            if state == "fresh":
+                self.stats["hits"] += 1
+            elif state in ("stale", "expired"):
+                self.stats["stale_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+
+        return (copy.deepcopy(entry[0]), state) if state else (None, None)
+
+    def set(self, key: str, value, ttl: float, stale_ttl: float = 0):
+        """Store a value that is fresh for ttl seconds and servable stale for stale_ttl more"""
+        entry = self._entry(value, ttl, stale_ttl)
+        self._remember(key, entry)
+        if self.path:
+            self._write(key, entry)
+
+    async def set_async(self, key: str, value, ttl: float, stale_ttl: float = 0):
+        """set() for the event loop; the memory tier is updated at once, the disk write in a worker thread"""
+        entry = self._entry(value, ttl, stale_ttl)
+        self._remember(key, entry)
+        if self.path:
+            await asyncio.to_thread(self._write, key, entry)
+
+    @staticmethod
+    def _entry(value, ttl: float, stale_ttl: float) -> tuple:
+        now = time.time()
+        return (copy.deepcopy(value), now + ttl, now + ttl + stale_ttl)
+
+    def _write(self, key: str, entry: tuple):
+        """Persist an entry to the disk tier (blocking)"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(entry[0]), entry[1], entry[2])
+                )
+                with self._lock:
+                    self._writes += 1
+                    prune = self._writes % PRUNE_EVERY == 0
+                if prune:
+                    conn.execute(
+                        "DELETE FROM cache WHERE stale_until < ?", (time.time() - DISK_RETENTION,)
+                    )
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Drop every entry in this namespace from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def _remember(self, key: str, entry: tuple):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+class ToolCache:
+    """
+    Result cache for tool calls, keyed by tool name + normalized input
+
+    Only successful results are stored. A stale entry is served immediately
+    while a single background refresh replaces it (stale-while-revalidate).
+    """
+
+    def __init__(self, store: TieredCache = None, ttls: dict = None, stale_ttl: float = None,
+                 enabled: bool = None):
+        if enabled is None:
+            enabled = settings.get_bool("TOOL_CACHE_ENABLED", True)
+        self.enabled = enabled
+        self.store = store or TieredCache(
+            path=settings.get("TOOL_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+            max_entries=settings.get_int("TOOL_CACHE_MAX_ENTRIES", 1024),
+            namespace="tools"
+        )
+        # Seconds a result stays fresh, per tool; filled from each tool's ToolSpec on registration
+        self.ttls = {}
+        for tool_name, ttl in (ttls or {}).items():
+            self.set_ttl(tool_name, ttl)
+        self.stale_ttl = stale_ttl if stale_ttl is not None else settings.get_float("TOOL_CACHE_STALE_TTL", 300.0)
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._background = set()
+
+    def set_ttl(self, tool_name: str, ttl: float, overridable: bool = True):
+        """
+        Set how long a tool's results stay fresh (0 = not cached)
+
+        Args:
+            tool_name: Registered tool name
+            ttl: Declared TTL in seconds
+            overridable: Let TOOL_CACHE_TTL_<TOOL> replace ttl; False for
+                tools that must never be cached (not idempotent)
+        """
+        if overridable:
+            ttl = settings.get_float(f"TOOL_CACHE_TTL_{tool_name.upper()}", ttl)
+        self.ttls[tool_name] = ttl
+
+    @staticmethod
+    def make_key(tool_name: str, tool_input) -> str:
+        """Cache key: tool name + case/whitespace-normalized input"""
+        normalized = " ".join(str(tool_input or "").lower().split())
+        return f"{tool_name}:{normalized}"
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return self.enabled and self.ttls.get(tool_name, 0) > 0
+
+    def lookup(self, tool_name: str, tool_input, allow_expired: bool = False) -> tuple:
+        """Return (result, state) for a cached tool call, or (None, None)"""
+        if not self.is_cacheable(tool_name):
+            return None, None
+        return self.store.get(self.make_key(tool_name, tool_input), allow_expired=allow_expired)
+
+    async def lookup_async(self, tool_name: str, tool_input, allow_expired: bool = False) -> tuple:
+        """lookup() for the event loop; disk reads run off the loop"""
+        if not self.is_cacheable(tool_name):
+            return None, None
+        return await self.store.get_async(self.make_key(tool_name, tool_input), allow_expired=allow_expired)
+
+    def peek(self, tool_name: str, tool_input) -> bool:
+        """True when the memory tier holds a fresh or stale result; never touches the disk"""
+        return self.is_cacheable(tool_name) and self.store.peek(self.make_key(tool_name, tool_input))
+
+    def store_result(self, tool_name: str, tool_input, result: dict):
+        """Cache a tool result if it succeeded"""
+        if self.is_cacheable(tool_name) and result.get("success"):
+            self.store.set(
+                self.make_key(tool_name, tool_input), result,
+                ttl=self.ttls[tool_name], stale_ttl=self.stale_ttl
+            )
+
+    async def store_result_async(self, tool_name: str, tool_input, result: dict):
+        """store_result() for the event loop; the disk write runs off the loop"""
+        if self.is_cacheable(tool_name) and result.get("success"):
+            await self.store.set_async(
+                self.make_key(tool_name, tool_input), result,
+                ttl=self.ttls[tool_name], stale_ttl=self.stale_ttl
+            )
+
+    async def fetch_async(self, tool_name: str, tool_input, loader) -> tuple:
+        """
+        Return a tool result, from cache when possible
+
+        Args:
+            tool_name: Registered tool name
+            tool_input: Raw tool input
+            loader: Zero-argument coroutine function that calls the tool
+
+        Returns:
+            (result, cache_status) where cache_status is "hit", "stale", "miss" or "bypass"
+        """
+        if not self.is_cacheable(tool_name):
+            return await loader(), "bypass"
+
+        cached, state = await self.lookup_async(tool_name, tool_input)
+        if state == "fresh":
+            return cached, "hit"
+        if state == "stale":
+            key = self.make_key(tool_name, tool_input)
+            if self._claim_refresh(key):
+                task = asyncio.ensure_future(self._refresh_async(key, tool_name, tool_input, loader))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return cached, "stale"
+
+        result = await loader()
+        await self.store_result_async(tool_name, tool_input, result)
+        return result, "miss"
+
+    def fetch(self, tool_name: str, tool_input, loader) -> tuple:
+        """Synchronous counterpart of fetch_async; loader is a plain callable"""
+        if not self.is_cacheable(tool_name):
+            return loader(), "bypass"
+
+        cached, state = self.lookup(tool_name, tool_input)
+        if state == "fresh":
+            return cached, "hit"
+        if state == "stale":
+            key = self.make_key(tool_name, tool_input)
+            if self._claim_refresh(key):
+                threading.Thread(
+                    target=self._refresh, args=(key, tool_name, tool_input, loader), daemon=True
+                ).start()
+            return cached, "stale"
+
+        result = loader()
+        self.store_result(tool_name, tool_input, result)
+        return result, "miss"
+
+    def _claim_refresh(self, key: str) -> bool:
+        """Ensure only one background refresh runs per key"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    async def _refresh_async(self, key: str, tool_name: str, tool_input, loader):
+        try:
+            await self.store_result_async(tool_name, tool_input, await loader())
+        except Exception:
+            pass
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: str, tool_name: str, tool_input, loader):
+        try:
+            self.store_result(tool_name, tool_input, loader())
+        except Exception:
+            pass
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def get_stats(self) -> dict:
+        return self.store.get_stats()
+
+
+# Shared instance used by the executor
+tool_cache = ToolCache()
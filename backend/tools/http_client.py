@@ -0,0 +1,287 @@
+"""
+HTTP Client - Shared keep-alive connection pool for tool API calls
+"""
+import json
+import atexit
+import asyncio
+import threading
+
+from config import settings
+from cassette import cassette
+from resilience import (
+    rate_limits, hedgers, circuit_breakers, RateLimitExceeded, CircuitOpenError, parse_retry_after
+)
+
+
+class TransportError(Exception):
+    """Raised when an HTTP request could not be completed"""
+
+
+class TransportTimeout(TransportError):
+    """Raised when an HTTP request exceeded its connect or read timeout"""
+
+
+class CircuitOpen(TransportError):
+    """Raised without a request while the upstream's circuit breaker is open"""
+
+
+class HttpResponse:
+    """Transport-independent HTTP response returned by HttpClient"""
+
+    def __init__(self, status_code: int, body: bytes, headers: dict = None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = dict(headers or {})
+
+    def json(self):
+        """
+        Parsed JSON body
+
+        Raises:
+            TransportError: if the body is not valid JSON (e.g. an HTML page
+                from a proxy or captive portal, or a truncated body)
+        """
+        try:
+            return json.loads(self.body)
+        except ValueError as e:
+            raise TransportError(f"Invalid JSON in response (HTTP {self.status_code})") from e
+
+
+def _throttled(response: HttpResponse) -> tuple:
+    """(throttled, retry_after_seconds) for the rate limiter"""
+    if response.status_code != 429:
+        return False, None
+    retry_after = next(
+        (value for key, value in response.headers.items() if key.lower() == "retry-after"), None
+    )
+    return True, parse_retry_after(retry_after)
+
+
+def _failed(response: HttpResponse):
+    """Outcome for the circuit breaker: 5xx fails, 429 is neutral, the rest succeed"""
+    if response.status_code == 429:
+        return None
+    return response.status_code >= 500
+
+
+class HttpClient:
+    """
+    Pooled HTTP transport shared by all tools
+
+    The sync side is a requests.Session; the async side keeps one aiohttp
+    ClientSession per event loop. Both reuse keep-alive connections, so only
+    the first call to a host pays DNS + TCP + TLS setup. Short-lived loops
+    (asyncio.run) should await close_loop_session() before they finish;
+    sessions left behind by loops that closed anyway are dropped the next
+    time a session is created. requests and aiohttp
+    are imported with the first session that needs them, so importing the
+    tools costs nothing until a tool actually makes a request.
+    """
+
+    def __init__(self, pool_size: int = None, per_host_limit: int = None,
+                 connect_timeout: float = None, read_timeout: float = None):
+        self.pool_size = pool_size or settings.get_int("HTTP_POOL_SIZE", 20)
+        self.per_host_limit = per_host_limit or settings.get_int("HTTP_POOL_PER_HOST", 10)
+        self.connect_timeout = connect_timeout or settings.get_float("HTTP_CONNECT_TIMEOUT", 3.05)
+        self.read_timeout = read_timeout or settings.get_float("HTTP_READ_TIMEOUT", 10.0)
+        self._lock = threading.Lock()
+        self._session = None
+        # Keyed by loop, not weakly: each session's connector references its
+        # loop, so a weak key would never be released
+        self._async_sessions = {}
+
+    @property
+    def session(self):
+        """Lazily created sync requests.Session with a bounded per-host pool"""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.per_host_limit
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def _get_async_session(self):
+        """Return the aiohttp ClientSession bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                self._drop_closed_loops()
+                import aiohttp
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.per_host_limit,
+                    ttl_dns_cache=300
+                )
+                timeout = aiohttp.ClientTimeout(
+                    total=self.connect_timeout + self.read_timeout,
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout
+                )
+                session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+                self._async_sessions[loop] = session
+            return session
+
+    def _drop_closed_loops(self):
+        """Forget sessions whose event loop has closed (caller holds the lock)"""
+        for loop in [loop for loop in self._async_sessions if loop.is_closed()]:
+            del self._async_sessions[loop]
+
+    async def close_loop_session(self):
+        """Close the running loop's session; await before a short-lived loop ends"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._async_sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    def get(self, url: str, params: dict = None, upstream: str = None) -> HttpResponse:
+        """
+        Perform a GET request on the pooled sync session
+
+        With an upstream, the request goes through that upstream's circuit
+        breaker, then its hedger, and each attempt through its rate limiter.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            upstream: Upstream name (e.g. the tool name) for the resilience
+                layer; None = plain request
+
+        Raises:
+            CircuitOpen: if the upstream's circuit breaker is open
+            TransportTimeout: if the connect or read timeout was exceeded
+            TransportError: for any other connection-level failure, or when
+                the rate limiter could not admit the call in time
+        """
+        if not upstream:
+            return self._send(url, params)
+        limiter = rate_limits.get(upstream)
+        hedger = hedgers.get(upstream)
+        breaker = circuit_breakers.get(upstream)
+
+        def attempt():
+            if limiter is None:
+                return self._send(url, params)
+            return limiter.call(lambda: self._send(url, params), _throttled)
+
+        def hedged():
+            return hedger.call(attempt) if hedger is not None else attempt()
+
+        try:
+            return breaker.call(hedged, _failed) if breaker is not None else hedged()
+        except RateLimitExceeded as e:
+            raise TransportError(str(e)) from e
+        except CircuitOpenError as e:
+            raise CircuitOpen(str(e)) from e
+
+    def _send(self, url: str, params: dict = None) -> HttpResponse:
+        if cassette.enabled:
+            return cassette.http(url, params, self._get)
+        return self._get(url, params)
+
+    def _get(self, url: str, params: dict = None) -> HttpResponse:
+        session = self.session
+        import requests
+        try:
+            response = session.get(
+                url, params=params, timeout=(self.connect_timeout, self.read_timeout)
+            )
+        except requests.exceptions.Timeout as e:
+            raise TransportTimeout("Request timed out") from e
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+        return HttpResponse(response.status_code, response.content, response.headers)
+
+    async def get_async(self, url: str, params: dict = None, upstream: str = None) -> HttpResponse:
+        """
+        Perform a GET request on the pooled aiohttp session of the running loop
+
+        Args and errors are the same as for get().
+        """
+        if not upstream:
+            return await self._send_async(url, params)
+        limiter = rate_limits.get(upstream)
+        hedger = hedgers.get(upstream)
+        breaker = circuit_breakers.get(upstream)
+
+        async def attempt():
+            if limiter is None:
+                return await self._send_async(url, params)
+            return await limiter.call_async(lambda: self._send_async(url, params), _throttled)
+
+        async def hedged():
+            return await hedger.call_async(attempt) if hedger is not None else await attempt()
+
+        try:
+            return await breaker.call_async(hedged, _failed) if breaker is not None else await hedged()
+        except RateLimitExceeded as e:
+            raise TransportError(str(e)) from e
+        except CircuitOpenError as e:
+            raise CircuitOpen(str(e)) from e
+
+    async def _send_async(self, url: str, params: dict = None) -> HttpResponse:
+        if cassette.enabled:
+            return await cassette.http_async(url, params, self._get_async)
+        return await self._get_async(url, params)
+
+    async def _get_async(self, url: str, params: dict = None) -> HttpResponse:
+        session = self._get_async_session()
+        import aiohttp
+        try:
+            async with session.get(url, params=params) as response:
+                body = await response.read()
+                return HttpResponse(response.status, body, response.headers)
+        except asyncio.TimeoutError as e:
+            raise TransportTimeout("Request timed out") from e
+        except aiohttp.ClientError as e:
+            raise TransportError(str(e)) from e
+
+    async def aclose(self):
+        """Close every pooled session; call from the app's shutdown hook"""
+        with self._lock:
+            sessions = list(self._async_sessions.items())
+            self._async_sessions.clear()
+        current = asyncio.get_running_loop()
+        for loop, session in sessions:
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+        self._close_sync_session()
+
+    def close(self):
+        """Close every pooled session from synchronous code"""
+        with self._lock:
+            sessions = list(self._async_sessions.items())
+            self._async_sessions.clear()
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, session in sessions:
+            # Sessions on the caller's own loop can't be awaited from here
+            if loop is not current and loop.is_running():
+                try:
+                    asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=5)
+                except Exception:
+                    pass
+        self._close_sync_session()
+
+    def _close_sync_session(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+# Shared instance used by all tools
+http_client = HttpClient()
+atexit.register(http_client.close)
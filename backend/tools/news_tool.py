@@ -1,11 +1,9 @@
 """
 News Tool - NewsAPI.org Integration
 """
-import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
+from config import settings
+from lazy import lazy_attributes
+from .http_client import http_client, HttpResponse, TransportError, TransportTimeout, CircuitOpen
 
 
 class NewsTool:
@@ -13,10 +11,16 @@ class NewsTool:
     
     name = "news"
     description = "Get latest news articles on a topic or from top headlines. Input: search query or 'headlines' for top news"
+    # Registry metadata (see tools.registry.ToolSpec)
+    latency_ms = 500
+    cost = 1
+    cache_ttl = 1800
+    idempotent = True
     
-    def __init__(self):
-        self.api_key = os.environ.get("NEWS_API_KEY")
-        self.base_url = "https://newsapi.org/v2"
+    def __init__(self, http=None):
+        self.api_key = settings.get("NEWS_API_KEY")
+        self.base_url = settings.get("NEWS_API_URL", "https://newsapi.org/v2")
+        self.http = http or http_client
     
     def execute(self, query: str, count: int = 5) -> dict:
         """
@@ -30,56 +34,75 @@ class NewsTool:
             dict with news articles or error
         """
         try:
-            if query.lower() == "headlines":
-                url = f"{self.base_url}/top-headlines"
-                params = {
-                    "apiKey": self.api_key,
-                    "country": "us",
-                    "pageSize": count
-                }
-            else:
-                url = f"{self.base_url}/everything"
-                params = {
-                    "apiKey": self.api_key,
-                    "q": query,
-                    "pageSize": count,
-                    "sortBy": "publishedAt",
-                    "language": "en"
-                }
-            
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                articles = []
-                
-                for article in data.get("articles", [])[:count]:
-                    articles.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt")
-                    })
-                
-                return {
-                    "success": True,
-                    "query": query,
-                    "total_results": data.get("totalResults", 0),
-                    "articles": articles
-                }
-            elif response.status_code == 401:
-                return {"success": False, "error": "Invalid API key"}
-            elif response.status_code == 429:
-                return {"success": False, "error": "Rate limit exceeded"}
-            else:
-                return {"success": False, "error": f"API error: {response.status_code}"}
-                
-        except requests.exceptions.Timeout:
+            url, params = self._build_request(query, count)
+            response = self.http.get(url, params=params, upstream=self.name)
+            return self._parse_response(query, count, response)
+        except CircuitOpen as e:
+            return {"success": False, "error": str(e), "circuit_open": True}
+        except TransportTimeout:
             return {"success": False, "error": "Request timed out"}
-        except requests.exceptions.RequestException as e:
+        except TransportError as e:
             return {"success": False, "error": str(e)}
+    
+    async def execute_async(self, query: str, count: int = 5) -> dict:
+        """Async variant of execute using the pooled aiohttp transport"""
+        try:
+            url, params = self._build_request(query, count)
+            response = await self.http.get_async(url, params=params, upstream=self.name)
+            return self._parse_response(query, count, response)
+        except CircuitOpen as e:
+            return {"success": False, "error": str(e), "circuit_open": True}
+        except TransportTimeout:
+            return {"success": False, "error": "Request timed out"}
+        except TransportError as e:
+            return {"success": False, "error": str(e)}
+    
+    def _build_request(self, query: str, count: int) -> tuple:
+        if query.lower() == "headlines":
+            url = f"{self.base_url}/top-headlines"
+            params = {
+                "apiKey": self.api_key,
+                "country": "us",
+                "pageSize": count
+            }
+        else:
+            url = f"{self.base_url}/everything"
+            params = {
+                "apiKey": self.api_key,
+                "q": query,
+                "pageSize": count,
+                "sortBy": "publishedAt",
+                "language": "en"
+            }
+        return url, params
+    
+    def _parse_response(self, query: str, count: int, response: HttpResponse) -> dict:
+        if response.status_code == 200:
+            data = response.json()
+            articles = []
+            
+            for article in data.get("articles", [])[:count]:
+                articles.append({
+                    "title": article.get("title"),
+                    "source": article.get("source", {}).get("name"),
+                    "description": article.get("description"),
+                    "url": article.get("url"),
+                    "published_at": article.get("publishedAt")
+                })
+            
+            return {
+                "success": True,
+                "query": query,
+                "total_results": data.get("totalResults", 0),
+                "articles": articles
+            }
+        elif response.status_code == 401:
+            return {"success": False, "error": "Invalid API key"}
+        elif response.status_code == 429:
+            return {"success": False, "error": "Rate limit exceeded"}
+        else:
+            return {"success": False, "error": f"API error: {response.status_code}"}
 
 
-# Singleton instance
-news_tool = NewsTool()
+# Singleton instance, built on first use
+__getattr__ = lazy_attributes(globals(), news_tool=NewsTool)
@@ -0,0 +1,237 @@
+"""
+Tool Registry - Declared tool metadata (latency, cost, caching, batching) and plugin discovery
+"""
+import threading
+from collections.abc import Mapping
+
+from config import settings
+from metrics import registry as metrics_registry
+from .cache import tool_cache
+from .single_flight import SingleFlightTool
+
+# Entry point group for tools shipped in other packages, e.g. in their pyproject.toml:
+#   [project.entry-points."ai_ops_assistant.tools"]
+#   stocks = "ai_ops_stocks:StockTool"
+ENTRY_POINT_GROUP = "ai_ops_assistant.tools"
+
+# Assumed latency of a tool that doesn't declare one
+DEFAULT_LATENCY_MS = 500.0
+# Weight of the newest sample in the latency EWMA
+LATENCY_ALPHA = 0.2
+
+
+class LatencyEWMA:
+    """Exponentially weighted moving average of a latency, seeded with an estimate"""
+
+    def __init__(self, initial_ms: float, alpha: float = LATENCY_ALPHA):
+        """
+        Args:
+            initial_ms: Estimate reported until the first sample replaces it
+            alpha: Weight of each new sample
+        """
+        self.value_ms = float(initial_ms)
+        self.alpha = alpha
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        milliseconds = seconds * 1000
+        with self._lock:
+            if self.samples == 0:
+                self.value_ms = milliseconds
+            else:
+                self.value_ms += self.alpha * (milliseconds - self.value_ms)
+            self.samples += 1
+
+
+class ToolSpec:
+    """
+    What the executor knows about a tool besides how to call it
+
+    Tools declare it as class attributes next to name and description
+    (latency_ms, cost, cache_ttl, idempotent); a tool is batchable when it
+    implements execute_many_async. A tool that is not idempotent is never
+    cached, deduplicated or batched, since each call must reach it.
+    """
+
+    def __init__(self, name: str, description: str, factory, latency_ms: float = DEFAULT_LATENCY_MS,
+                 cost: float = 1.0, cache_ttl: float = 0, idempotent: bool = True, batchable: bool = False,
+                 source: str = "builtin"):
+        """
+        Args:
+            name: Name plans refer to the tool by
+            description: What the planner is told about the tool
+            factory: Zero-argument callable returning the tool instance
+            latency_ms: Expected latency of one call, until measured
+            cost: Relative cost of one upstream call (e.g. API quota units)
+            cache_ttl: Seconds a successful result stays fresh; 0 = not cached
+            idempotent: Repeating a call is harmless
+            batchable: The tool serves several inputs in one execute_many_async call
+            source: "builtin" or the entry point the tool was loaded from
+        """
+        self.name = name
+        self.description = description
+        self.factory = factory
+        self.declared_latency_ms = latency_ms
+        self.cost = cost
+        self.idempotent = idempotent
+        self.cache_ttl = cache_ttl if idempotent else 0
+        self.batchable = batchable and idempotent
+        self.source = source
+        self.latency = LatencyEWMA(latency_ms)
+        self.stats = {"calls": 0, "cost": 0.0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_class(cls, tool_class, factory=None, source: str = "builtin") -> "ToolSpec":
+        """Spec from the attributes a tool class declares; factory defaults to the class itself"""
+        return cls(
+            name=tool_class.name,
+            description=getattr(tool_class, "description", ""),
+            factory=factory or tool_class,
+            latency_ms=getattr(tool_class, "latency_ms", DEFAULT_LATENCY_MS),
+            cost=getattr(tool_class, "cost", 1.0),
+            cache_ttl=getattr(tool_class, "cache_ttl", 0),
+            idempotent=getattr(tool_class, "idempotent", True),
+            batchable=hasattr(tool_class, "execute_many_async"),
+            source=source
+        )
+
+    @property
+    def latency_ms(self) -> float:
+        """Expected latency of the next call: measured EWMA, or the declared value before any call"""
+        return self.latency.value_ms
+
+    def observe(self, seconds: float, calls: int = 1):
+        """Record one upstream request serving calls tool inputs"""
+        self.latency.observe(seconds)
+        with self._lock:
+            self.stats["calls"] += calls
+            self.stats["cost"] += self.cost
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["latency_ms"] = round(self.latency_ms, 2)
+        stats["latency_samples"] = self.latency.samples
+        stats["declared_latency_ms"] = self.declared_latency_ms
+        stats["cache_ttl"] = self.cache_ttl
+        return stats
+
+
+class ToolRegistry(Mapping):
+    """
+    Registered tools by name, each built on first use
+
+    Built-in tools are registered by the tools package; tools from other
+    packages are discovered through ENTRY_POINT_GROUP entry points the first
+    time the registry is read, so neither discovery nor tool construction
+    happens at import. Reads like the {name: tool} dict AVAILABLE_TOOLS used
+    to be, with idempotent tools behind a SingleFlightTool.
+    """
+
+    def __init__(self, discover: bool = None, cache=None):
+        """
+        Args:
+            discover: Load entry point tools (default TOOL_DISCOVERY_ENABLED)
+            cache: ToolCache receiving each tool's cache_ttl (default: the shared tool_cache)
+        """
+        if discover is None:
+            discover = settings.get_bool("TOOL_DISCOVERY_ENABLED", True)
+        self.cache = cache or tool_cache
+        self.discovery_errors = {}
+        self._specs = {}
+        self._instances = {}
+        self._discovered = not discover
+        self._discovering = False
+        self._lock = threading.RLock()
+
+    def register(self, spec: ToolSpec, replace: bool = False):
+        """
+        Add a tool
+
+        Raises:
+            ValueError: if a tool with the same name is registered and replace is False
+        """
+        with self._lock:
+            if spec.name in self._specs and not replace:
+                raise ValueError(f"Tool {spec.name!r} is already registered")
+            self._specs[spec.name] = spec
+            self._instances.pop(spec.name, None)
+        self.cache.set_ttl(spec.name, spec.cache_ttl, overridable=spec.idempotent)
+        metrics_registry.register_stats(f"ai_ops_tool_{spec.name}", spec.get_stats)
+
+    def _discover(self):
+        """Register the entry point tools, once; a tool that fails to load is skipped"""
+        if self._discovered:
+            return
+        with self._lock:
+            # A plugin reading the registry while it is being loaded sees the tools so far
+            if self._discovered or self._discovering:
+                return
+            self._discovering = True
+            try:
+                # importlib.metadata is slow to import and scans every installed distribution
+                from importlib import metadata
+                for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+                    if entry_point.name in self._specs:
+                        continue
+                    try:
+                        loaded = entry_point.load()
+                        if isinstance(loaded, ToolSpec):
+                            spec = loaded
+                        else:
+                            spec = ToolSpec.from_class(loaded, source=entry_point.value)
+                        self.register(spec)
+                    except Exception as e:
+                        self.discovery_errors[entry_point.name] = str(e)
+            finally:
+                self._discovered = True
+
+    def spec(self, name: str):
+        """ToolSpec of a registered tool, or None"""
+        self._discover()
+        return self._specs.get(name)
+
+    def specs(self) -> dict:
+        self._discover()
+        return dict(self._specs)
+
+    def descriptions(self) -> dict:
+        """{name: description} of every tool, for the planner prompt"""
+        return {name: spec.description for name, spec in self.specs().items()}
+
+    def __getitem__(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        spec = self.spec(name)
+        if spec is None:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self._instances:
+                tool = spec.factory()
+                self._instances[name] = SingleFlightTool(tool) if spec.idempotent else tool
+            return self._instances[name]
+
+    def __contains__(self, name) -> bool:
+        return self.spec(name) is not None
+
+    def __iter__(self):
+        return iter(self.specs())
+
+    def __len__(self) -> int:
+        return len(self.specs())
+
+    def observe(self, name: str, seconds: float, calls: int = 1):
+        """Record the latency of an upstream request made for a tool"""
+        spec = self._specs.get(name)
+        if spec is not None:
+            spec.observe(seconds, calls)
+
+    def get_stats(self) -> dict:
+        return {name: spec.get_stats() for name, spec in self.specs().items()}
+
+
+# Shared registry; the built-in tools are registered in tools/__init__.py
+tool_registry = ToolRegistry()
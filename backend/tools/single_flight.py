@@ -0,0 +1,154 @@
+"""
+Single Flight - Collapses concurrent identical tool calls into one upstream request
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, CancelledError
+
+from .cache import ToolCache
+
+
+class SingleFlight:
+    """
+    De-duplicates in-flight calls by key
+
+    The first caller for a key (the leader) runs the call; every caller that
+    arrives while it is in flight waits for the leader's outcome instead,
+    including its exception. Calls are tracked with concurrent.futures.Future,
+    so threads and coroutines on any event loop can share the same flight.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def _join(self, key: str) -> tuple:
+        """Return (future, is_leader) for a key"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self.stats["leaders"] += 1
+                return future, True
+            self.stats["coalesced"] += 1
+            return future, False
+
+    def _finish(self, key: str, future: Future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: str, fn):
+        """Run fn() once for all concurrent callers with the same key (thread callers)"""
+        while True:
+            future, is_leader = self._join(key)
+            if not is_leader:
+                try:
+                    return future.result()
+                except CancelledError:
+                    # The leader was cancelled; take over rather than fail
+                    continue
+
+            try:
+                result = fn()
+            except BaseException as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            else:
+                if not future.done():
+                    future.set_result(result)
+                return result
+            finally:
+                self._finish(key, future)
+
+    async def do_async(self, key: str, coro_fn):
+        """Await coro_fn() once for all concurrent callers with the same key (asyncio callers)"""
+        while True:
+            future, is_leader = self._join(key)
+            if not is_leader:
+                try:
+                    # Shield so a cancelled follower doesn't cancel the shared call
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    continue
+
+            try:
+                result = await coro_fn()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                if not future.done():
+                    future.set_exception(e)
+                raise
+            else:
+                if not future.done():
+                    future.set_result(result)
+                return result
+            finally:
+                self._finish(key, future)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+class SingleFlightTool:
+    """Tool proxy that routes execute/execute_async through a SingleFlight group"""
+
+    def __init__(self, tool, group: SingleFlight = None):
+        self._tool = tool
+        self._group = group or single_flight
+
+    @property
+    def tool(self):
+        """The wrapped tool instance"""
+        return self._tool
+
+    def _key(self, tool_input, args: tuple, kwargs: dict) -> str:
+        key = ToolCache.make_key(self._tool.name, tool_input)
+        if args or kwargs:
+            key += f"|{args!r}|{sorted(kwargs.items())!r}"
+        return key
+
+    def execute(self, tool_input, *args, **kwargs) -> dict:
+        return self._group.do(
+            self._key(tool_input, args, kwargs),
+            lambda: self._tool.execute(tool_input, *args, **kwargs)
+        )
+
+    async def execute_async(self, tool_input, *args, **kwargs) -> dict:
+        return await self._group.do_async(
+            self._key(tool_input, args, kwargs),
+            lambda: self._tool.execute_async(tool_input, *args, **kwargs)
+        )
+
+    async def call_async(self, tool_input, coro_fn) -> dict:
+        """
+        Like execute_async, but the leader awaits coro_fn(tool) instead
+
+        Lets a caller wrap the one upstream call (e.g. to time it) without
+        the coalesced callers running the wrapper too.
+
+        Args:
+            tool_input: Input the calls are keyed by
+            coro_fn: Async callable taking the wrapped tool and returning its result
+        """
+        return await self._group.do_async(
+            self._key(tool_input, (), {}),
+            lambda: coro_fn(self._tool)
+        )
+
+    def __getattr__(self, attr):
+        return getattr(self._tool, attr)
+
+
+# Shared group for every registered tool
+single_flight = SingleFlight()
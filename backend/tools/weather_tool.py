@@ -1,11 +1,17 @@
 """
 Weather Tool - OpenWeatherMap API Integration
 """
-import os
-import requests
-from dotenv import load_dotenv
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+from config import settings
+from lazy import lazy_attributes
+from .http_client import http_client, HttpResponse, TransportError, TransportTimeout, CircuitOpen
+
+
+# OpenWeatherMap accepts at most 20 city IDs per group request
+GROUP_MAX_IDS = 20
+MAX_KNOWN_CITIES = 4096
 
 
 class WeatherTool:
@@ -13,10 +19,19 @@ class WeatherTool:
     
     name = "weather"
     description = "Get current weather information for a city. Input: city name (e.g., 'London', 'New York')"
+    # Registry metadata (see tools.registry.ToolSpec)
+    latency_ms = 300
+    cost = 1
+    cache_ttl = 600
+    idempotent = True
     
-    def __init__(self):
-        self.api_key = os.environ.get("WEATHER_API_KEY")
-        self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+    def __init__(self, http=None):
+        self.api_key = settings.get("WEATHER_API_KEY")
+        self.base_url = settings.get("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+        self.group_url = self.base_url.rsplit("/", 1)[0] + "/group"
+        self.http = http or http_client
+        # City name -> OpenWeatherMap city ID, learned from single lookups
+        self._city_ids = {}
     
     def execute(self, city: str) -> dict:
         """
@@ -29,37 +44,144 @@ class WeatherTool:
             dict with weather information or error
         """
         try:
-            params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "city": data.get("name"),
-                    "country": data.get("sys", {}).get("country"),
-                    "temperature": data.get("main", {}).get("temp"),
-                    "feels_like": data.get("main", {}).get("feels_like"),
-                    "humidity": data.get("main", {}).get("humidity"),
-                    "description": data.get("weather", [{}])[0].get("description"),
-                    "wind_speed": data.get("wind", {}).get("speed"),
-                    "pressure": data.get("main", {}).get("pressure")
-                }
-            elif response.status_code == 404:
-                return {"success": False, "error": f"City '{city}' not found"}
-            else:
-                return {"success": False, "error": f"API error: {response.status_code}"}
-                
-        except requests.exceptions.Timeout:
+            response = self.http.get(self.base_url, params=self._build_params(city), upstream=self.name)
+            return self._parse_response(city, response)
+        except CircuitOpen as e:
+            return {"success": False, "error": str(e), "circuit_open": True}
+        except TransportTimeout:
             return {"success": False, "error": "Request timed out"}
-        except requests.exceptions.RequestException as e:
+        except TransportError as e:
             return {"success": False, "error": str(e)}
+    
+    async def execute_async(self, city: str) -> dict:
+        """Async variant of execute using the pooled aiohttp transport"""
+        try:
+            response = await self.http.get_async(
+                self.base_url, params=self._build_params(city), upstream=self.name
+            )
+            return self._parse_response(city, response)
+        except CircuitOpen as e:
+            return {"success": False, "error": str(e), "circuit_open": True}
+        except TransportTimeout:
+            return {"success": False, "error": "Request timed out"}
+        except TransportError as e:
+            return {"success": False, "error": str(e)}
+    
+    def execute_many(self, cities: list) -> dict:
+        """
+        Fetch current weather for several cities
+        
+        Cities whose IDs are known share one group request per 20 cities;
+        the rest (and any group request that fails) are fetched in parallel.
+        
+        Args:
+            cities: City names
+            
+        Returns:
+            dict mapping each requested city to its execute() result
+        """
+        results = {}
+        known = self._known_ids(cities)
+        for chunk in self._chunks(known):
+            try:
+                response = self.http.get(
+                    self.group_url, params=self._build_group_params(chunk), upstream=self.name
+                )
+                results.update(self._parse_group_response(chunk, response))
+            except TransportError:
+                pass
+        missing = [city for city in dict.fromkeys(cities) if city not in results]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), GROUP_MAX_IDS)) as pool:
+                results.update(zip(missing, pool.map(self.execute, missing)))
+        return results
+    
+    async def execute_many_async(self, cities: list) -> dict:
+        """Async variant of execute_many"""
+        results = {}
+        known = self._known_ids(cities)
+        
+        async def fetch_group(chunk):
+            try:
+                response = await self.http.get_async(
+                    self.group_url, params=self._build_group_params(chunk), upstream=self.name
+                )
+                return self._parse_group_response(chunk, response)
+            except TransportError:
+                return {}
+        
+        for group in await asyncio.gather(*(fetch_group(chunk) for chunk in self._chunks(known))):
+            results.update(group)
+        missing = [city for city in dict.fromkeys(cities) if city not in results]
+        if missing:
+            singles = await asyncio.gather(*(self.execute_async(city) for city in missing))
+            results.update(zip(missing, singles))
+        return results
+    
+    def _known_ids(self, cities: list) -> dict:
+        """City -> ID for the cities a group request can serve"""
+        known = {}
+        for city in dict.fromkeys(cities):
+            city_id = self._city_ids.get(city.strip().lower())
+            if city_id is not None:
+                known[city] = city_id
+        # A group request only pays off for two or more cities
+        return known if len(known) >= 2 else {}
+    
+    @staticmethod
+    def _chunks(known: dict) -> list:
+        items = list(known.items())
+        return [dict(items[i:i + GROUP_MAX_IDS]) for i in range(0, len(items), GROUP_MAX_IDS)]
+    
+    def _build_group_params(self, chunk: dict) -> dict:
+        return {
+            "id": ",".join(str(city_id) for city_id in chunk.values()),
+            "appid": self.api_key,
+            "units": "metric"
+        }
+    
+    def _parse_group_response(self, chunk: dict, response: HttpResponse) -> dict:
+        """Split a group response back into per-city results; cities it lacks are left out"""
+        if response.status_code != 200:
+            return {}
+        by_id = {item.get("id"): item for item in response.json().get("list", [])}
+        return {
+            city: self._parse_payload(by_id[city_id])
+            for city, city_id in chunk.items() if city_id in by_id
+        }
+    
+    def _build_params(self, city: str) -> dict:
+        return {
+            "q": city,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+    
+    def _parse_response(self, city: str, response: HttpResponse) -> dict:
+        if response.status_code == 200:
+            data = response.json()
+            if data.get("id") is not None and len(self._city_ids) < MAX_KNOWN_CITIES:
+                self._city_ids[city.strip().lower()] = data["id"]
+            return self._parse_payload(data)
+        elif response.status_code == 404:
+            return {"success": False, "error": f"City '{city}' not found"}
+        else:
+            return {"success": False, "error": f"API error: {response.status_code}"}
+    
+    @staticmethod
+    def _parse_payload(data: dict) -> dict:
+        return {
+            "success": True,
+            "city": data.get("name"),
+            "country": data.get("sys", {}).get("country"),
+            "temperature": data.get("main", {}).get("temp"),
+            "feels_like": data.get("main", {}).get("feels_like"),
+            "humidity": data.get("main", {}).get("humidity"),
+            "description": data.get("weather", [{}])[0].get("description"),
+            "wind_speed": data.get("wind", {}).get("speed"),
+            "pressure": data.get("main", {}).get("pressure")
+        }
 
 
-# Singleton instance
-weather_tool = WeatherTool()
+# Singleton instance, built on first use
+__getattr__ = lazy_attributes(globals(), weather_tool=WeatherTool)